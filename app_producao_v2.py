@@ -11,8 +11,9 @@ from pathlib import Path
 # Adiciona o diretório de módulos ao path
 sys.path.append(str(Path(__file__).parent))
 
-from modules.database_manager import GoogleSheetsManager
+from modules.data_context import get_data_context
 from modules.calculator import ProductionCalculator
+from modules.sheet_schema import to_records
 from modules.ui_components import (
     render_machine_visual,
     render_production_table,
@@ -75,8 +76,8 @@ st.markdown("""
 # ========================================
 @st.cache_resource
 def init_manager():
-    """Inicializa o gerenciador de dados"""
-    return GoogleSheetsManager()
+    """Inicializa o gerenciador de dados (o mesmo do contexto de dados do processo)"""
+    return get_data_context().manager
 
 # Inicializa session state
 if 'pedidos_temp' not in st.session_state:
@@ -439,9 +440,9 @@ with tab2:
                     )
 
                     # Mostra informações do produto
-                    produto_info = df_produtos_maq[
+                    produto_info = to_records(df_produtos_maq[
                         df_produtos_maq['REFERENCIA'] == produto_selecionado
-                    ].iloc[0]
+                    ].head(1))[0]
 
                     col_info1, col_info2, col_info3 = st.columns(3)
 
@@ -453,7 +454,7 @@ with tab2:
                                 f"{produto_info['TEMPO DE MONTAGEM']}min")
                     with col_info3:
                         tempo_total = ProductionCalculator.calcular_tempo_total_produto(
-                            produto_info.to_dict()
+                            produto_info
                         )
                         st.metric("Tempo Total/Unidade", f"{tempo_total}min")
 
@@ -540,7 +541,7 @@ with tab2:
                         ]
 
                         if not produto_info.empty:
-                            produto_dict = produto_info.iloc[0].to_dict()
+                            produto_dict = to_records(produto_info.head(1))[0]
                             calc = ProductionCalculator()
 
                             tempo_total_unit = calc.calcular_tempo_total_produto(produto_dict)
@@ -576,10 +577,8 @@ with tab2:
         with col_action2:
             if st.button("💾 Salvar no Google Sheets", use_container_width=True):
                 with st.spinner("Salvando pedidos..."):
-                    erros = 0
-                    for pedido in st.session_state.pedidos_temp:
-                        if not db_manager.add_pedido(pedido):
-                            erros += 1
+                    resultados = db_manager.add_pedidos(st.session_state.pedidos_temp)
+                    erros = sum(1 for r in resultados if not r.get('success'))
 
                     if erros == 0:
                         st.success("✅ Todos os pedidos foram salvos!")
@@ -11,9 +11,10 @@ from pathlib import Path
 # Adiciona o diretório de módulos ao path
 sys.path.append(str(Path(__file__).parent))
 
-from modules.database_manager import GoogleSheetsManager
+from modules.data_context import get_data_context
 from modules.calculator import ProductionCalculator, formatar_data_br
 from modules.optimizer import ProductionOptimizer
+from modules.sheet_schema import to_records
 from modules.ui_components import (
     render_machine_visual,
     render_production_table,
@@ -166,8 +167,8 @@ load_css()
 # ========================================
 @st.cache_resource
 def init_manager():
-    """Inicializa o gerenciador de dados"""
-    return GoogleSheetsManager()
+    """Inicializa o gerenciador de dados (o mesmo do contexto de dados do processo)"""
+    return get_data_context().manager
 
 # Inicializa session state
 if 'pedidos_temp' not in st.session_state:
@@ -583,8 +584,7 @@ with tab2:
         col_a, col_b = st.columns(2)
         with col_a:
             if st.button("💾 SALVAR TODOS", use_container_width=True):
-                for p in st.session_state.pedidos_temp:
-                    db_manager.add_pedido(p)
+                db_manager.add_pedidos(st.session_state.pedidos_temp)
                 st.success("✅ Salvos!")
                 st.session_state.pedidos_temp = []
                 st.rerun()
@@ -598,7 +598,7 @@ with tab2:
                     prod_info = df_prod[df_prod['REFERENCIA'] == pedido['produto']]
                     
                     if not prod_info.empty:
-                        p_dict = prod_info.iloc[0].to_dict()
+                        p_dict = to_records(prod_info.head(1))[0]
                         calc = ProductionCalculator()
                         tempo_unit = calc.calcular_tempo_total_produto(p_dict)
                         dias = calc.calcular_dias_ate_entrega(pedido['data_entrega'])
@@ -0,0 +1,859 @@
+"""
+Emulador local do Web App do Apps Script (google_apps_script.js)
+
+Servidor HTTP que implementa todas as ações GET/POST do Apps Script sobre
+dados locais (CSV, SQLite ou dados de demonstração gerados), com latência e
+taxa de erros configuráveis. Serve para testes de carga e desenvolvimento
+offline sem consumir as cotas da planilha real.
+
+Uso:
+    python apps_script_emulator.py --demo --latency 0.4 --jitter 0.15 --error-rate 0.02
+    python apps_script_emulator.py --csv dados_planilha/ --db emulador.sqlite3
+
+Depois aponte o sistema para o emulador, no config/config.yaml:
+    google_apps_script_url: "http://127.0.0.1:8765/exec"
+ou pela variável de ambiente GOOGLE_APPS_SCRIPT_URL.
+"""
+import argparse
+import base64
+import csv
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+PRODUTO_HEADERS = [
+    'REFERÊNCIAS/MÁQUINA', 'TEMPO DE PRODUÇÃO', 'TEMPO DE MONTAGEM',
+    'VOLTAS NA ESPULA', 'PRODUÇÃO POR MINUTO', 'COR', 'REFERENCIA',
+    'LARGURA', 'MONTAGEM 2X2', 'TEMPO MONTAGEM 2X2'
+]
+PEDIDO_HEADERS = ['CLIENTE', 'ORDEM DE COMPRA', 'DATA DE ENTREGA', 'MAQUINAS', 'BOCAS']
+
+# Mesmos limites do google_apps_script.js
+REVISION_LOG_SIZE = 300
+DELTA_MAX_ROWS = 1000
+
+_DATE_PATTERNS = (
+    (re.compile(r'^\d{4}-\d{2}-\d{2}$'), '%Y-%m-%d'),
+    (re.compile(r'^\d{2}/\d{2}/\d{4}$'), '%d/%m/%Y'),
+)
+
+
+def parse_cell(value: Any) -> Any:
+    """
+    Converte um texto como o Sheets faria ao digitá-lo na célula
+
+    Números viram int/float e datas (AAAA-MM-DD ou DD/MM/AAAA) viram date;
+    o restante continua texto.
+    """
+    if not isinstance(value, str):
+        return value
+
+    text = value.strip()
+    if text == '':
+        return ''
+
+    for pattern, fmt in _DATE_PATTERNS:
+        if pattern.match(text):
+            try:
+                return datetime.strptime(text, fmt).date()
+            except ValueError:
+                return value
+
+    try:
+        number = float(text.replace(',', '.')) if re.match(r'^-?\d+([.,]\d+)?$', text) else None
+    except ValueError:
+        number = None
+    if number is None:
+        return value
+    return int(number) if number.is_integer() else number
+
+
+def json_value(value: Any) -> Any:
+    """Valor como o JSON.stringify do Apps Script serializa um Date (meia-noite de Brasília)"""
+    if isinstance(value, date):
+        return f"{value.isoformat()}T03:00:00.000Z"
+    return value
+
+
+def normalize_cell_value(value: Any) -> Any:
+    """Equivalente a normalizeCellValue do Apps Script (datas como AAAA-MM-DD)"""
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+# Operadores de getSheetPage sobre o resultado de compare_filter
+FILTER_OPS = {
+    '=': lambda c: c == 0,
+    '!=': lambda c: c != 0,
+    '>': lambda c: c > 0,
+    '>=': lambda c: c >= 0,
+    '<': lambda c: c < 0,
+    '<=': lambda c: c <= 0,
+}
+_BR_DATE = re.compile(r'^(\d{2})/(\d{2})/(\d{4})$')
+_ISO_DATETIME = re.compile(r'^\d{4}-\d{2}-\d{2}T')
+
+
+def filter_key(value: Any) -> Any:
+    """Equivalente a filterKey do Apps Script"""
+    if isinstance(value, date):
+        return normalize_cell_value(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+
+    if isinstance(value, bool):
+        text = 'true' if value else 'false'
+    else:
+        text = '' if value is None else str(value).strip()
+    br = _BR_DATE.match(text)
+    if br:
+        return f"{br.group(3)}-{br.group(2)}-{br.group(1)}"
+    if _ISO_DATETIME.match(text):
+        return text[:10]
+    return text.upper()
+
+
+def compare_filter(cell: Any, key: Any) -> float:
+    """Equivalente a compareFilter do Apps Script"""
+    value = filter_key(cell)
+    if isinstance(value, (int, float)) and isinstance(key, (int, float)):
+        return value - key
+    a, b = str(value), str(key)
+    return -1 if a < b else (1 if a > b else 0)
+
+
+def column_index(letters: str) -> int:
+    """Converte a letra da coluna (A, K, AA) no índice base 1"""
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + (ord(char) - ord('A') + 1)
+    return index
+
+
+def parse_a1(address: str) -> Tuple[int, int, int, int]:
+    """
+    Converte um intervalo A1 (K1, A2:C10) em (linha1, coluna1, linha2, coluna2), base 1
+
+    Raises:
+        ValueError se o intervalo for inválido
+    """
+    match = re.match(r'^([A-Za-z]+)(\d+)(?::([A-Za-z]+)(\d+))?$', address.strip())
+    if not match:
+        raise ValueError(f"Exception: Range not found: {address}")
+
+    row1, col1 = int(match.group(2)), column_index(match.group(1))
+    if match.group(3):
+        row2, col2 = int(match.group(4)), column_index(match.group(3))
+    else:
+        row2, col2 = row1, col1
+    return min(row1, row2), min(col1, col2), max(row1, row2), max(col1, col2)
+
+
+class SheetStore:
+    """
+    Planilha em memória: cada aba é uma matriz de valores, como getValues()
+
+    A primeira linha é o cabeçalho (nas abas de máquina, K1 guarda a
+    disponibilidade). Escritas podem ser persistidas em SQLite.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Inicializa a planilha vazia
+
+        Args:
+            db_path: Arquivo SQLite para carregar e persistir as abas (opcional)
+        """
+        self.sheets: Dict[str, List[List[Any]]] = {}
+        self.revisions: Dict[str, Dict] = {}
+        self.db_path = db_path
+        self.lock = threading.RLock()
+
+    # ---------- Carga e persistência ----------
+
+    def load_csv_dir(self, directory: str):
+        """Carrega cada <ABA>.csv do diretório como uma aba"""
+        for path in sorted(Path(directory).glob('*.csv')):
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                rows = [[parse_cell(cell) for cell in row] for row in csv.reader(f)]
+            self.sheets[path.stem] = rows
+
+    def load_sqlite(self):
+        """Carrega as abas do SQLite (se o arquivo existir)"""
+        if not self.db_path or not Path(self.db_path).exists():
+            return
+
+        with self._connect() as conn:
+            for name, values in conn.execute(
+                "SELECT name, values_json FROM sheet_rows ORDER BY name, row_index"
+            ):
+                self.sheets.setdefault(name, []).append(
+                    [parse_cell(v) if isinstance(v, str) else v for v in json.loads(values)]
+                )
+
+    def save_sqlite(self, sheet_name: Optional[str] = None):
+        """Persiste uma aba (ou todas) no SQLite configurado"""
+        if not self.db_path:
+            return
+
+        names = [sheet_name] if sheet_name else list(self.sheets)
+        with self._connect() as conn:
+            for name in names:
+                conn.execute("DELETE FROM sheet_rows WHERE name = ?", (name,))
+                conn.executemany(
+                    "INSERT INTO sheet_rows (name, row_index, values_json) VALUES (?, ?, ?)",
+                    [
+                        (name, i, json.dumps([normalize_cell_value(v) for v in row], ensure_ascii=False))
+                        for i, row in enumerate(self.sheets[name])
+                    ]
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre o SQLite criando a tabela se necessário"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheet_rows ("
+            "name TEXT NOT NULL, row_index INTEGER NOT NULL, values_json TEXT NOT NULL, "
+            "PRIMARY KEY (name, row_index))"
+        )
+        return conn
+
+    def generate_demo(self, machines: int = 8, products: int = 40, orders: int = 2000, seed: int = 42):
+        """
+        Gera uma planilha de demonstração
+
+        Args:
+            machines: Número de abas DADOS_<MAQUINA>
+            products: Produtos por máquina (parte deles compartilhada entre máquinas)
+            orders: Linhas da aba DADOS_GERAIS
+            seed: Semente do gerador aleatório
+        """
+        rng = random.Random(seed)
+        nomes = [f"M{i + 1}" for i in range(machines)]
+        cores = ['#00cc66', '#3366ff', '#ff9933', '#ff3366', '#9933ff', '#33ffff']
+        referencias = [f"REF-{i:04d}" for i in range(products * 2)]
+
+        for maquina in nomes:
+            header = PRODUTO_HEADERS + [rng.choice([8, 10, 16, 24])]
+            rows = [header]
+            for ref in rng.sample(referencias, products):
+                montagem_2x2 = rng.random() < 0.3
+                rows.append([
+                    f"{ref}-{maquina}", round(rng.uniform(0.5, 6), 2), round(rng.uniform(0.2, 2), 2),
+                    rng.randint(5, 60), round(rng.uniform(1, 20), 2), rng.choice(cores), ref,
+                    rng.choice([10, 15, 20, 25]), 'Sim' if montagem_2x2 else 'Não',
+                    round(rng.uniform(0.2, 1), 2) if montagem_2x2 else 0
+                ])
+            self.sheets[f"DADOS_{maquina}"] = rows
+
+        hoje = date.today()
+        clientes = [f"CLIENTE {i + 1}" for i in range(max(5, orders // 20))]
+        geral = [list(PEDIDO_HEADERS)]
+        for i in range(orders):
+            geral.append([
+                rng.choice(clientes), f"OC-{10000 + i}",
+                hoje + timedelta(days=rng.randint(1, 90)), rng.choice(nomes), rng.choice([1, 2, 4, 8])
+            ])
+        self.sheets['DADOS_GERAIS'] = geral
+
+    # ---------- Revisões (mesma lógica do google_apps_script.js) ----------
+
+    def revision_state(self, sheet_name: str) -> Dict:
+        """Estado de revisão da aba: {revision, base, log}"""
+        return self.revisions.setdefault(sheet_name, {'revision': 0, 'base': 0, 'log': []})
+
+    def record_change(self, sheet_name: str, first: Optional[int] = None, last: Optional[int] = None):
+        """Registra linhas de dados alteradas (base 0); sem linhas = mudança estrutural"""
+        state = self.revision_state(sheet_name)
+        state['revision'] += 1
+
+        if first is None:
+            state['base'] = state['revision']
+            state['log'] = []
+        else:
+            state['log'].append((state['revision'], first, last))
+            if len(state['log']) > REVISION_LOG_SIZE:
+                removed = state['log'][:len(state['log']) - REVISION_LOG_SIZE]
+                state['log'] = state['log'][len(removed):]
+                state['base'] = removed[-1][0]
+
+    # ---------- Leitura ----------
+
+    def values_to_objects(self, values: List[List[Any]]) -> List[Dict]:
+        """Equivalente a valuesToObjects do Apps Script"""
+        if not values:
+            return []
+
+        headers = [str(json_value(h)) for h in values[0]]
+        return [
+            {header: json_value(row[i] if i < len(row) else '') for i, header in enumerate(headers)}
+            for row in values[1:]
+        ]
+
+    @staticmethod
+    def trim_row(row: List[Any]) -> List[Any]:
+        """Equivalente a trimRow: remove as células vazias do final"""
+        end = len(row)
+        while end > 0 and row[end - 1] == '':
+            end -= 1
+        return [json_value(value) for value in row[:end]]
+
+    def values_to_compact(self, values: List[List[Any]]) -> Dict:
+        """Equivalente a valuesToCompact: {headers, rows} com cabeçalho uma vez"""
+        if not values:
+            return {'headers': [], 'rows': []}
+        return {'headers': [json_value(h) for h in values[0]], 'rows': [self.trim_row(row) for row in values[1:]]}
+
+    def sheet_payload(self, values: List[List[Any]], compact: bool) -> Any:
+        """Aba no formato pedido (format=compact ou lista de objetos)"""
+        return self.values_to_compact(values) if compact else self.values_to_objects(values)
+
+    def unique_column(self, sheet_name: str, header: str, normalize: bool = False) -> List[Any]:
+        """Valores distintos não vazios de uma coluna, na ordem em que aparecem"""
+        values = self.sheets.get(sheet_name)
+        if not values or header not in values[0]:
+            return []
+
+        index = values[0].index(header)
+        result = []
+        seen = set()
+        for row in values[1:]:
+            value = row[index] if index < len(row) else ''
+            if value is None or value == '' or value in seen:
+                continue
+            seen.add(value)
+            result.append(normalize_cell_value(value) if normalize else value)
+        return result
+
+    def cell_range(self, sheet_name: str, address: str) -> Any:
+        """Valor de uma célula ou matriz de um intervalo (datas normalizadas)"""
+        values = self.sheets[sheet_name]
+        row1, col1, row2, col2 = parse_a1(address)
+
+        def cell(r: int, c: int) -> Any:
+            if r - 1 < len(values) and c - 1 < len(values[r - 1]):
+                return normalize_cell_value(values[r - 1][c - 1])
+            return ''
+
+        if row1 == row2 and col1 == col2:
+            return cell(row1, col1)
+        return [[cell(r, c) for c in range(col1, col2 + 1)] for r in range(row1, row2 + 1)]
+
+    @staticmethod
+    def content_hash(values: List[List[Any]]) -> str:
+        """Hash do conteúdo bruto da aba (como contentHash do Apps Script)"""
+        payload = json.dumps(values, ensure_ascii=False, default=json_value)
+        return base64.urlsafe_b64encode(hashlib.md5(payload.encode('utf-8')).digest()).decode('ascii')
+
+    # ---------- Escrita ----------
+
+    def append_rows(self, sheet_name: str, rows: List[List[Any]], headers: Optional[List] = None) -> int:
+        """
+        Acrescenta linhas ao final da aba (criando-a com `headers` se não existir)
+
+        Returns:
+            Número (base 1) da primeira linha gravada na planilha
+        """
+        created = sheet_name not in self.sheets
+        if created:
+            self.sheets[sheet_name] = [list(headers or [])]
+
+        sheet = self.sheets[sheet_name]
+        first = len(sheet) + 1
+        sheet.extend([parse_cell(v) for v in row] for row in rows)
+
+        if created:
+            self.record_change(sheet_name)
+        else:
+            self.record_change(sheet_name, first - 2, first - 2 + len(rows) - 1)
+
+        self.save_sqlite(sheet_name)
+        return first
+
+
+def produto_sheet_name(maquina: str) -> str:
+    """Mesmo nome de aba do Apps Script: DADOS_<MAQUINA>"""
+    return 'DADOS_' + re.sub(r'\s+', '_', maquina).upper()
+
+
+def produto_row(data: Dict) -> List[Any]:
+    """Equivalente a produtoRow do Apps Script"""
+    def to_float(value) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
+
+    tempo_montagem_total = to_float(data.get('tempoMontagem'))
+    if data.get('montagem2x2') == 'Sim' and data.get('tempoMontagem2x2'):
+        tempo_montagem_total += to_float(data.get('tempoMontagem2x2'))
+
+    return [
+        data.get('referenciaMaquina') or '',
+        data.get('tempoProducao') or 0,
+        tempo_montagem_total,
+        data.get('voltasEspula') or 0,
+        data.get('producaoPorMinuto') or 0,
+        data.get('cor') or '#FFFFFF',
+        data.get('referencia') or '',
+        data.get('largura') or 0,
+        data.get('montagem2x2') or 'Não',
+        data.get('tempoMontagem2x2') or 0
+    ]
+
+
+def pedido_row(data: Dict) -> List[Any]:
+    """Equivalente a pedidoRow do Apps Script"""
+    return [
+        data.get('cliente') or '',
+        data.get('ordemCompra') or data.get('ordem_compra') or '',
+        data.get('dataEntrega') or data.get('data_entrega') or '',
+        data.get('maquina') or '',
+        data.get('bocas') or 0
+    ]
+
+
+class AppsScriptEmulator:
+    """Implementa as ações de doGet/doPost sobre um SheetStore"""
+
+    def __init__(
+        self,
+        store: SheetStore,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Inicializa o emulador
+
+        Args:
+            store: Dados da planilha
+            latency: Latência média injetada por requisição (segundos)
+            jitter: Desvio padrão da latência (segundos)
+            error_rate: Fração das requisições que falham com HTTP 500
+            rate_limit_rate: Fração das requisições recusadas com HTTP 429
+            seed: Semente do sorteio de latência e falhas
+        """
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+        self.stats = {'requests': 0, 'errors_injected': 0, 'rate_limited': 0}
+
+    def injected_failure(self) -> Optional[int]:
+        """Aplica a latência sorteada e decide se a requisição deve falhar"""
+        with self._rng_lock:
+            delay = max(0.0, self._rng.gauss(self.latency, self.jitter)) if self.latency or self.jitter else 0.0
+            draw = self._rng.random()
+            self.stats['requests'] += 1
+
+        if delay:
+            time.sleep(delay)
+
+        if draw < self.rate_limit_rate:
+            self.stats['rate_limited'] += 1
+            return 429
+        if draw < self.rate_limit_rate + self.error_rate:
+            self.stats['errors_injected'] += 1
+            return 500
+        return None
+
+    # ---------- GET ----------
+
+    def do_get(self, params: Dict[str, str]) -> Any:
+        """Despacha uma ação GET (mesmas ações do doGet)"""
+        action = params.get('action')
+        compact = params.get('format') == 'compact'
+        store = self.store
+
+        with store.lock:
+            if action == 'getAll':
+                return {name: store.sheet_payload(values, compact) for name, values in store.sheets.items()}
+            if action == 'getSheet':
+                if any(name in params for name in ('offset', 'limit', 'columns', 'filter')):
+                    return self.get_sheet_page(params.get('sheetName', ''), params, compact)
+                return self.get_sheet(params.get('sheetName', ''), params.get('ifNoneMatch'), compact)
+            if action == 'getSheetDelta':
+                return self.get_sheet_delta(params.get('sheetName', ''), params.get('since'), compact)
+            if action == 'getCell':
+                return self.get_cell(params.get('sheetName', ''), params.get('cell', ''))
+            if action == 'getCells':
+                return self.get_cells(json.loads(params.get('ranges') or '[]'))
+            if action == 'getMaquinas':
+                return store.unique_column('DADOS_GERAIS', 'MAQUINAS')
+            if action == 'getClientes':
+                return store.unique_column('DADOS_GERAIS', 'CLIENTE')
+            if action == 'getOrdens':
+                return store.unique_column('DADOS_GERAIS', 'ORDEM DE COMPRA')
+            if action == 'getDatas':
+                return store.unique_column('DADOS_GERAIS', 'DATA DE ENTREGA', normalize=True)
+            if action == 'getSnapshot':
+                return self.get_snapshot(compact)
+
+        return {'error': 'Ação inválida'}
+
+    def get_sheet(self, sheet_name: str, if_none_match: Optional[str], compact: bool = False) -> Any:
+        """getSheet, com leitura condicional quando ifNoneMatch é enviado"""
+        values = self.store.sheets.get(sheet_name)
+        if values is None:
+            return {'error': 'Aba não encontrada'}
+
+        if if_none_match is not None:
+            etag = self.store.content_hash(values)
+            if etag == if_none_match:
+                return {'notModified': True, 'etag': etag}
+            if compact:
+                return {'etag': etag, **self.store.values_to_compact(values)}
+            return {'etag': etag, 'rows': self.store.values_to_objects(values)}
+
+        return self.store.sheet_payload(values, compact)
+
+    def get_sheet_page(self, sheet_name: str, params: Dict[str, str], compact: bool = False) -> Dict:
+        """getSheet com offset/limit, columns e filter (getSheetPage)"""
+        values = self.store.sheets.get(sheet_name)
+        if values is None:
+            return {'error': 'Aba não encontrada'}
+
+        headers = values[0] if values else []
+        data = values[1:]
+        try:
+            offset = max(0, int(params.get('offset') or 0))
+        except ValueError:
+            offset = 0
+        try:
+            limit = max(0, int(params['limit'])) if params.get('limit', '') != '' else None
+        except ValueError:
+            limit = 0
+
+        try:
+            names = json.loads(params['columns']) if params.get('columns') else None
+            columns = ([headers.index(name) for name in names if name in headers]
+                       if names is not None else list(range(len(headers))))
+            conditions = [
+                (headers.index(column) if column in headers else -1, FILTER_OPS.get(op), filter_key(value))
+                for column, op, value in (json.loads(params['filter']) if params.get('filter') else [])
+            ]
+        except (ValueError, TypeError):
+            return {'error': 'Filtro inválido'}
+        if any(index == -1 or test is None for index, test, _ in conditions):
+            return {'error': 'Filtro inválido'}
+
+        if conditions:
+            data = [
+                row for row in data
+                if all(test(compare_filter(row[index] if index < len(row) else '', key))
+                       for index, test, key in conditions)
+            ]
+        total = len(data)
+        rows = data[offset:None if limit is None else offset + limit]
+
+        page = [[headers[i] for i in columns]] + [[row[i] if i < len(row) else '' for i in columns] for row in rows]
+        end = offset + len(rows)
+        body = {'offset': offset, 'total': total, 'nextOffset': end if end < total else None}
+        if compact:
+            body.update(self.store.values_to_compact(page))
+        else:
+            body['rows'] = self.store.values_to_objects(page)
+        return body
+
+    def get_sheet_delta(self, sheet_name: str, since: Optional[str], compact: bool = False) -> Dict:
+        """getSheetDelta: linhas alteradas desde a revisão `since`"""
+        values = self.store.sheets.get(sheet_name)
+        if values is None:
+            return {'error': 'Aba não encontrada'}
+
+        state = self.store.revision_state(sheet_name)
+        try:
+            since_revision = int(since) if since not in (None, '') else -1
+        except ValueError:
+            since_revision = -1
+
+        rows = None
+        if state['base'] <= since_revision <= state['revision']:
+            changed = set()
+            for revision, first, last in state['log']:
+                if revision > since_revision:
+                    changed.update(range(first, last + 1))
+            rows = sorted(changed)
+
+        if rows is None or len(rows) > DELTA_MAX_ROWS:
+            if compact:
+                return {'revision': state['revision'], 'full': True, **self.store.values_to_compact(values)}
+            return {'revision': state['revision'], 'full': True, 'rows': self.store.values_to_objects(values)}
+
+        total = len(values) - 1
+        rows = [r for r in rows if r < total]
+        result = {'revision': state['revision'], 'full': False, 'total': total}
+        if compact:
+            result['changes'] = [{'row': r, 'values': self.store.trim_row(values[r + 1])} for r in rows]
+            result['headers'] = [json_value(h) for h in values[0]]
+            return result
+
+        objects = self.store.values_to_objects([values[0]] + [values[r + 1] for r in rows])
+        result['changes'] = [{'row': r, 'values': obj} for r, obj in zip(rows, objects)]
+        return result
+
+    def get_cell(self, sheet_name: str, address: str) -> Dict:
+        """getCell: valor de uma célula"""
+        if sheet_name not in self.store.sheets:
+            return {'error': 'Aba não encontrada', 'value': None}
+
+        try:
+            value = self.store.cell_range(sheet_name, address)
+            if isinstance(value, list):
+                value = value[0][0]
+            return {'value': value, 'cell': address, 'sheet': sheet_name}
+        except ValueError as e:
+            return {'error': str(e), 'value': None}
+
+    def get_cells(self, ranges: List[List[str]]) -> Dict:
+        """getCells: vários intervalos de abas diferentes"""
+        values = []
+        for sheet_name, address in ranges:
+            if sheet_name not in self.store.sheets:
+                values.append({'sheet': sheet_name, 'range': address, 'value': None, 'error': 'Aba não encontrada'})
+                continue
+            try:
+                values.append({'sheet': sheet_name, 'range': address,
+                               'value': self.store.cell_range(sheet_name, address)})
+            except ValueError as e:
+                values.append({'sheet': sheet_name, 'range': address, 'value': None, 'error': str(e)})
+        return {'values': values}
+
+    def get_snapshot(self, compact: bool = False) -> Dict:
+        """getSnapshot: todas as abas DADOS_*, disponibilidades e listas de DADOS_GERAIS"""
+        store = self.store
+        result = {
+            'maquinas': store.unique_column('DADOS_GERAIS', 'MAQUINAS'),
+            'clientes': store.unique_column('DADOS_GERAIS', 'CLIENTE'),
+            'ordens': store.unique_column('DADOS_GERAIS', 'ORDEM DE COMPRA'),
+            'datas': store.unique_column('DADOS_GERAIS', 'DATA DE ENTREGA', normalize=True),
+            'sheets': {},
+            'availability': {},
+            'revisions': {}
+        }
+
+        for sheet_name, values in store.sheets.items():
+            if not sheet_name.startswith('DADOS_'):
+                continue
+            result['revisions'][sheet_name] = store.revision_state(sheet_name)['revision']
+            result['sheets'][sheet_name] = store.sheet_payload(values, compact)
+            if sheet_name != 'DADOS_GERAIS':
+                result['availability'][sheet_name] = store.cell_range(sheet_name, 'K1')
+
+        return result
+
+    # ---------- POST ----------
+
+    def do_post(self, data: Dict) -> Dict:
+        """Despacha uma ação POST (mesmas ações do doPost)"""
+        action = data.get('action')
+        store = self.store
+
+        # Como no Apps Script, escritas são serializadas
+        with store.lock:
+            if action == 'addProduto':
+                if not data.get('maquina'):
+                    return {'success': False, 'error': "TypeError: Cannot read properties of undefined (reading 'replace')"}
+                sheet_name = produto_sheet_name(data['maquina'])
+                store.append_rows(sheet_name, [produto_row(data)], PRODUTO_HEADERS)
+                return {'success': True, 'message': 'Produto adicionado com sucesso!', 'sheetName': sheet_name}
+
+            if action == 'addPedido':
+                if 'DADOS_GERAIS' not in store.sheets:
+                    return {'success': False, 'error': 'Aba DADOS_GERAIS não encontrada'}
+                store.append_rows('DADOS_GERAIS', [pedido_row(data)])
+                return {'success': True, 'message': 'Pedido adicionado com sucesso!'}
+
+            if action == 'addPedidos':
+                return self.add_pedidos(data.get('pedidos') or [])
+
+            if action == 'addProdutos':
+                return self.add_produtos(data.get('produtos') or [])
+
+        return {'success': False, 'error': 'Ação inválida'}
+
+    def add_pedidos(self, pedidos: List[Dict]) -> Dict:
+        """addPedidos: grava os pedidos válidos de uma vez, com resultado por item"""
+        if 'DADOS_GERAIS' not in self.store.sheets:
+            return {'success': False, 'error': 'Aba DADOS_GERAIS não encontrada'}
+
+        results: List[Optional[Dict]] = [None] * len(pedidos)
+        rows, indexes = [], []
+        for index, pedido in enumerate(pedidos):
+            if not pedido or not pedido.get('cliente') or not pedido.get('maquina'):
+                results[index] = {'success': False, 'error': 'Pedido sem cliente ou máquina'}
+                continue
+            rows.append(pedido_row(pedido))
+            indexes.append(index)
+
+        if rows:
+            first = self.store.append_rows('DADOS_GERAIS', rows)
+            for offset, index in enumerate(indexes):
+                results[index] = {'success': True, 'row': first + offset}
+
+        return {'success': True, 'results': results}
+
+    def add_produtos(self, produtos: List[Dict]) -> Dict:
+        """addProdutos: agrupa por aba da máquina e grava cada grupo de uma vez"""
+        results: List[Optional[Dict]] = [None] * len(produtos)
+        groups: Dict[str, Tuple[List, List]] = {}
+
+        for index, produto in enumerate(produtos):
+            if not produto or not produto.get('maquina'):
+                results[index] = {'success': False, 'error': 'Produto sem máquina'}
+                continue
+            rows, indexes = groups.setdefault(produto_sheet_name(produto['maquina']), ([], []))
+            rows.append(produto_row(produto))
+            indexes.append(index)
+
+        for sheet_name, (rows, indexes) in groups.items():
+            first = self.store.append_rows(sheet_name, rows, PRODUTO_HEADERS)
+            for offset, index in enumerate(indexes):
+                results[index] = {'success': True, 'row': first + offset, 'sheetName': sheet_name}
+
+        return {'success': True, 'results': results}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Traduz requisições HTTP para o AppsScriptEmulator do servidor"""
+
+    server_version = 'AppsScriptEmulator/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, payload: Any, status: int = 200, headers: Optional[Dict] = None):
+        # Sem espaços, como o JSON.stringify do Apps Script
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=json_value).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fail_if_injected(self) -> bool:
+        status = self.server.emulator.injected_failure()
+        if status is None:
+            return False
+        headers = {'Retry-After': '1'} if status == 429 else None
+        self._send_json({'error': f'Falha injetada (HTTP {status})'}, status, headers)
+        return True
+
+    def do_GET(self):
+        if self._fail_if_injected():
+            return
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query, keep_blank_values=True).items()}
+        try:
+            self._send_json(self.server.emulator.do_get(params))
+        except Exception as e:
+            self._send_json({'error': str(e)})
+
+    def do_POST(self):
+        if self._fail_if_injected():
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            data = json.loads(self.rfile.read(length) or b'{}')
+            self._send_json(self.server.emulator.do_post(data))
+        except Exception as e:
+            self._send_json({'success': False, 'error': str(e)})
+
+
+def start_server(emulator: AppsScriptEmulator, host: str = '127.0.0.1', port: int = 8765,
+                 verbose: bool = False) -> ThreadingHTTPServer:
+    """
+    Inicia o servidor em uma thread (útil em benchmarks e testes)
+
+    Args:
+        emulator: Emulador configurado
+        host: Endereço de escuta
+        port: Porta (0 = porta livre qualquer)
+        verbose: Registra cada requisição no console
+
+    Returns:
+        Servidor em execução; a URL é http://host:server_port/exec
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.emulator = emulator
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, name='apps-script-emulator', daemon=True).start()
+    return server
+
+
+def build_store(args: argparse.Namespace) -> SheetStore:
+    """Monta a planilha a partir dos argumentos de linha de comando"""
+    store = SheetStore(args.db)
+    store.load_sqlite()
+
+    if args.csv:
+        store.load_csv_dir(args.csv)
+    if args.demo or not store.sheets:
+        store.generate_demo(args.machines, args.products, args.orders, args.seed)
+
+    store.save_sqlite()
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Emulador local do Web App do Apps Script')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--csv', help='Diretório com um <ABA>.csv por aba')
+    parser.add_argument('--db', help='Arquivo SQLite para carregar e persistir as abas')
+    parser.add_argument('--demo', action='store_true', help='Gera dados de demonstração')
+    parser.add_argument('--machines', type=int, default=8, help='Máquinas geradas em --demo')
+    parser.add_argument('--products', type=int, default=40, help='Produtos por máquina em --demo')
+    parser.add_argument('--orders', type=int, default=2000, help='Pedidos gerados em --demo')
+    parser.add_argument('--seed', type=int, default=42, help='Semente dos dados e das falhas')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latência média (segundos)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Desvio padrão da latência (segundos)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fração de respostas HTTP 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fração de respostas HTTP 429')
+    parser.add_argument('--verbose', action='store_true', help='Registra cada requisição')
+    args = parser.parse_args()
+
+    store = build_store(args)
+    emulator = AppsScriptEmulator(
+        store,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    server = start_server(emulator, args.host, args.port, args.verbose)
+
+    abas = ', '.join(f"{name} ({len(values) - 1})" for name, values in store.sheets.items())
+    print(f"Emulador do Apps Script em http://{args.host}:{server.server_port}/exec")
+    print(f"Abas: {abas}")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
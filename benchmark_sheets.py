@@ -0,0 +1,93 @@
+"""
+Benchmark do acesso à planilha contra o emulador local do Apps Script
+
+Sobe o apps_script_emulator.py em uma thread, aponta o GoogleSheetsManager
+para ele (GOOGLE_APPS_SCRIPT_URL) e mede as operações mais usadas pela API.
+
+Uso:
+    python benchmark_sheets.py --latency 0.4 --jitter 0.1 --orders 5000
+"""
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from apps_script_emulator import AppsScriptEmulator, SheetStore, start_server
+
+
+def medir(nome: str, func: Callable, repeticoes: int = 1) -> Dict:
+    """
+    Executa `func` algumas vezes e resume os tempos
+
+    Args:
+        nome: Nome da operação
+        func: Operação sem argumentos
+        repeticoes: Número de execuções
+
+    Returns:
+        Dicionário {operacao, repeticoes, media_ms, max_ms}
+    """
+    tempos: List[float] = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    return {
+        'operacao': nome,
+        'repeticoes': repeticoes,
+        'media_ms': round(statistics.mean(tempos), 1),
+        'max_ms': round(max(tempos), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do GoogleSheetsManager com o emulador')
+    parser.add_argument('--machines', type=int, default=8)
+    parser.add_argument('--products', type=int, default=40)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--writes', type=int, default=50, help='Pedidos gravados nos testes de escrita')
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    store = SheetStore()
+    store.generate_demo(args.machines, args.products, args.orders)
+    emulator = AppsScriptEmulator(store, args.latency, args.jitter, args.error_rate, seed=42)
+    server = start_server(emulator, port=0)
+    os.environ['GOOGLE_APPS_SCRIPT_URL'] = f"http://127.0.0.1:{server.server_port}/exec"
+
+    # Importado depois da variável de ambiente para usar o emulador
+    from modules.database_manager import GoogleSheetsManager
+
+    db = GoogleSheetsManager()
+    db.limpar_cache()
+    maquinas = [name[len('DADOS_'):] for name in store.sheets if name != 'DADOS_GERAIS']
+
+    pedidos = [
+        {'cliente': 'BENCH', 'ordem_compra': f"B-{i}", 'data_entrega': '2030-01-01',
+         'maquina': maquinas[i % len(maquinas)], 'bocas': 1}
+        for i in range(args.writes)
+    ]
+
+    resultados = [
+        medir('snapshot (frio)', lambda: db.load_snapshot(force=True)),
+        medir('produtos por máquina (cache)', lambda: [db.get_produtos_por_maquina(m) for m in maquinas], 20),
+        medir('disponibilidade (cache)', db.get_all_machines_availability, 20),
+        medir('catálogo (cache)', db.get_catalog, 20),
+        medir(f'{args.writes} pedidos, um por chamada', lambda: [db.add_pedido(p) for p in pedidos]),
+        medir(f'{args.writes} pedidos, em lote', lambda: db.add_pedidos(pedidos)),
+    ]
+
+    print(f"{'Operação':<36}{'Rep.':>6}{'Média (ms)':>14}{'Máx (ms)':>12}")
+    for r in resultados:
+        print(f"{r['operacao']:<36}{r['repeticoes']:>6}{r['media_ms']:>14}{r['max_ms']:>12}")
+
+    print(f"\nEmulador: {emulator.stats}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
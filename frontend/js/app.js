@@ -477,7 +477,7 @@ async function adicionarPedido() {
             quantidade: parseInt(document.getElementById('inputQuantidade').value),
             tempo_producao: parseFloat(produtoInfo['TEMPO DE PRODUÇÃO'] || 0),
             tempo_montagem: parseFloat(produtoInfo['TEMPO DE MONTAGEM'] || 0),
-            montagem_2x2: produtoInfo['MONTAGEM 2X2'] === 'Sim',
+            montagem_2x2: produtoInfo['MONTAGEM 2X2'] === true || produtoInfo['MONTAGEM 2X2'] === 'Sim',
             tempo_montagem_2x2: parseFloat(produtoInfo['TEMPO MONTAGEM 2X2'] || 0)
         };
 
@@ -7,12 +7,22 @@
 function doGet(e) {
   const action = e.parameter.action;
 
+  // format=compact: abas como {headers, rows} (cabeçalho uma vez, linhas em listas)
+  const compact = e.parameter.format === 'compact';
+
   if (action === 'getAll') {
-    return getAllData();
+    return getAllData(compact);
   } else if (action === 'getSheet') {
-    return getSheetData(e.parameter.sheetName);
+    if (isPagedRead(e.parameter)) {
+      return getSheetPage(e.parameter.sheetName, e.parameter, compact);
+    }
+    return getSheetData(e.parameter.sheetName, e.parameter.ifNoneMatch, compact);
+  } else if (action === 'getSheetDelta') {
+    return getSheetDelta(e.parameter.sheetName, e.parameter.since, compact);
   } else if (action === 'getCell') {
     return getCellValue(e.parameter.sheetName, e.parameter.cell);
+  } else if (action === 'getCells') {
+    return getCellValues(JSON.parse(e.parameter.ranges || '[]'));
   } else if (action === 'getMaquinas') {
     return getMaquinas();
   } else if (action === 'getClientes') {
@@ -21,6 +31,8 @@ function doGet(e) {
     return getOrdens();
   } else if (action === 'getDatas') {
     return getDatasEntrega();
+  } else if (action === 'getSnapshot') {
+    return getSnapshot(compact);
   }
 
   return ContentService.createTextOutput(JSON.stringify({error: 'Ação inválida'}))
@@ -36,6 +48,10 @@ function doPost(e) {
       return addProduto(data);
     } else if (action === 'addPedido') {
       return addPedido(data);
+    } else if (action === 'addPedidos') {
+      return addPedidos(data);
+    } else if (action === 'addProdutos') {
+      return addProdutos(data);
     }
 
     return ContentService.createTextOutput(JSON.stringify({
@@ -55,31 +71,21 @@ function doPost(e) {
 // FUNÇÕES GET (Leitura de dados)
 // ========================================
 
-function getAllData() {
+function getAllData(compact) {
   const ss = SpreadsheetApp.getActiveSpreadsheet();
   const sheets = ss.getSheets();
   let result = {};
 
   sheets.forEach(sheet => {
-    const sheetName = sheet.getName();
     const data = sheet.getDataRange().getValues();
-    const headers = data[0];
-    const rows = data.slice(1);
-
-    result[sheetName] = rows.map(row => {
-      let obj = {};
-      headers.forEach((header, index) => {
-        obj[header] = row[index];
-      });
-      return obj;
-    });
+    result[sheet.getName()] = compact ? valuesToCompact(data) : valuesToObjects(data);
   });
 
   return ContentService.createTextOutput(JSON.stringify(result))
     .setMimeType(ContentService.MimeType.JSON);
 }
 
-function getSheetData(sheetName) {
+function getSheetData(sheetName, ifNoneMatch, compact) {
   const ss = SpreadsheetApp.getActiveSpreadsheet();
   const sheet = ss.getSheetByName(sheetName);
 
@@ -89,21 +95,143 @@ function getSheetData(sheetName) {
   }
 
   const data = sheet.getDataRange().getValues();
-  const headers = data[0];
-  const rows = data.slice(1);
 
-  const result = rows.map(row => {
-    let obj = {};
-    headers.forEach((header, index) => {
-      obj[header] = row[index];
-    });
-    return obj;
-  });
+  // Leitura condicional: com ifNoneMatch, responde {etag, rows} ou, se o
+  // conteúdo não mudou, apenas {notModified, etag}
+  if (ifNoneMatch !== undefined) {
+    const etag = contentHash(data);
+
+    if (etag === ifNoneMatch) {
+      return ContentService.createTextOutput(JSON.stringify({notModified: true, etag: etag}))
+        .setMimeType(ContentService.MimeType.JSON);
+    }
 
+    const body = compact
+      ? Object.assign({etag: etag}, valuesToCompact(data))
+      : {etag: etag, rows: valuesToObjects(data)};
+    return ContentService.createTextOutput(JSON.stringify(body))
+      .setMimeType(ContentService.MimeType.JSON);
+  }
+
+  const result = compact ? valuesToCompact(data) : valuesToObjects(data);
   return ContentService.createTextOutput(JSON.stringify(result))
     .setMimeType(ContentService.MimeType.JSON);
 }
 
+// ========================================
+// LEITURA PAGINADA (offset/limit, colunas e filtros)
+// ========================================
+
+const FILTER_OPS = {
+  '=': c => c === 0,
+  '!=': c => c !== 0,
+  '>': c => c > 0,
+  '>=': c => c >= 0,
+  '<': c => c < 0,
+  '<=': c => c <= 0
+};
+
+function isPagedRead(params) {
+  return ['offset', 'limit', 'columns', 'filter'].some(name => params[name] !== undefined);
+}
+
+function getSheetPage(sheetName, params, compact) {
+  // Lê só o trecho pedido da aba: linhas [offset, offset + limit), apenas as
+  // colunas de `columns` (JSON) e, com `filter` (JSON [[coluna, op, valor]]),
+  // só as linhas que atendem a todas as condições. Sem filtro, apenas as
+  // linhas da página são lidas da planilha.
+  const sheet = SpreadsheetApp.getActiveSpreadsheet().getSheetByName(sheetName);
+
+  if (!sheet) {
+    return ContentService.createTextOutput(JSON.stringify({error: 'Aba não encontrada'}))
+      .setMimeType(ContentService.MimeType.JSON);
+  }
+
+  const lastColumn = sheet.getLastColumn();
+  const headers = lastColumn > 0 ? sheet.getRange(1, 1, 1, lastColumn).getValues()[0] : [];
+  const totalRows = Math.max(0, sheet.getLastRow() - 1);
+  const offset = Math.max(0, parseInt(params.offset, 10) || 0);
+  const limit = params.limit !== undefined && params.limit !== '' ? Math.max(0, parseInt(params.limit, 10) || 0) : null;
+
+  let columns;
+  let conditions;
+  try {
+    columns = params.columns
+      ? JSON.parse(params.columns).map(name => headers.indexOf(name)).filter(index => index !== -1)
+      : headers.map((_, index) => index);
+    conditions = (params.filter ? JSON.parse(params.filter) : []).map(condition => ({
+      index: headers.indexOf(condition[0]),
+      test: FILTER_OPS[condition[1]],
+      value: filterKey(condition[2])
+    }));
+  } catch (error) {
+    conditions = null;
+  }
+
+  if (conditions === null || conditions.some(c => c.index === -1 || !c.test)) {
+    return ContentService.createTextOutput(JSON.stringify({error: 'Filtro inválido'}))
+      .setMimeType(ContentService.MimeType.JSON);
+  }
+
+  // Só o intervalo de colunas que a página ou os filtros usam
+  const used = columns.concat(conditions.map(c => c.index));
+  const first = used.length ? Math.min.apply(null, used) : 0;
+  const width = used.length ? Math.max.apply(null, used) - first + 1 : 0;
+
+  let rows;
+  let total;
+  if (!conditions.length) {
+    total = totalRows;
+    const count = Math.max(0, Math.min(limit === null ? totalRows : limit, totalRows - offset));
+    rows = count > 0 && width > 0 ? sheet.getRange(2 + offset, first + 1, count, width).getValues() : [];
+  } else {
+    const data = totalRows > 0 && width > 0 ? sheet.getRange(2, first + 1, totalRows, width).getValues() : [];
+    const matched = data.filter(row => conditions.every(c => c.test(compareFilter(row[c.index - first], c.value))));
+    total = matched.length;
+    rows = matched.slice(offset, limit === null ? undefined : offset + limit);
+  }
+
+  const values = [columns.map(index => headers[index])]
+    .concat(rows.map(row => columns.map(index => row[index - first])));
+  const end = offset + rows.length;
+  const body = {offset: offset, total: total, nextOffset: end < total ? end : null};
+  Object.assign(body, compact ? valuesToCompact(values) : {rows: valuesToObjects(values)});
+
+  return ContentService.createTextOutput(JSON.stringify(body))
+    .setMimeType(ContentService.MimeType.JSON);
+}
+
+function filterKey(value) {
+  // Datas como AAAA-MM-DD (aceita DD/MM/AAAA), números como números e textos
+  // sem espaços nas pontas e em maiúsculas
+  if (value instanceof Date) {
+    return normalizeCellValue(value);
+  }
+  if (typeof value === 'number') {
+    return value;
+  }
+
+  const text = String(value === null || value === undefined ? '' : value).trim();
+  const br = text.match(/^(\d{2})\/(\d{2})\/(\d{4})$/);
+  if (br) {
+    return br[3] + '-' + br[2] + '-' + br[1];
+  }
+  if (/^\d{4}-\d{2}-\d{2}T/.test(text)) {
+    return text.slice(0, 10);
+  }
+  return text.toUpperCase();
+}
+
+function compareFilter(cell, key) {
+  const value = filterKey(cell);
+  if (typeof value === 'number' && typeof key === 'number') {
+    return value - key;
+  }
+  const a = String(value);
+  const b = String(key);
+  return a < b ? -1 : (a > b ? 1 : 0);
+}
+
 function getCellValue(sheetName, cellAddress) {
   const ss = SpreadsheetApp.getActiveSpreadsheet();
   const sheet = ss.getSheetByName(sheetName);
@@ -138,6 +266,53 @@ function getCellValue(sheetName, cellAddress) {
   }
 }
 
+function getCellValues(ranges) {
+  // ranges: lista de pares [aba, intervalo], ex: [["DADOS_M1", "K1"], ["DADOS_M2", "K1"]]
+  const ss = SpreadsheetApp.getActiveSpreadsheet();
+  const sheetCache = {};
+
+  const values = ranges.map(pair => {
+    const sheetName = pair[0];
+    const rangeAddress = pair[1];
+
+    if (!(sheetName in sheetCache)) {
+      sheetCache[sheetName] = ss.getSheetByName(sheetName);
+    }
+    const sheet = sheetCache[sheetName];
+
+    if (!sheet) {
+      return {sheet: sheetName, range: rangeAddress, value: null, error: 'Aba não encontrada'};
+    }
+
+    try {
+      const range = sheet.getRange(rangeAddress);
+      let value;
+
+      if (range.getNumRows() === 1 && range.getNumColumns() === 1) {
+        value = normalizeCellValue(range.getValue());
+      } else {
+        value = range.getValues().map(row => row.map(normalizeCellValue));
+      }
+
+      return {sheet: sheetName, range: rangeAddress, value: value};
+
+    } catch (error) {
+      return {sheet: sheetName, range: rangeAddress, value: null, error: error.toString()};
+    }
+  });
+
+  return ContentService.createTextOutput(JSON.stringify({values: values}))
+    .setMimeType(ContentService.MimeType.JSON);
+}
+
+function normalizeCellValue(value) {
+  // Se for uma data, converte para string
+  if (value instanceof Date) {
+    return value.toISOString().split('T')[0];
+  }
+  return value;
+}
+
 function getMaquinas() {
   const ss = SpreadsheetApp.getActiveSpreadsheet();
   const sheet = ss.getSheetByName('DADOS_GERAIS');
@@ -251,6 +426,109 @@ function getDatasEntrega() {
     .setMimeType(ContentService.MimeType.JSON);
 }
 
+function getSnapshot(compact) {
+  // Retorna em uma única execução tudo o que o planejamento precisa:
+  // DADOS_GERAIS, todas as abas DADOS_<MAQUINA> e a disponibilidade (K1) de cada uma
+  const ss = SpreadsheetApp.getActiveSpreadsheet();
+  const sheets = ss.getSheets();
+  let result = {
+    maquinas: [],
+    clientes: [],
+    ordens: [],
+    datas: [],
+    sheets: {},
+    availability: {},
+    revisions: {}
+  };
+
+  sheets.forEach(sheet => {
+    const sheetName = sheet.getName();
+
+    if (sheetName.indexOf('DADOS_') !== 0) {
+      return;
+    }
+
+    // Revisão lida antes dos dados: uma edição concorrente é reenviada no próximo delta
+    result.revisions[sheetName] = getRevisionState(sheetName).revision;
+    const data = sheet.getDataRange().getValues();
+    result.sheets[sheetName] = compact ? valuesToCompact(data) : valuesToObjects(data);
+
+    if (sheetName === 'DADOS_GERAIS') {
+      const headers = data[0] || [];
+      const rows = data.slice(1);
+      result.maquinas = uniqueColumn(rows, headers.indexOf('MAQUINAS'));
+      result.clientes = uniqueColumn(rows, headers.indexOf('CLIENTE'));
+      result.ordens = uniqueColumn(rows, headers.indexOf('ORDEM DE COMPRA'));
+      result.datas = uniqueColumn(rows, headers.indexOf('DATA DE ENTREGA')).map(d => {
+        if (d instanceof Date) {
+          return d.toISOString().split('T')[0];
+        }
+        return d;
+      });
+    } else {
+      let value = sheet.getRange('K1').getValue();
+      if (value instanceof Date) {
+        value = value.toISOString().split('T')[0];
+      }
+      result.availability[sheetName] = value;
+    }
+  });
+
+  return ContentService.createTextOutput(JSON.stringify(result))
+    .setMimeType(ContentService.MimeType.JSON);
+}
+
+function contentHash(values) {
+  // Hash do conteúdo bruto da aba: bem mais barato que montar e enviar os objetos
+  const digest = Utilities.computeDigest(Utilities.DigestAlgorithm.MD5, JSON.stringify(values));
+  return Utilities.base64EncodeWebSafe(digest);
+}
+
+function valuesToObjects(data) {
+  if (!data.length) {
+    return [];
+  }
+
+  const headers = data[0];
+  return data.slice(1).map(row => {
+    let obj = {};
+    headers.forEach((header, index) => {
+      obj[header] = row[index];
+    });
+    return obj;
+  });
+}
+
+function valuesToCompact(data) {
+  // Cabeçalho uma única vez e cada linha como lista, sem as células vazias
+  // do final (o cliente completa com ''): bem menor e mais fácil de comprimir
+  if (!data.length) {
+    return {headers: [], rows: []};
+  }
+
+  return {headers: data[0], rows: data.slice(1).map(trimRow)};
+}
+
+function trimRow(row) {
+  let end = row.length;
+  while (end > 0 && row[end - 1] === '') {
+    end--;
+  }
+  return end === row.length ? row : row.slice(0, end);
+}
+
+function uniqueColumn(rows, index) {
+  if (index === -1) {
+    return [];
+  }
+
+  const values = rows
+    .map(row => row[index])
+    .filter(v => v !== null && v !== undefined && v !== '');
+
+  return [...new Set(values)];
+}
+
 // ========================================
 // FUNÇÕES POST (Escrita de dados)
 // ========================================
@@ -258,38 +536,190 @@ function getDatasEntrega() {
 function addProduto(data) {
   const ss = SpreadsheetApp.getActiveSpreadsheet();
   const maquina = data.maquina;
-  const sheetName = 'DADOS_' + maquina.replace(/\s+/g, '_').toUpperCase();
+  const sheetName = produtoSheetName(maquina);
 
   let sheet = ss.getSheetByName(sheetName);
+  let novaAba = false;
 
   // Se a aba não existe, cria
   if (!sheet) {
-    sheet = ss.insertSheet(sheetName);
-
-    // Adiciona cabeçalhos
-    const headers = [
-      'REFERÊNCIAS/MÁQUINA',
-      'TEMPO DE PRODUÇÃO',
-      'TEMPO DE MONTAGEM',
-      'VOLTAS NA ESPULA',
-      'PRODUÇÃO POR MINUTO',
-      'COR',
-      'REFERENCIA',
-      'LARGURA',
-      'MONTAGEM 2X2',
-      'TEMPO MONTAGEM 2X2'
-    ];
-    sheet.appendRow(headers);
+    novaAba = true;
+    sheet = createProdutoSheet(ss, sheetName);
   }
 
+  // Adiciona nova linha sob o lock, registrando a linha efetivamente gravada
+  appendRows(sheet, [produtoRow(data)], novaAba);
+
+  return ContentService.createTextOutput(JSON.stringify({
+    success: true,
+    message: 'Produto adicionado com sucesso!',
+    sheetName: sheetName
+  })).setMimeType(ContentService.MimeType.JSON);
+}
+
+function addPedido(data) {
+  const ss = SpreadsheetApp.getActiveSpreadsheet();
+  const sheet = ss.getSheetByName('DADOS_GERAIS');
+
+  if (!sheet) {
+    return ContentService.createTextOutput(JSON.stringify({
+      success: false,
+      error: 'Aba DADOS_GERAIS não encontrada'
+    })).setMimeType(ContentService.MimeType.JSON);
+  }
+
+  // Adiciona nova linha sob o lock, registrando a linha efetivamente gravada
+  appendRows(sheet, [pedidoRow(data)]);
+
+  return ContentService.createTextOutput(JSON.stringify({
+    success: true,
+    message: 'Pedido adicionado com sucesso!'
+  })).setMimeType(ContentService.MimeType.JSON);
+}
+
+function addPedidos(data) {
+  // Grava vários pedidos com um único setValues; results traz o status de cada item
+  const ss = SpreadsheetApp.getActiveSpreadsheet();
+  const sheet = ss.getSheetByName('DADOS_GERAIS');
+  const pedidos = data.pedidos || [];
+
+  if (!sheet) {
+    return ContentService.createTextOutput(JSON.stringify({
+      success: false,
+      error: 'Aba DADOS_GERAIS não encontrada'
+    })).setMimeType(ContentService.MimeType.JSON);
+  }
+
+  const results = pedidos.map(() => null);
+  const rows = [];
+  const indexes = [];
+
+  pedidos.forEach((pedido, index) => {
+    if (!pedido || !pedido.cliente || !pedido.maquina) {
+      results[index] = {success: false, error: 'Pedido sem cliente ou máquina'};
+      return;
+    }
+    rows.push(pedidoRow(pedido));
+    indexes.push(index);
+  });
+
+  const written = appendRows(sheet, rows);
+  indexes.forEach((index, offset) => {
+    results[index] = {success: true, row: written + offset};
+  });
+
+  return ContentService.createTextOutput(JSON.stringify({
+    success: true,
+    results: results
+  })).setMimeType(ContentService.MimeType.JSON);
+}
+
+function addProdutos(data) {
+  // Agrupa os produtos por aba da máquina e grava cada grupo com um único setValues
+  const ss = SpreadsheetApp.getActiveSpreadsheet();
+  const produtos = data.produtos || [];
+  const results = produtos.map(() => null);
+  const groups = {};
+
+  produtos.forEach((produto, index) => {
+    if (!produto || !produto.maquina) {
+      results[index] = {success: false, error: 'Produto sem máquina'};
+      return;
+    }
+    const sheetName = produtoSheetName(produto.maquina);
+    if (!groups[sheetName]) {
+      groups[sheetName] = {rows: [], indexes: []};
+    }
+    groups[sheetName].rows.push(produtoRow(produto));
+    groups[sheetName].indexes.push(index);
+  });
+
+  Object.keys(groups).forEach(sheetName => {
+    const group = groups[sheetName];
+
+    try {
+      let sheet = ss.getSheetByName(sheetName);
+      const novaAba = !sheet;
+      if (novaAba) {
+        sheet = createProdutoSheet(ss, sheetName);
+      }
+
+      const written = appendRows(sheet, group.rows, novaAba);
+      group.indexes.forEach((index, offset) => {
+        results[index] = {success: true, row: written + offset, sheetName: sheetName};
+      });
+
+    } catch (error) {
+      group.indexes.forEach(index => {
+        results[index] = {success: false, error: error.toString()};
+      });
+    }
+  });
+
+  return ContentService.createTextOutput(JSON.stringify({
+    success: true,
+    results: results
+  })).setMimeType(ContentService.MimeType.JSON);
+}
+
+function appendRows(sheet, rows, novaAba) {
+  // Acrescenta as linhas ao final da aba sob o lock do script; retorna a primeira linha gravada
+  if (!rows.length) {
+    return 0;
+  }
+
+  const lock = LockService.getScriptLock();
+  lock.waitLock(30000);
+
+  let first;
+  try {
+    first = sheet.getLastRow() + 1;
+    sheet.getRange(first, 1, rows.length, rows[0].length).setValues(rows);
+    SpreadsheetApp.flush();
+  } finally {
+    lock.releaseLock();
+  }
+
+  if (novaAba) {
+    recordChange(sheet.getName(), null);
+  } else {
+    recordRowChange(sheet, first, first + rows.length - 1);
+  }
+  return first;
+}
+
+function produtoSheetName(maquina) {
+  return 'DADOS_' + maquina.replace(/\s+/g, '_').toUpperCase();
+}
+
+function createProdutoSheet(ss, sheetName) {
+  const sheet = ss.insertSheet(sheetName);
+
+  // Adiciona cabeçalhos
+  const headers = [
+    'REFERÊNCIAS/MÁQUINA',
+    'TEMPO DE PRODUÇÃO',
+    'TEMPO DE MONTAGEM',
+    'VOLTAS NA ESPULA',
+    'PRODUÇÃO POR MINUTO',
+    'COR',
+    'REFERENCIA',
+    'LARGURA',
+    'MONTAGEM 2X2',
+    'TEMPO MONTAGEM 2X2'
+  ];
+  sheet.appendRow(headers);
+  return sheet;
+}
+
+function produtoRow(data) {
   // Calcula tempo total de montagem
   let tempoMontagemTotal = parseFloat(data.tempoMontagem) || 0;
   if (data.montagem2x2 === 'Sim' && data.tempoMontagem2x2) {
     tempoMontagemTotal += parseFloat(data.tempoMontagem2x2);
   }
 
-  // Adiciona nova linha
-  const newRow = [
+  return [
     data.referenciaMaquina || '',
     data.tempoProducao || 0,
     tempoMontagemTotal,
@@ -301,42 +731,177 @@ function addProduto(data) {
     data.montagem2x2 || 'Não',
     data.tempoMontagem2x2 || 0
   ];
+}
 
-  sheet.appendRow(newRow);
+function pedidoRow(data) {
+  // Aceita os nomes do Streamlit (ordemCompra) e da API (ordem_compra)
+  return [
+    data.cliente || '',
+    data.ordemCompra || data.ordem_compra || '',
+    data.dataEntrega || data.data_entrega || '',
+    data.maquina || '',
+    data.bocas || 0
+  ];
+}
 
-  return ContentService.createTextOutput(JSON.stringify({
-    success: true,
-    message: 'Produto adicionado com sucesso!',
-    sheetName: sheetName
-  })).setMimeType(ContentService.MimeType.JSON);
+// ========================================
+// REVISÕES (sincronização incremental)
+// ========================================
+// Cada aba DADOS_* tem um contador de revisão e um log das linhas alteradas
+// em cada revisão, guardados nas propriedades do script. getSheetDelta
+// devolve apenas as linhas alteradas desde a revisão que o cliente já tem.
+//
+// Edições feitas à mão são registradas por onEdit; inserção/remoção de
+// linhas e colunas, pelo gatilho instalado com instalarGatilhos(). Qualquer
+// mudança estrutural força o cliente a recarregar a aba inteira.
+
+const REVISION_LOG_SIZE = 300;  // Entradas mantidas por aba (limite de 9 KB por propriedade)
+const DELTA_MAX_ROWS = 1000;    // Acima disso, é mais barato devolver a aba inteira
+
+function getRevisionState(sheetName) {
+  const raw = PropertiesService.getScriptProperties().getProperty('rev_' + sheetName);
+  // base: revisão mais antiga a partir da qual o log ainda está completo
+  return raw ? JSON.parse(raw) : {revision: 0, base: 0, log: []};
 }
 
-function addPedido(data) {
+function recordChange(sheetName, firstRow, lastRow) {
+  // firstRow/lastRow: índices (base 0) das linhas de dados; null = mudança estrutural
+  const lock = LockService.getScriptLock();
+  lock.waitLock(10000);
+
+  try {
+    const state = getRevisionState(sheetName);
+    state.revision += 1;
+
+    if (firstRow === null || firstRow === undefined) {
+      state.base = state.revision;
+      state.log = [];
+    } else {
+      state.log.push([state.revision, firstRow, lastRow]);
+      if (state.log.length > REVISION_LOG_SIZE) {
+        const removed = state.log.splice(0, state.log.length - REVISION_LOG_SIZE);
+        state.base = removed[removed.length - 1][0];
+      }
+    }
+
+    PropertiesService.getScriptProperties()
+      .setProperty('rev_' + sheetName, JSON.stringify(state));
+  } finally {
+    lock.releaseLock();
+  }
+}
+
+function recordRowChange(sheet, firstSheetRow, lastSheetRow) {
+  // Converte linhas da planilha (base 1, com cabeçalho) em índices de dados
+  const sheetName = sheet.getName();
+  if (sheetName.indexOf('DADOS_') !== 0) {
+    return;
+  }
+
+  if (firstSheetRow <= 1 || lastSheetRow - firstSheetRow + 1 > DELTA_MAX_ROWS) {
+    // Cabeçalho (inclui K1) ou bloco grande demais: recarga completa
+    recordChange(sheetName, null);
+  } else {
+    recordChange(sheetName, firstSheetRow - 2, lastSheetRow - 2);
+  }
+}
+
+function onEdit(e) {
+  recordRowChange(e.range.getSheet(), e.range.getRow(), e.range.getLastRow());
+}
+
+function onStructureChange(e) {
+  if (e.changeType === 'EDIT' || e.changeType === 'FORMAT') {
+    return;
+  }
+
+  const sheet = e.source.getActiveSheet();
+  if (sheet && sheet.getName().indexOf('DADOS_') === 0) {
+    recordChange(sheet.getName(), null);
+  }
+}
+
+function instalarGatilhos() {
+  // Execute uma vez pelo editor: registra o gatilho de mudanças estruturais
   const ss = SpreadsheetApp.getActiveSpreadsheet();
-  const sheet = ss.getSheetByName('DADOS_GERAIS');
+  const existente = ScriptApp.getProjectTriggers()
+    .some(t => t.getHandlerFunction() === 'onStructureChange');
+
+  if (!existente) {
+    ScriptApp.newTrigger('onStructureChange').forSpreadsheet(ss).onChange().create();
+  }
+}
+
+function getSheetDelta(sheetName, since, compact) {
+  const ss = SpreadsheetApp.getActiveSpreadsheet();
+  const sheet = ss.getSheetByName(sheetName);
 
   if (!sheet) {
-    return ContentService.createTextOutput(JSON.stringify({
-      success: false,
-      error: 'Aba DADOS_GERAIS não encontrada'
-    })).setMimeType(ContentService.MimeType.JSON);
+    return ContentService.createTextOutput(JSON.stringify({error: 'Aba não encontrada'}))
+      .setMimeType(ContentService.MimeType.JSON);
   }
 
-  // Adiciona nova linha
-  const newRow = [
-    data.cliente || '',
-    data.ordemCompra || '',
-    data.dataEntrega || '',
-    data.maquina || '',
-    data.bocas || 0
-  ];
+  // Revisão lida antes dos dados: uma edição concorrente é reenviada no próximo delta
+  const state = getRevisionState(sheetName);
+  const sinceRevision = (since === undefined || since === '') ? -1 : parseInt(since, 10);
+
+  let rows = null;
+  if (!isNaN(sinceRevision) && sinceRevision >= state.base && sinceRevision <= state.revision) {
+    const changed = {};
+    state.log.forEach(entry => {
+      if (entry[0] > sinceRevision) {
+        for (let r = entry[1]; r <= entry[2]; r++) {
+          changed[r] = true;
+        }
+      }
+    });
+    rows = Object.keys(changed).map(Number).sort((a, b) => a - b);
+  }
 
-  sheet.appendRow(newRow);
+  if (rows === null || rows.length > DELTA_MAX_ROWS) {
+    const data = sheet.getDataRange().getValues();
+    const body = compact
+      ? Object.assign({revision: state.revision, full: true}, valuesToCompact(data))
+      : {revision: state.revision, full: true, rows: valuesToObjects(data)};
+    return ContentService.createTextOutput(JSON.stringify(body))
+      .setMimeType(ContentService.MimeType.JSON);
+  }
 
-  return ContentService.createTextOutput(JSON.stringify({
-    success: true,
-    message: 'Pedido adicionado com sucesso!'
-  })).setMimeType(ContentService.MimeType.JSON);
+  const total = Math.max(sheet.getLastRow() - 1, 0);
+  const lastColumn = Math.max(sheet.getLastColumn(), 1);
+  const headers = sheet.getRange(1, 1, 1, lastColumn).getValues()[0];
+  const changes = [];
+
+  // Lê cada sequência contígua de linhas alteradas em uma única chamada
+  let i = 0;
+  while (i < rows.length && rows[i] < total) {
+    let j = i;
+    while (j + 1 < rows.length && rows[j + 1] === rows[j] + 1 && rows[j + 1] < total) {
+      j++;
+    }
+
+    const values = sheet.getRange(rows[i] + 2, 1, j - i + 1, lastColumn).getValues();
+    values.forEach((row, offset) => {
+      if (compact) {
+        changes.push({row: rows[i] + offset, values: trimRow(row)});
+        return;
+      }
+      let obj = {};
+      headers.forEach((header, index) => {
+        obj[header] = row[index];
+      });
+      changes.push({row: rows[i] + offset, values: obj});
+    });
+
+    i = j + 1;
+  }
+
+  const body = {revision: state.revision, full: false, total: total, changes: changes};
+  if (compact) {
+    body.headers = headers;
+  }
+  return ContentService.createTextOutput(JSON.stringify(body))
+    .setMimeType(ContentService.MimeType.JSON);
 }
 
 // ========================================
@@ -356,6 +921,7 @@ COMO IMPLANTAR:
 9. Clique em "Implantar"
 10. Copie a URL da Web App gerada
 11. Cole essa URL no arquivo config.yaml do Streamlit
+12. No editor, execute uma vez a função instalarGatilhos (sincronização incremental)
 
 IMPORTANTE:
 - Sempre que alterar o código, precisa fazer nova implantação
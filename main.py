@@ -3,31 +3,105 @@ Backend FastAPI - Sistema de Planejamento de Produção
 Frontend: HTML/CSS/JS puro
 Backend: Python com FastAPI
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, FileResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
+import asyncio
+import time
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
+from contextlib import asynccontextmanager
 
 # Importa módulos existentes
-from modules.database_manager import GoogleSheetsManager
+from modules.data_context import get_data_context
+from modules.catalog_index import index_dataframe
 from modules.calculator import ProductionCalculator, formatar_data_br
 from modules.optimizer import ProductionOptimizer
 from modules.workday_calendar import get_calendar
 from modules.dynamic_planner import get_planner
 from modules.machine_optimizer import get_machine_optimizer
+from modules.sheet_schema import to_records
 
 # ========================================
 # INICIALIZAÇÃO
 # ========================================
+
+# Contexto de dados do processo: um gerenciador (cache e conexões) para a
+# API, o planejador e o otimizador
+data_context = get_data_context()
+db_manager = data_context.manager
+# Versão assíncrona: compartilha o cache e não bloqueia o event loop
+async_db_manager = data_context.async_manager
+# Repositório do planejador/otimizador (storage.backend), sobre o mesmo gerenciador
+repository = data_context.repository
+
+
+# Aquecimento dos caches na inicialização (ver /api/ready)
+warmup = {'ready': False, 'attempts': 0, 'missing': [], 'elapsed_ms': None, 'error': None}
+
+
+def _build_indexes():
+    """Monta os DataFrames de cada máquina e o índice do catálogo a partir do cache"""
+    for maquina in db_manager.get_maquinas():
+        db_manager.get_produtos_por_maquina(maquina)
+    db_manager.get_catalog()
+
+
+async def prewarm_caches():
+    """
+    Aquece os caches antes do primeiro usuário, repetindo com espera
+    crescente (até 60 s) enquanto a planilha não responde por completo
+    """
+    started = time.monotonic()
+    delay = 2
+    while True:
+        warmup['attempts'] += 1
+        try:
+            missing = await async_db_manager.prewarm()
+            if not missing:
+                await run_in_threadpool(_build_indexes)
+            warmup['error'] = None
+        except Exception as e:
+            missing = warmup['missing'] or ['maquinas']
+            warmup['error'] = str(e)
+
+        warmup['missing'] = missing
+        if not missing:
+            warmup['ready'] = True
+            warmup['elapsed_ms'] = round((time.monotonic() - started) * 1000, 1)
+            return
+
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 60)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida da aplicação: aquece e renova o cache em segundo plano e
+    fecha conexões ao encerrar
+    """
+    async_db_manager.start_refresher()
+    repository.start_sync()
+    prewarm_task = asyncio.create_task(prewarm_caches())
+    yield
+    prewarm_task.cancel()
+    repository.stop_sync()
+    # Grava o que ainda estiver na fila de escrita (ou em envio) antes de encerrar
+    await run_in_threadpool(db_manager.close_writes, 30)
+    await async_db_manager.close()
+
+
 app = FastAPI(
     title="Sistema de Planejamento de Produção",
     description="API REST para planejamento inteligente de produção",
-    version="3.0.0"
+    version="3.0.0",
+    lifespan=lifespan
 )
 
 # CORS - Permite frontend acessar API
@@ -39,12 +113,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def sinalizar_dados_desatualizados(request: Request, call_next):
+    """
+    Marca as respostas da API enquanto o processo serve dados do último valor
+    conhecido (Apps Script indisponível): X-Data-Stale, X-Data-Age (segundos)
+    e X-Circuit-State
+    """
+    response = await call_next(request)
+    if request.url.path.startswith("/api/"):
+        staleness = db_manager.get_staleness()
+        if staleness['stale']:
+            response.headers["X-Data-Stale"] = "true"
+            response.headers["X-Data-Age"] = str(int(staleness['max_age_s']))
+            response.headers["X-Circuit-State"] = staleness['circuit']
+    return response
+
 # Serve arquivos estáticos (HTML, CSS, JS)
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
-# Inicializa gerenciador de dados
-db_manager = GoogleSheetsManager()
-
 # ========================================
 # MODELOS PYDANTIC (Validação)
 # ========================================
@@ -71,6 +158,12 @@ class PedidoCreate(BaseModel):
     produto: str
     quantidade: int
 
+class PedidosLote(BaseModel):
+    pedidos: List[PedidoCreate]
+
+class ProdutosLote(BaseModel):
+    produtos: List[ProdutoCreate]
+
 class OtimizacaoRequest(BaseModel):
     pedidos: List[Dict]
 
@@ -135,11 +228,20 @@ async def root():
 async def get_status():
     """Verifica status da conexão com Google Sheets"""
     try:
-        maquinas = db_manager.get_maquinas()
+        maquinas = await async_db_manager.get_maquinas()
+        staleness = async_db_manager.get_staleness()
+        if staleness['circuit'] == 'open':
+            return {
+                "status": "degraded",
+                "maquinas_count": len(maquinas) if maquinas else 0,
+                "message": "Google Sheets indisponível: usando os últimos dados conhecidos",
+                "staleness": staleness
+            }
         return {
             "status": "connected",
             "maquinas_count": len(maquinas) if maquinas else 0,
-            "message": "Conectado ao Google Sheets"
+            "message": "Conectado ao Google Sheets",
+            "staleness": staleness
         }
     except Exception as e:
         return {
@@ -155,36 +257,84 @@ async def get_status():
 async def get_maquinas():
     """Retorna lista de máquinas disponíveis"""
     try:
-        maquinas = db_manager.get_maquinas()
+        maquinas = await async_db_manager.get_maquinas()
         return {"maquinas": maquinas if maquinas else []}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/snapshot")
+async def carregar_snapshot(force: bool = False):
+    """Carrega catálogos, disponibilidades e pedidos em uma única requisição"""
+    try:
+        sucesso = await async_db_manager.load_snapshot(force=force)
+        if not sucesso:
+            raise HTTPException(status_code=502, detail="Erro ao carregar snapshot")
+        return {"success": True}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _not_modified(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    """
+    Anexa o ETag à resposta e trata If-None-Match
+
+    Returns:
+        Resposta 304 se o cliente já tem esta versão, senão None
+    """
+    if not etag:
+        return None
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
 # ========================================
 # ROTAS DE PRODUTOS
 # ========================================
 
 @app.get("/api/produtos/{maquina}")
-async def get_produtos_por_maquina(maquina: str):
-    """Retorna produtos de uma máquina específica"""
+async def get_produtos_por_maquina(maquina: str, request: Request, response: Response):
+    """Retorna produtos de uma máquina específica (com ETag/If-None-Match)"""
     try:
-        df_produtos = db_manager.get_produtos_por_maquina(maquina)
+        df_produtos = await async_db_manager.get_produtos_por_maquina(maquina)
+
+        etag = await async_db_manager.get_etag(f"sheet_{db_manager.sheet_name(maquina)}")
+        not_modified = _not_modified(request, response, etag)
+        if not_modified is not None:
+            return not_modified
 
         if df_produtos.empty:
             return {"produtos": []}
 
-        produtos = df_produtos.to_dict('records')
+        produtos = to_records(df_produtos)
         return {"produtos": produtos}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/produtos/lote")
+async def criar_produtos_lote(lote: ProdutosLote):
+    """Cria vários produtos (um setValues por máquina); retorna o resultado de cada um"""
+    try:
+        resultados = await async_db_manager.add_produtos([p.dict() for p in lote.produtos])
+        return {
+            "success": all(r.get('success') for r in resultados),
+            "results": resultados
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/produtos")
 async def criar_produto(produto: ProdutoCreate):
     """Cria novo produto no Google Sheets"""
     try:
         produto_data = produto.dict()
-        sucesso = db_manager.add_produto(produto_data)
+        sucesso = await async_db_manager.add_produto(produto_data)
 
         if sucesso:
             return {
@@ -205,7 +355,7 @@ async def criar_produto(produto: ProdutoCreate):
 async def get_clientes():
     """Retorna lista de clientes"""
     try:
-        clientes = db_manager.get_clientes()
+        clientes = await async_db_manager.get_clientes()
         return {"clientes": clientes if clientes else []}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -214,7 +364,7 @@ async def get_clientes():
 async def get_ordens():
     """Retorna lista de ordens de compra"""
     try:
-        ordens = db_manager.get_ordens()
+        ordens = await async_db_manager.get_ordens()
         return {"ordens": ordens if ordens else []}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -223,16 +373,38 @@ async def get_ordens():
 async def get_datas():
     """Retorna lista de datas de entrega"""
     try:
-        datas = db_manager.get_datas_entrega()
+        datas = await async_db_manager.get_datas_entrega()
         return {"datas": datas if datas else []}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/pedidos-cadastrados")
-async def get_pedidos_cadastrados():
-    """Retorna lista completa de pedidos da aba DADOS_GERAIS"""
+async def get_pedidos_cadastrados(
+    request: Request,
+    response: Response,
+    entrega_desde: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None
+):
+    """
+    Retorna lista completa de pedidos da aba DADOS_GERAIS (com ETag/If-None-Match)
+
+    Com entrega_desde (AAAA-MM-DD ou DD/MM/AAAA), offset ou limit, lê da
+    planilha só a página pedida, sem cache, e informa total e next_offset.
+    """
     try:
-        pedidos = db_manager.get_pedidos_cadastrados()
+        if entrega_desde or offset or limit is not None:
+            filtros = [('CLIENTE', '!=', ''), ('MAQUINAS', '!=', '')]
+            if entrega_desde:
+                filtros.append(('DATA DE ENTREGA', '>=', entrega_desde))
+            page = await async_db_manager.get_sheet_page('DADOS_GERAIS', offset, limit, filters=filtros)
+            return {"pedidos": page['rows'], "total": page['total'], "next_offset": page['next_offset']}
+
+        pedidos = await async_db_manager.get_pedidos_cadastrados()
+
+        not_modified = _not_modified(request, response, await async_db_manager.get_etag("pedidos_cadastrados"))
+        if not_modified is not None:
+            return not_modified
         return {"pedidos": pedidos if pedidos else []}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -243,19 +415,36 @@ async def get_pedidos_cadastrados():
 
 @app.post("/api/pedidos")
 async def criar_pedido(pedido: PedidoCreate):
-    """Cria novo pedido"""
+    """Cria novo pedido (pedidos simultâneos são gravados em lote)"""
     try:
         pedido_data = pedido.dict()
-        sucesso = db_manager.add_pedido(pedido_data)
+        resultado = await async_db_manager.enqueue_pedido(pedido_data)
 
-        if sucesso:
+        if resultado.get('success'):
             return {
                 "success": True,
                 "message": "Pedido adicionado com sucesso!"
             }
         else:
-            raise HTTPException(status_code=400, detail="Erro ao adicionar pedido")
+            raise HTTPException(
+                status_code=400,
+                detail=f"Erro ao adicionar pedido: {resultado.get('error', 'Erro desconhecido')}"
+            )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/pedidos/lote")
+async def criar_pedidos_lote(lote: PedidosLote):
+    """Cria vários pedidos em uma única gravação; retorna o resultado de cada um"""
+    try:
+        resultados = await async_db_manager.add_pedidos([p.dict() for p in lote.pedidos])
+        return {
+            "success": all(r.get('success') for r in resultados),
+            "results": resultados
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -303,14 +492,16 @@ async def gerar_planejamento(pedidos_data: Dict):
     try:
         pedidos = pedidos_data.get('pedidos', [])
         sequencia = []
+        produtos_por_maquina = {}  # Índice {REFERENCIA: produto} por máquina
 
         for pedido in pedidos:
             # Busca informações do produto
-            df_prod = db_manager.get_produtos_por_maquina(pedido['maquina'])
-            produto_info = df_prod[df_prod['REFERENCIA'] == pedido['produto']]
+            if pedido['maquina'] not in produtos_por_maquina:
+                df_prod = await async_db_manager.get_produtos_por_maquina(pedido['maquina'])
+                produtos_por_maquina[pedido['maquina']] = index_dataframe(df_prod, ('REFERENCIA',))
+            produto_dict = produtos_por_maquina[pedido['maquina']].get(pedido['produto'])
 
-            if not produto_info.empty:
-                produto_dict = produto_info.iloc[0].to_dict()
+            if produto_dict is not None:
                 calc = ProductionCalculator()
 
                 tempo_total_unit = calc.calcular_tempo_total_produto(produto_dict)
@@ -368,7 +559,7 @@ async def otimizar_distribuicao(request: OtimizacaoRequest):
         produtos_completos = pd.DataFrame()
 
         for maq in set(p['maquina'] for p in pedidos):
-            df_maq = db_manager.get_produtos_por_maquina(maq)
+            df_maq = await async_db_manager.get_produtos_por_maquina(maq)
             produtos_completos = pd.concat([produtos_completos, df_maq], ignore_index=True)
 
         # Executa otimização
@@ -499,12 +690,14 @@ async def clear_calendar():
 # ========================================
 # ROTAS DE PLANEJAMENTO DINÂMICO
 # ========================================
+# O planejador e o otimizador usam o manager síncrono: rodam no threadpool
+# para não bloquear o event loop enquanto consultam o Google Sheets
 
 @app.post("/api/planejamento/dinamico/criar")
 async def create_dynamic_plan(request: DynamicPlanRequest):
     """Cria um plano de produção dinâmico"""
     try:
-        planner = get_planner()
+        planner = get_planner(data_context)
 
         # Converte data se fornecida
         start_date = None
@@ -514,7 +707,7 @@ async def create_dynamic_plan(request: DynamicPlanRequest):
             except:
                 start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
 
-        plan = planner.create_plan(request.orders, start_date)
+        plan = await run_in_threadpool(planner.create_plan, request.orders, start_date)
         return plan
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -523,7 +716,7 @@ async def create_dynamic_plan(request: DynamicPlanRequest):
 async def reorder_orders(request: ReorderRequest):
     """Reordena pedidos de uma máquina e recalcula"""
     try:
-        planner = get_planner()
+        planner = get_planner(data_context)
 
         # Converte data se fornecida
         start_date = None
@@ -533,7 +726,8 @@ async def reorder_orders(request: ReorderRequest):
             except:
                 start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
 
-        plan = planner.reorder_and_recalculate(
+        plan = await run_in_threadpool(
+            planner.reorder_and_recalculate,
             request.machine,
             request.order_ids,
             request.all_orders,
@@ -547,7 +741,7 @@ async def reorder_orders(request: ReorderRequest):
 async def move_order(request: MoveOrderRequest):
     """Move um pedido de uma posição para outra"""
     try:
-        planner = get_planner()
+        planner = get_planner(data_context)
 
         # Converte data se fornecida
         start_date = None
@@ -557,7 +751,8 @@ async def move_order(request: MoveOrderRequest):
             except:
                 start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
 
-        plan = planner.move_order(
+        plan = await run_in_threadpool(
+            planner.move_order,
             request.order_id,
             request.from_position,
             request.to_position,
@@ -573,7 +768,7 @@ async def move_order(request: MoveOrderRequest):
 async def get_machine_timeline(machine: str, plan: Dict):
     """Obtém timeline de uma máquina"""
     try:
-        planner = get_planner()
+        planner = get_planner(data_context)
         timeline = planner.get_machine_timeline(machine, plan)
         return timeline
     except Exception as e:
@@ -583,7 +778,7 @@ async def get_machine_timeline(machine: str, plan: Dict):
 async def save_plan(request: SavePlanRequest):
     """Salva um plano"""
     try:
-        planner = get_planner()
+        planner = get_planner(data_context)
         success = planner.save_plan(request.plan_name, request.plan)
         return {
             "success": success,
@@ -596,7 +791,7 @@ async def save_plan(request: SavePlanRequest):
 async def load_plan(plan_name: str):
     """Carrega um plano salvo"""
     try:
-        planner = get_planner()
+        planner = get_planner(data_context)
         plan = planner.load_plan(plan_name)
 
         if plan is None:
@@ -612,7 +807,7 @@ async def load_plan(plan_name: str):
 async def list_saved_plans():
     """Lista todos os planos salvos"""
     try:
-        planner = get_planner()
+        planner = get_planner(data_context)
         plans = planner.list_saved_plans()
         return {"plans": plans}
     except Exception as e:
@@ -630,7 +825,7 @@ async def calculate_changeovers(request: dict):
     - Horas ociosas
     """
     try:
-        planner = get_planner()
+        planner = get_planner(data_context)
         plan = request.get('plan')
         days = request.get('days', 5)
         hours_per_day = request.get('hours_per_day', 24)
@@ -647,7 +842,7 @@ async def calculate_changeovers(request: dict):
 async def get_machine_availability(maquina: str):
     """Retorna a disponibilidade (horas/dia) de uma máquina"""
     try:
-        availability = db_manager.get_machine_availability(maquina)
+        availability = await async_db_manager.get_machine_availability(maquina)
         return {
             "maquina": maquina,
             "availability_hours": availability
@@ -659,8 +854,11 @@ async def get_machine_availability(maquina: str):
 async def get_all_machines_availability():
     """Retorna a disponibilidade de todas as máquinas"""
     try:
-        availability_dict = db_manager.get_all_machines_availability()
-        return {"machines_availability": availability_dict}
+        report = await async_db_manager.get_all_machines_availability_report()
+        return {
+            "machines_availability": report['availability'],
+            "errors": report['errors']
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -675,7 +873,7 @@ async def suggest_machine_optimization(request: OptimizeMachinesRequest):
     para minimizar atrasos e otimizar produção
     """
     try:
-        optimizer = get_machine_optimizer()
+        optimizer = get_machine_optimizer(data_context)
 
         # Converte data se fornecida
         start_date = None
@@ -685,7 +883,7 @@ async def suggest_machine_optimization(request: OptimizeMachinesRequest):
             except:
                 start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
 
-        result = optimizer.analyze_and_suggest(request.orders, start_date)
+        result = await run_in_threadpool(optimizer.analyze_and_suggest, request.orders, start_date)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -694,8 +892,9 @@ async def suggest_machine_optimization(request: OptimizeMachinesRequest):
 async def apply_machine_suggestions(request: ApplySuggestionsRequest):
     """Aplica sugestões de otimização aos pedidos"""
     try:
-        optimizer = get_machine_optimizer()
-        optimized_orders = optimizer.apply_suggestions(
+        optimizer = get_machine_optimizer(data_context)
+        optimized_orders = await run_in_threadpool(
+            optimizer.apply_suggestions,
             request.orders,
             request.suggestions
         )
@@ -719,7 +918,7 @@ async def apply_machine_suggestions(request: ApplySuggestionsRequest):
 async def limpar_cache():
     """Limpa cache de dados"""
     try:
-        db_manager.limpar_cache()
+        data_context.limpar_cache()
         return {
             "success": True,
             "message": "Cache limpo com sucesso"
@@ -727,6 +926,20 @@ async def limpar_cache():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/metricas")
+async def get_metricas():
+    """Retorna métricas de latência das chamadas ao Google Sheets e do cache"""
+    try:
+        return {
+            "http": async_db_manager.get_http_stats(),
+            "cache": async_db_manager.get_cache_stats(),
+            "writes": db_manager.get_write_stats(),
+            "circuit": db_manager.breaker.stats(),
+            "staleness": db_manager.get_staleness()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/health")
 async def health_check():
     """Health check da API"""
@@ -736,6 +949,19 @@ async def health_check():
         "version": "3.0.0"
     }
 
+@app.get("/api/ready")
+async def readiness_check(response: Response):
+    """
+    Prontidão para receber tráfego: 200 com os caches aquecidos e 503
+    enquanto frios (o /api/health só indica que o processo responde)
+    """
+    if not warmup['ready']:
+        response.status_code = 503
+    return {
+        "status": "warm" if warmup['ready'] else "cold",
+        **warmup
+    }
+
 # ========================================
 # EXECUÇÃO
 # ========================================
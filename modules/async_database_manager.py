@@ -0,0 +1,566 @@
+"""
+Versão assíncrona do gerenciador de dados do Google Sheets
+Mesma API do GoogleSheetsManager, com I/O não bloqueante (httpx) para as
+rotas async do FastAPI
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from modules.database_manager import GoogleSheetsManager
+from modules.http_client import AsyncAppsScriptClient
+
+
+class AsyncGoogleSheetsManager:
+    """
+    Gerencia a leitura e escrita no Google Sheets sem bloquear o event loop
+
+    Compartilha configuração e cache (memória e disco) com um
+    GoogleSheetsManager, trocando apenas o transporte HTTP.
+    """
+
+    def __init__(self, manager: Optional[GoogleSheetsManager] = None):
+        """
+        Inicializa o manager assíncrono
+
+        Args:
+            manager: Manager síncrono cujo cache será compartilhado
+        """
+        self.manager = manager or GoogleSheetsManager()
+        self.http = AsyncAppsScriptClient.from_config(
+            self.manager.base_url,
+            self.manager.config.get('http'),
+            breaker=self.manager.breaker
+        )
+        self._background_tasks = set()
+        self._fetchers: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._refresher_task: Optional[asyncio.Task] = None
+
+    async def close(self):
+        """Interrompe a renovação antecipada e fecha as conexões HTTP abertas"""
+        self.stop_refresher()
+        await self.http.close()
+
+    def start_refresher(self):
+        """
+        Inicia a task que renova as chaves quentes antes que expirem
+        (ver GoogleSheetsManager.start_refresher); requer loop em execução
+        """
+        if self._refresher_task is not None:
+            return
+
+        async def run():
+            while True:
+                await asyncio.sleep(self.manager.refresh_interval)
+                for key in self.manager._due_for_refresh(self._fetchers):
+                    self._refresh_in_background(key, self._fetchers[key])
+
+        self._refresher_task = asyncio.create_task(run())
+
+    def stop_refresher(self):
+        """Interrompe a task de renovação antecipada"""
+        if self._refresher_task is not None:
+            self._refresher_task.cancel()
+            self._refresher_task = None
+
+    async def _lookup(self, key: str) -> Tuple[bool, Any, bool]:
+        """
+        GoogleSheetsManager._lookup sem travar o event loop: acertos em memória
+        são resolvidos direto e a leitura do disco (SQLite + JSON) roda em thread
+        """
+        if self.manager._memory.peek(key) is not None:
+            return self.manager._lookup(key)
+        return await asyncio.to_thread(self.manager._lookup, key)
+
+    async def _cached(self, key: str, fetch: Callable[[], Awaitable[Any]]):
+        """Versão assíncrona de GoogleSheetsManager._cached"""
+        self._fetchers[key] = fetch
+
+        manager = self.manager
+        hit, value, refresh = await self._lookup(key)
+        if hit:
+            if refresh:
+                manager._refresh_or_mark_stale(key, lambda: self._refresh_in_background(key, fetch))
+            return value
+
+        try:
+            return await self._fetch_once(key, fetch)
+        except Exception:
+            found, value = await asyncio.to_thread(manager._last_known_good, key)
+            if not found:
+                manager._unavailable[key] = time.time()
+                raise
+            return value
+
+    async def _fetch_once(self, key: str, fetch: Callable[[], Awaitable[Any]]):
+        """
+        Versão assíncrona de GoogleSheetsManager._fetch_once: a busca em
+        andamento é compartilhada com as threads do manager síncrono
+
+        A gravação no cache (estimativa de tamanho e escrita no disco) roda
+        em thread, para não travar o event loop com respostas grandes.
+        """
+        manager = self.manager
+        generation = manager._cache_generation
+
+        async def fetch_and_store():
+            value = await fetch()
+            if generation == manager._cache_generation:
+                await asyncio.to_thread(manager._set_cache, key, value)
+            return value
+
+        return await manager._single_flight.do_async(manager._flight_key(key), fetch_and_store)
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Awaitable[Any]]):
+        """Busca novamente uma chave em uma task (uma atualização por chave)"""
+        manager = self.manager
+        with manager._refresh_lock:
+            if key in manager._refreshing:
+                return
+            manager._refreshing.add(key)
+
+        async def refresh():
+            try:
+                await self._fetch_once(key, fetch)
+            except Exception as e:
+                print(f"Erro ao atualizar cache em segundo plano ({key}): {str(e)}")
+            finally:
+                with manager._refresh_lock:
+                    manager._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _request(self, action: str, timeout: Optional[float] = None, **params):
+        """Executa uma ação GET do Apps Script"""
+        return await self.http.get({'action': action, **params}, timeout=timeout)
+
+    async def get_all_data(self) -> Dict:
+        """Obtém todos os dados de todas as abas da planilha"""
+        try:
+            async def fetch():
+                data = await self._request('getAll', **self.manager._sheet_params())
+                return await asyncio.to_thread(self.manager._decode_all, data)
+
+            return await self._cached("all_data", fetch)
+        except Exception as e:
+            self.manager._report_error(f"Erro ao carregar dados: {str(e)}")
+            return {}
+
+    async def get_sheet_data(self, sheet_name: str) -> List[Dict]:
+        """Obtém dados de uma aba específica"""
+        try:
+            table = await self._sheet_table(sheet_name)
+            return await asyncio.to_thread(self.manager._table_records, table)
+        except Exception as e:
+            self.manager._report_error(f"Erro ao carregar dados da aba {sheet_name}: {str(e)}")
+            return []
+
+    async def _sheet_table(self, sheet_name: str) -> Dict:
+        """Tabela {headers, rows} da aba pelo cache (ver GoogleSheetsManager._sheet_table)"""
+        key = f"sheet_{sheet_name}"
+        return self.manager._cached_table(key, await self._cached(key, lambda: self._fetch_sheet(sheet_name)))
+
+    async def _sheet_table_or_empty(self, sheet_name: str) -> Dict:
+        """Tabela da aba, ou tabela vazia marcada como indisponível (ver GoogleSheetsManager._sheet_table_or_empty)"""
+        try:
+            return await self._sheet_table(sheet_name)
+        except Exception as e:
+            self.manager._report_error(f"Erro ao carregar dados da aba {sheet_name}: {str(e)}")
+            return {'headers': [], 'rows': []}
+
+    async def _fetch_sheet(self, sheet_name: str) -> Dict:
+        """Versão assíncrona de GoogleSheetsManager._fetch_sheet"""
+        manager = self.manager
+        if not manager.delta_sync:
+            base = manager._etag_base(sheet_name)
+            data = await self._request('getSheet', sheetName=sheet_name, ifNoneMatch=base[0] if base else '',
+                                       **manager._sheet_params())
+            table = await asyncio.to_thread(manager._apply_conditional, sheet_name, data, base)
+            return table if manager._is_table(table) else manager._checked_table(table)
+
+        base = manager._delta_base(sheet_name)
+        params = {'since': base[0]} if base else {}
+        data = await self._request('getSheetDelta', sheetName=sheet_name, **params, **manager._sheet_params())
+
+        if data.get('error') == 'Ação inválida':
+            # Apps Script implantado sem getSheetDelta
+            manager.delta_sync = False
+            return await self._fetch_sheet(sheet_name)
+
+        table = await asyncio.to_thread(manager._apply_sheet_delta, sheet_name, data, base)
+        if table is None:
+            data = await self._request('getSheetDelta', sheetName=sheet_name, **manager._sheet_params())
+            table = await asyncio.to_thread(manager._apply_sheet_delta, sheet_name, data, None)
+        return table if manager._is_table(table) else manager._checked_table(table)
+
+    async def get_sheet_page(
+        self,
+        sheet_name: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[Tuple[str, str, Any]]] = None
+    ) -> Dict:
+        """Lê um trecho de uma aba (ver GoogleSheetsManager.get_sheet_page)"""
+        manager = self.manager
+        data = await self._request('getSheet', **manager._page_params(sheet_name, offset, limit, columns, filters))
+        return manager._page_from(data, offset, limit, columns, filters)
+
+    async def iter_sheet_rows(
+        self,
+        sheet_name: str,
+        page_size: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[Tuple[str, str, Any]]] = None
+    ) -> AsyncIterator[Dict]:
+        """Percorre as linhas de uma aba página a página (ver GoogleSheetsManager.iter_sheet_rows)"""
+        page_size = max(1, page_size or self.manager.page_size)
+        offset = 0
+        while offset is not None:
+            page = await self.get_sheet_page(sheet_name, offset, page_size, columns, filters)
+            for row in page['rows']:
+                yield row
+            offset = page['next_offset']
+
+    async def _get_lista(self, cache_key: str, action: str, label: str) -> List[str]:
+        """Obtém uma lista simples (máquinas, clientes, ordens, datas)"""
+        async def fetch():
+            return self.manager._filtrar_vazios(await self._request(action))
+
+        try:
+            return await self._cached(cache_key, fetch)
+        except Exception as e:
+            self.manager._report_error(f"Erro ao carregar {label}: {str(e)}")
+            return []
+
+    async def get_maquinas(self) -> List[str]:
+        """Obtém lista de máquinas disponíveis"""
+        return await self._get_lista("maquinas", 'getMaquinas', 'máquinas')
+
+    async def get_clientes(self) -> List[str]:
+        """Obtém lista de clientes"""
+        return await self._get_lista("clientes", 'getClientes', 'clientes')
+
+    async def get_ordens(self) -> List[str]:
+        """Obtém lista de ordens de compra"""
+        return await self._get_lista("ordens", 'getOrdens', 'ordens')
+
+    async def get_datas_entrega(self) -> List[str]:
+        """Obtém lista de datas de entrega"""
+        return await self._get_lista("datas", 'getDatas', 'datas')
+
+    async def get_pedidos_cadastrados(self) -> List[Dict]:
+        """Obtém lista completa de pedidos da aba DADOS_GERAIS"""
+        async def fetch():
+            # A exceção chega ao _cached: sem a aba, vale o último valor conhecido dos pedidos
+            table = await self._sheet_table('DADOS_GERAIS')
+            rows = await asyncio.to_thread(self.manager._table_records, table)
+            return self.manager._filtrar_pedidos(rows)
+
+        try:
+            pedidos = await self._cached("pedidos_cadastrados", fetch)
+            await asyncio.to_thread(self.manager._inherit_staleness, "pedidos_cadastrados", "sheet_DADOS_GERAIS")
+            return pedidos
+        except Exception as e:
+            self.manager._report_error(f"Erro ao carregar pedidos cadastrados: {str(e)}")
+            return []
+
+    async def get_machine_availability(self, maquina: str) -> float:
+        """Obtém a disponibilidade da máquina (horas por dia) da célula K1"""
+        try:
+            return await self._availability_cached(maquina)
+        except Exception as e:
+            self.manager._report_error(
+                f"Erro ao carregar disponibilidade da máquina {maquina}: {str(e)}",
+                warning=True
+            )
+            # Retorna valor padrão de 8 horas
+            return 8.0
+
+    async def get_cells(self, ranges: List[Tuple[str, str]]) -> List[Dict]:
+        """Lê vários intervalos em uma única chamada (ver GoogleSheetsManager.get_cells)"""
+        try:
+            return await self._fetch_cells(ranges)
+        except Exception as e:
+            self.manager._report_error(f"Erro ao carregar células: {str(e)}")
+            return []
+
+    async def _fetch_cells(self, ranges: List[Tuple[str, str]]) -> List[Dict]:
+        """Executa getCells; lança exceção se a chamada inteira falhar"""
+        if not ranges:
+            return []
+
+        data = await self._request('getCells', ranges=self.manager._encode_ranges(ranges))
+        return self.manager._decode_cells(data, ranges)
+
+    async def _collect_availability(self, maquinas: List[str]) -> Tuple[Dict[str, float], Dict[str, str]]:
+        """Versão assíncrona de GoogleSheetsManager._collect_availability"""
+        manager = self.manager
+        pendentes = [m for m in maquinas if not manager._is_cache_valid(f"availability_{m}")]
+        availability = {m: manager._get_from_cache(f"availability_{m}") for m in maquinas if m not in pendentes}
+        errors = {}
+
+        if pendentes:
+            try:
+                cells = await self._fetch_cells([(manager.sheet_name(m), 'K1') for m in pendentes])
+                lote, errors = await asyncio.to_thread(manager._apply_cells_availability, pendentes, cells)
+            except Exception as e:
+                print(f"getCells indisponível, buscando máquina a máquina: {str(e)}")
+                lote, errors = await self._fan_out_availability(pendentes)
+            availability.update(lote)
+
+        return {m: availability[m] for m in maquinas}, errors
+
+    async def _availability_cached(self, maquina: str) -> float:
+        """Disponibilidade da máquina pelo cache; lança exceção em caso de erro"""
+        sheet_name = self.manager.sheet_name(maquina)
+
+        async def fetch() -> float:
+            data = await self._request('getCell', sheetName=sheet_name, cell='K1')
+            return self.manager._parse_availability(data.get('value', 8.0))
+
+        return await self._cached(f"availability_{maquina}", fetch)
+
+    async def get_all_machines_availability(self) -> Dict[str, float]:
+        """Obtém a disponibilidade de todas as máquinas"""
+        return (await self.get_all_machines_availability_report())['availability']
+
+    async def get_all_machines_availability_report(self) -> Dict:
+        """Versão assíncrona de GoogleSheetsManager.get_all_machines_availability_report"""
+        self._fetchers["all_availability"] = self._fetch_all_availability
+
+        hit, value, refresh = await self._lookup("all_availability")
+        if hit:
+            if refresh:
+                self.manager._refresh_or_mark_stale(
+                    "all_availability",
+                    lambda: self._refresh_in_background("all_availability", self._fetch_all_availability)
+                )
+            return {'availability': value, 'errors': {}}
+
+        async def collect():
+            availability, errors = await self._collect_availability(await self.get_maquinas())
+            if not errors:
+                await asyncio.to_thread(self.manager._set_cache, "all_availability", availability)
+            await asyncio.to_thread(self.manager._fill_last_known_availability, availability, errors)
+            return availability, errors
+
+        availability, errors = await self.manager._single_flight.do_async(
+            self.manager._flight_key("all_availability_report"), collect
+        )
+        return {'availability': availability, 'errors': errors}
+
+    async def _fetch_all_availability(self) -> Dict[str, float]:
+        """Busca todas as disponibilidades; lança exceção se alguma falhar"""
+        availability, errors = await self._collect_availability(await self.get_maquinas())
+        if errors:
+            raise RuntimeError(f"Falha na disponibilidade de {len(errors)} máquina(s)")
+        return availability
+
+    async def _fan_out_availability(self, maquinas: List[str]) -> Tuple[Dict[str, float], Dict[str, str]]:
+        """Busca a disponibilidade de cada máquina com asyncio.gather (concorrência limitada)"""
+        semaphore = asyncio.Semaphore(max(1, self.http.pool_size))
+
+        async def fetch_one(maquina: str) -> float:
+            async with semaphore:
+                return await self._availability_cached(maquina)
+
+        results = await asyncio.gather(
+            *(fetch_one(maquina) for maquina in maquinas),
+            return_exceptions=True
+        )
+
+        availability = {}
+        errors = {}
+        for maquina, result in zip(maquinas, results):
+            if isinstance(result, Exception):
+                print(f"Erro ao carregar disponibilidade da máquina {maquina}: {str(result)}")
+                errors[maquina] = str(result)
+                # Mantém o padrão de 8 horas para a máquina com erro
+                availability[maquina] = 8.0
+            else:
+                availability[maquina] = result
+
+        return availability, errors
+
+    async def load_snapshot(self, force: bool = False) -> bool:
+        """
+        Garante em memória as abas DADOS_*, disponibilidades e DADOS_GERAIS
+        (ver GoogleSheetsManager.load_snapshot): só as chaves frias ou, com o
+        cache frio, o getSnapshot completo
+        """
+        cold = self.manager._snapshot_cold_keys(force)
+        if cold is not None:
+            return not cold or await self._warm_keys(cold)
+
+        async def fetch_snapshot():
+            data = await self._request('getSnapshot', timeout=30, **self.manager._sheet_params())
+            # Converter e gravar todas as abas (memória e disco) é o trecho mais pesado
+            await asyncio.to_thread(self.manager._apply_snapshot, data)
+            return True
+
+        try:
+            return await self.manager._single_flight.do_async(self.manager._flight_key("snapshot"), fetch_snapshot)
+        except Exception as e:
+            self.manager._report_error(f"Erro ao carregar snapshot: {str(e)}")
+            return False
+
+    async def _warm_keys(self, keys: List[str]) -> bool:
+        """Busca as chaves frias concorrentemente (ver GoogleSheetsManager._warm_keys)"""
+        fetches = [self._sheet_table_or_empty(key[len("sheet_"):]) for key in keys if key.startswith("sheet_")]
+        if "pedidos_cadastrados" in keys:
+            fetches.append(self.get_pedidos_cadastrados())
+        if any(key == "all_availability" or key.startswith("availability_") for key in keys):
+            fetches.append(self.get_all_machines_availability_report())
+        await asyncio.gather(*fetches)
+        return not self.manager.cold_keys()
+
+    async def prewarm(self) -> List[str]:
+        """
+        Aquece os caches da primeira abertura do frontend: máquinas, catálogos
+        (abas DADOS_*), disponibilidades e pedidos cadastrados
+
+        Usa o getSnapshot, que traz tudo em uma requisição; se ele falhar,
+        busca as partes em paralelo.
+
+        Returns:
+            Chaves que continuam fora do cache (ver GoogleSheetsManager.cold_keys)
+        """
+        manager = self.manager
+        if not await self.load_snapshot():
+            maquinas = await self.get_maquinas()
+            await asyncio.gather(
+                self.get_all_machines_availability_report(),
+                self.get_pedidos_cadastrados(),
+                *(self._sheet_table_or_empty(manager.sheet_name(maquina)) for maquina in maquinas)
+            )
+        return manager.cold_keys()
+
+    async def get_produtos_por_maquina(self, maquina: str) -> pd.DataFrame:
+        """Obtém produtos de uma máquina específica"""
+        sheet_name = self.manager.sheet_name(maquina)
+
+        try:
+            table = await self._sheet_table_or_empty(sheet_name)
+            return await asyncio.to_thread(self.manager._produtos_dataframe_cached, sheet_name, table)
+        except Exception as e:
+            self.manager._report_error(f"Erro ao carregar produtos da máquina {maquina}: {str(e)}")
+            return pd.DataFrame()
+
+    async def add_produto(self, produto_data: Dict) -> bool:
+        """Adiciona novo produto à planilha"""
+        try:
+            result = await self.http.post({
+                'action': 'addProduto',
+                **produto_data
+            })
+            # A invalidação apaga as chaves do disco (SQLite): roda em thread
+            return await asyncio.to_thread(
+                self.manager._handle_write_result, result, self.manager._keys_for_produto(produto_data)
+            )
+        except Exception as e:
+            self.manager._report_error(f"Erro ao adicionar produto: {str(e)}")
+            return False
+
+    async def add_pedido(self, pedido_data: Dict) -> bool:
+        """Adiciona novo pedido à planilha"""
+        try:
+            result = await self.http.post({
+                'action': 'addPedido',
+                **pedido_data
+            })
+            return await asyncio.to_thread(
+                self.manager._handle_write_result, result, self.manager._keys_for_pedido(pedido_data)
+            )
+        except Exception as e:
+            self.manager._report_error(f"Erro ao adicionar pedido: {str(e)}")
+            return False
+
+    async def add_pedidos(self, pedidos: List[Dict]) -> List[Dict]:
+        """Adiciona vários pedidos em uma chamada (ver GoogleSheetsManager.add_pedidos)"""
+        return await self._write_many('pedido', pedidos)
+
+    async def add_produtos(self, produtos: List[Dict]) -> List[Dict]:
+        """Adiciona vários produtos em uma chamada (ver GoogleSheetsManager.add_produtos)"""
+        return await self._write_many('produto', produtos)
+
+    async def enqueue_pedido(self, pedido_data: Dict) -> Dict:
+        """Grava um pedido pela fila em lote e aguarda a confirmação do item"""
+        return await asyncio.wrap_future(self.manager.enqueue_pedido(pedido_data))
+
+    async def enqueue_produto(self, produto_data: Dict) -> Dict:
+        """Grava um produto pela fila em lote e aguarda a confirmação do item"""
+        return await asyncio.wrap_future(self.manager.enqueue_produto(produto_data))
+
+    async def _write_many(self, kind: str, items: List[Dict]) -> List[Dict]:
+        """Versão assíncrona de GoogleSheetsManager._write_many"""
+        if not items:
+            return []
+
+        manager = self.manager
+        bulk_action, field, single_action = manager._bulk_actions[kind]
+
+        try:
+            result = await self.http.post({'action': bulk_action, field: items})
+            if result.get('error') == 'Ação inválida':
+                # Apps Script implantado sem a ação em lote: um item por chamada
+                results = [await self._post_single(single_action, item) for item in items]
+            else:
+                results = manager._bulk_results(result, len(items))
+        except Exception as e:
+            results = [{'success': False, 'error': str(e)} for _ in items]
+
+        # Invalida as chaves afetadas (inclusive no disco) fora do event loop
+        return await asyncio.to_thread(manager._finish_writes, kind, items, results)
+
+    async def _post_single(self, action: str, item: Dict) -> Dict:
+        """Versão assíncrona de GoogleSheetsManager._post_single"""
+        try:
+            result = await self.http.post({'action': action, **item})
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+        if result.get('success'):
+            return {'success': True}
+        return {'success': False, 'error': result.get('error', 'Erro desconhecido')}
+
+    def get_http_stats(self) -> Dict[str, Dict]:
+        """Retorna métricas de latência das chamadas síncronas e assíncronas"""
+        return {
+            'sync': self.manager.get_http_stats(),
+            'async': self.http.get_stats()
+        }
+
+    def invalidate(self, *keys: str):
+        """Invalida chaves do cache compartilhado (ver GoogleSheetsManager.invalidate)"""
+        self.manager.invalidate(*keys)
+
+    def get_staleness(self) -> Dict[str, Any]:
+        """Dados desatualizados e estado do circuito (ver GoogleSheetsManager.get_staleness)"""
+        return self.manager.get_staleness()
+
+    async def get_etag(self, key: str) -> Optional[str]:
+        """
+        ETag do valor em cache de uma chave (ver GoogleSheetsManager.get_etag)
+
+        O ETag já calculado para o valor atual volta direto; o de uma nova
+        versão (JSON + sha1 da aba inteira) é calculado em thread.
+        """
+        manager = self.manager
+        entry = manager._memory.peek(key)
+        memo = manager._etags.get(key)
+        if entry is not None and memo is not None and memo[0] is entry[0]:
+            return memo[1]
+        return await asyncio.to_thread(manager.get_etag, key)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Retorna as estatísticas do cache em memória compartilhado"""
+        return self.manager.get_cache_stats()
+
+    def limpar_cache(self):
+        """Limpa o cache de dados (compartilhado com o manager síncrono)"""
+        self.manager.limpar_cache()
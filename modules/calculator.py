@@ -5,6 +5,9 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
 import pandas as pd
 
+from modules.catalog_index import index_dataframe
+from modules.sheet_schema import to_bool
+
 
 def formatar_data_br(data) -> str:
     """
@@ -56,7 +59,7 @@ class ProductionCalculator:
         tempo_montagem = float(produto.get('TEMPO DE MONTAGEM', 0))
 
         # Verifica se tem montagem 2x2
-        if produto.get('MONTAGEM 2X2', '').upper() == 'SIM':
+        if to_bool(produto.get('MONTAGEM 2X2')):
             tempo_montagem_2x2 = float(produto.get('TEMPO MONTAGEM 2X2', 0))
             tempo_montagem += tempo_montagem_2x2
 
@@ -146,19 +149,16 @@ class ProductionCalculator:
             Lista ordenada com sequência de produção
         """
         sequencia = []
+        produtos_por_ref = index_dataframe(produtos_info, ('REFERENCIA',))
 
         for pedido in pedidos:
             # Busca informações do produto
             produto_ref = pedido.get('produto')
-            produto_info = produtos_info[
-                produtos_info['REFERENCIA'] == produto_ref
-            ]
+            produto_dict = produtos_por_ref.get(produto_ref)
 
-            if produto_info.empty:
+            if produto_dict is None:
                 continue
 
-            produto_dict = produto_info.iloc[0].to_dict()
-
             tempo_total = ProductionCalculator.calcular_tempo_total_produto(produto_dict)
             dias_para_entrega = ProductionCalculator.calcular_dias_ate_entrega(
                 pedido.get('data_entrega', '')
@@ -0,0 +1,109 @@
+"""
+Índice do catálogo de produtos
+Busca O(1) de (máquina, referência) → produto e referência → máquinas
+compatíveis, construído uma vez por versão dos dados da planilha
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from modules.sheet_schema import to_records
+
+# Colunas que identificam um produto na aba da máquina
+REFERENCE_COLUMNS = ('REFERÊNCIAS/MÁQUINA', 'REFERENCIA')
+
+
+def index_records(
+    records: Iterable[Dict],
+    columns: Sequence[str] = REFERENCE_COLUMNS
+) -> Dict:
+    """
+    Indexa registros pelo valor de uma ou mais colunas
+
+    Mantém o primeiro registro de cada valor, equivalente a filtrar o
+    DataFrame com `(df[col1] == ref) | (df[col2] == ref)` e usar iloc[0].
+
+    Args:
+        records: Linhas do catálogo (dicionários)
+        columns: Colunas cujo valor identifica o produto
+
+    Returns:
+        Dicionário {referencia: registro}
+    """
+    index = {}
+    for record in records:
+        for column in columns:
+            value = record.get(column)
+            # Células vazias (None/NaN) nunca casam com uma referência
+            if value is None or value != value:
+                continue
+            index.setdefault(value, record)
+    return index
+
+
+def index_dataframe(df: pd.DataFrame, columns: Sequence[str] = REFERENCE_COLUMNS) -> Dict:
+    """Indexa as linhas de um DataFrame de produtos (ver index_records)"""
+    if df is None or df.empty:
+        return {}
+    return index_records(to_records(df), columns)
+
+
+class CatalogIndex:
+    """Índices do catálogo de todas as máquinas"""
+
+    def __init__(self, produtos_por_maquina: Dict[str, pd.DataFrame], sources: Optional[Dict] = None):
+        """
+        Constrói os índices
+
+        Args:
+            produtos_por_maquina: {maquina: DataFrame de produtos}, na ordem
+                em que as máquinas devem ser sugeridas
+            sources: Linhas originais de cada máquina, usadas para detectar
+                se os dados mudaram (ver is_built_from)
+        """
+        self.maquinas = list(produtos_por_maquina)
+        self.sources = sources or {}
+
+        self._produtos: Dict[str, Dict] = {}
+        self._maquinas_por_ref: Dict = {}
+
+        for maquina, df in produtos_por_maquina.items():
+            produtos = index_dataframe(df)
+            self._produtos[maquina] = produtos
+            for referencia in produtos:
+                self._maquinas_por_ref.setdefault(referencia, []).append(maquina)
+
+    def is_built_from(self, sources: Dict) -> bool:
+        """Indica se o índice foi construído exatamente a partir destas linhas"""
+        if list(sources) != list(self.sources):
+            return False
+        return all(sources[m] is self.sources[m] for m in sources)
+
+    def get(self, maquina: str, referencia) -> Optional[Dict]:
+        """
+        Obtém o produto de uma máquina
+
+        Args:
+            maquina: Nome da máquina
+            referencia: REFERÊNCIAS/MÁQUINA ou REFERENCIA do produto
+
+        Returns:
+            Registro do produto ou None se a máquina não o produz
+        """
+        return self._produtos.get(maquina, {}).get(referencia)
+
+    def machines_for(self, referencia) -> List[str]:
+        """Lista as máquinas que produzem a referência"""
+        return list(self._maquinas_por_ref.get(referencia, []))
+
+    def compatible(self, referencia) -> Dict[str, Dict]:
+        """
+        Obtém o produto em cada máquina compatível
+
+        Returns:
+            Dicionário {nome_maquina: info_produto}
+        """
+        return {
+            maquina: self._produtos[maquina][referencia]
+            for maquina in self._maquinas_por_ref.get(referencia, [])
+        }
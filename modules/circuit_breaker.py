@@ -0,0 +1,146 @@
+"""
+Disjuntor (circuit breaker) das chamadas ao Apps Script
+Depois de falhas seguidas o circuito abre: as chamadas falham na hora, sem
+esperar timeouts, enquanto uma thread sonda a recuperação em segundo plano
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada porque o circuito está aberto (Apps Script indisponível)"""
+
+
+class CircuitBreaker:
+    """
+    Conta falhas seguidas e abre o circuito ao atingir o limite
+
+    Com o circuito aberto, allow() devolve False e a função `probe` é
+    executada a cada probe_interval segundos em uma thread; o circuito fecha
+    na primeira sondagem bem-sucedida (ou em qualquer chamada que dê certo),
+    e então `on_close` é chamada.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        probe_interval: float = 15.0,
+        probe: Optional[Callable[[], Any]] = None,
+        on_close: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            failure_threshold: Falhas seguidas que abrem o circuito
+            probe_interval: Segundos entre sondagens com o circuito aberto
+            probe: Chamada leve ao Apps Script; lança exceção se ainda indisponível
+            on_close: Chamada quando o circuito volta a fechar (recuperação)
+        """
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.probe = probe
+        self.on_close = on_close
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._prober: Optional[threading.Thread] = None
+        self._stats = {'opened': 0, 'rejected': 0, 'probes': 0}
+
+    @property
+    def state(self) -> str:
+        """Estado atual: 'closed' ou 'open'"""
+        return self._state
+
+    def allow(self) -> bool:
+        """Indica se uma chamada pode ir ao Apps Script (conta as recusadas)"""
+        if self._state == CLOSED:
+            return True
+        with self._lock:
+            self._stats['rejected'] += 1
+        return False
+
+    def check(self):
+        """
+        Recusa a chamada se o circuito está aberto
+
+        Raises:
+            CircuitOpenError com o último erro que abriu o circuito
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Apps Script indisponível (circuito aberto): {self._last_error}")
+
+    def record_success(self):
+        """Registra uma chamada bem-sucedida: zera as falhas e fecha o circuito"""
+        with self._lock:
+            recovered = self._state == OPEN
+            self._failures = 0
+            self._state = CLOSED
+            self._opened_at = None
+
+        if recovered and self.on_close is not None:
+            try:
+                self.on_close()
+            except Exception as e:
+                print(f"Erro ao tratar a recuperação do Apps Script: {str(e)}")
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        """Registra uma chamada que falhou (já depois das retentativas)"""
+        with self._lock:
+            self._failures += 1
+            if error is not None:
+                self._last_error = str(error)
+            if self._state == OPEN or self._failures < self.failure_threshold:
+                return
+
+            self._state = OPEN
+            self._opened_at = time.time()
+            self._stats['opened'] += 1
+            start_prober = self.probe is not None and (self._prober is None or not self._prober.is_alive())
+            if start_prober:
+                self._stop.clear()
+                self._prober = threading.Thread(target=self._probe_loop, name='circuit-probe', daemon=True)
+
+        if start_prober:
+            self._prober.start()
+
+    def _probe_loop(self):
+        """Sonda o Apps Script até a recuperação (ou até stop())"""
+        while self._state == OPEN and not self._stop.wait(self.probe_interval):
+            with self._lock:
+                self._stats['probes'] += 1
+            try:
+                self.probe()
+            except Exception as e:
+                with self._lock:
+                    self._last_error = str(e)
+                continue
+            self.record_success()
+
+    def stop(self):
+        """Interrompe as sondagens em andamento"""
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estado e contadores
+
+        Returns:
+            Dicionário {state, failures, open_for_s, last_error, opened,
+            rejected, probes}
+        """
+        with self._lock:
+            opened_at = self._opened_at
+            return {
+                'state': self._state,
+                'failures': self._failures,
+                'open_for_s': round(time.time() - opened_at, 1) if opened_at else 0,
+                'last_error': self._last_error,
+                **self._stats
+            }
@@ -0,0 +1,67 @@
+"""
+Contexto de acesso aos dados do processo
+Um único GoogleSheetsManager (configuração, cache e pool de conexões), o
+repositório do planejamento e o manager assíncrono da API, compartilhados
+por main.py, planejador e otimizadores
+"""
+import threading
+from typing import Optional
+
+from modules.database_manager import GoogleSheetsManager
+from modules.repository import DataRepository, create_repository
+
+
+class DataContext:
+    """Instâncias de acesso aos dados compartilhadas pelo processo"""
+
+    def __init__(self, manager: Optional[GoogleSheetsManager] = None):
+        """
+        Inicializa o contexto
+
+        Args:
+            manager: GoogleSheetsManager a compartilhar (um novo é criado se None)
+        """
+        self.manager = manager or GoogleSheetsManager()
+        # Mesma configuração já lida pelo manager (storage.backend)
+        self.repository: DataRepository = create_repository(
+            self.manager,
+            self.manager.config.get('storage') or {}
+        )
+        self._async_manager = None
+
+    @property
+    def async_manager(self):
+        """AsyncGoogleSheetsManager sobre o mesmo cache (criado no primeiro uso; requer httpx)"""
+        if self._async_manager is None:
+            from modules.async_database_manager import AsyncGoogleSheetsManager
+            self._async_manager = AsyncGoogleSheetsManager(self.manager)
+        return self._async_manager
+
+    def invalidate(self, *keys: str):
+        """Invalida chaves do cache compartilhado (ver GoogleSheetsManager.invalidate)"""
+        self.manager.invalidate(*keys)
+
+    def limpar_cache(self):
+        """Limpa o cache compartilhado e os dados derivados do repositório"""
+        self.manager.limpar_cache()
+        if self.repository is not self.manager:
+            self.repository.invalidate()
+
+
+# Instância global do contexto
+_context_instance = None
+_context_lock = threading.Lock()
+
+
+def get_data_context(manager: Optional[GoogleSheetsManager] = None) -> DataContext:
+    """
+    Retorna o contexto de dados do processo
+
+    Args:
+        manager: GoogleSheetsManager usado na primeira criação (opcional)
+    """
+    global _context_instance
+    with _context_lock:
+        if _context_instance is None:
+            _context_instance = DataContext(manager)
+        return _context_instance
@@ -1,13 +1,28 @@
 """
 Módulo de gerenciamento de dados do Google Sheets
 """
-import requests
 import pandas as pd
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 import yaml
 from pathlib import Path
 from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor
+from fnmatch import fnmatch
+import threading
 import time
+import json
+import hashlib
+import os
+import re
+
+from modules.catalog_index import CatalogIndex
+from modules.circuit_breaker import OPEN, CircuitBreaker
+from modules.disk_cache import DiskCache
+from modules.memory_cache import MemoryCache
+from modules.repository import DataRepository
+from modules.single_flight import SingleFlight
+from modules.write_queue import WriteBehindQueue
+from modules.http_client import AppsScriptClient
 
 # Importa streamlit apenas se disponível
 try:
@@ -17,37 +32,603 @@ except ImportError:
     HAS_STREAMLIT = False
 
 
-class GoogleSheetsManager:
+class GoogleSheetsManager(DataRepository):
     """Gerencia a conexão e operações com Google Sheets via Apps Script"""
 
     def __init__(self):
         """Inicializa o manager carregando configurações"""
         self.config = self._load_config()
         self.base_url = self.config['google_apps_script_url']
-        self._cache = {}  # Cache simples para FastAPI
-        self._cache_time = {}
+        # Disjuntor compartilhado pelos clientes síncrono e assíncrono: com o
+        # Apps Script fora do ar, as chamadas falham na hora e o cache serve o
+        # último valor conhecido até a sondagem em segundo plano ter sucesso
+        breaker_config = self.config.get('circuit_breaker', {})
+        self.breaker = CircuitBreaker(
+            failure_threshold=breaker_config.get('failure_threshold', 5),
+            probe_interval=breaker_config.get('probe_interval', 15)
+        )
+        # Sessão compartilhada: pool de conexões, retentativas e métricas
+        self.http = AppsScriptClient.from_config(self.base_url, self.config.get('http'), breaker=self.breaker)
+        self.breaker.probe = self.http.ping
+        self.breaker.on_close = self._refresh_stale
+        # Chaves servidas pelo último valor conhecido: chave → horário da busca
+        self._stale: Dict[str, float] = {}
+        # Chaves sem valor conhecido cuja busca falhou: chave → horário da falha
+        self._unavailable: Dict[str, float] = {}
+        # Incrementado a cada invalidação: atualizações em segundo plano
+        # iniciadas antes dela não regravam valores antigos
+        self._cache_generation = 0
+
+        cache_config = self.config.get('cache', {})
+        self.cache_ttl = cache_config.get('ttl', 300)
+
+        # Cache em memória (LRU) com orçamento de entradas e bytes; TTL por chave
+        self._memory = MemoryCache(
+            max_entries=cache_config.get('max_entries', 512),
+            max_bytes=cache_config.get('max_bytes', 64 * 1024 * 1024)
+        )
+
+        # Segundo nível persistente: sobrevive a reinícios do servidor
+        self.disk_max_age = cache_config.get('disk_max_age', 86400)
+        self._disk_cache = None
+        disk_path = cache_config.get('disk_path')
+        if disk_path:
+            try:
+                self._disk_cache = DiskCache(str(Path(__file__).parent.parent / disk_path))
+            except Exception as e:
+                print(f"Cache em disco desativado: {str(e)}")
+
+        # Stale-while-revalidate: valor vencido é servido até hard_ttl enquanto
+        # é atualizado em segundo plano
+        self.hard_ttl = cache_config.get('hard_ttl', 3600)
+        self.refresh_ahead = cache_config.get('refresh_ahead', 0.8)
+        self.refresh_interval = cache_config.get('refresh_interval', 30)
+        self.hot_keys = cache_config.get('hot_keys', ['maquinas', 'sheet_DADOS_*'])
+
+        # Sincronização incremental: a aba em cache é atualizada só com as
+        # linhas alteradas desde a sua revisão (getSheetDelta)
+        self.delta_sync = cache_config.get('delta_sync', True)
+        self.delta_resync = cache_config.get('delta_resync', 3600)
+        self._revisions: Dict[str, Tuple[int, Dict, float]] = {}  # aba → (revisão, tabela, última carga completa)
+
+        # Formato compacto: abas chegam como {headers, rows} (cabeçalho uma vez,
+        # linhas em listas). Um Apps Script antigo ignora o parâmetro e segue
+        # respondendo lista de objetos, que também é aceita.
+        self.compact_format = cache_config.get('compact_format', True)
+        # Linhas por requisição em iter_sheet_rows
+        self.page_size = cache_config.get('page_size', 500)
+        # Até este número de chaves frias, load_snapshot as busca uma a uma em
+        # vez de baixar a planilha inteira
+        self.snapshot_max_cold = cache_config.get('snapshot_max_cold', 3)
+
+        # Leitura condicional (sem delta_sync): aba → (hash do Apps Script, tabela)
+        self._sheet_etags: Dict[str, Tuple[str, Dict]] = {}
+        # Derivados memorizados por identidade do valor em cache
+        self._etags: Dict[str, Tuple[Any, str]] = {}  # chave → (valor, ETag da API)
+        self._dataframes: Dict[str, Tuple[Dict, pd.DataFrame]] = {}  # aba → (tabela, DataFrame)
+
+        # Atualizações em segundo plano (uma por chave)
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sheets-refresh')
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._fetchers: Dict[str, Callable[[], Any]] = {}  # Como buscar cada chave novamente
+
+        # Uma busca em andamento por chave: chamadas concorrentes (threads ou
+        # coroutines do manager assíncrono) aguardam o resultado dela
+        self._single_flight = SingleFlight()
+
+        # Escritas individuais enfileiradas e enviadas em lote (write-behind)
+        writes_config = self.config.get('writes', {})
+        self._write_queue = WriteBehindQueue(
+            self._write_many,
+            window=writes_config.get('window', 0.2),
+            max_batch=writes_config.get('max_batch', 200)
+        )
+
+        # Índice do catálogo, reconstruído quando as abas DADOS_* mudam
+        self._catalog: Optional[CatalogIndex] = None
+        self._refresher_stop: Optional[threading.Event] = None
+
+    # Escritas em lote: tipo → (ação em lote, campo da lista, ação de um item)
+    _bulk_actions = {
+        'pedido': ('addPedidos', 'pedidos', 'addPedido'),
+        'produto': ('addProdutos', 'produtos', 'addProduto'),
+    }
+
+    # Chaves derivadas de outra chave: invalidadas junto com ela
+    _dependencies = {
+        'sheet_DADOS_GERAIS': ['pedidos_cadastrados', 'clientes', 'ordens', 'datas'],
+        'maquinas': ['all_availability'],
+    }
 
     @staticmethod
     def _load_config() -> Dict:
-        """Carrega configurações do arquivo YAML"""
+        """
+        Carrega configurações do arquivo YAML
+
+        GOOGLE_APPS_SCRIPT_URL, se definida, substitui a URL do Apps Script
+        (ex: apontar testes de carga para o apps_script_emulator.py)
+        """
         config_path = Path(__file__).parent.parent / 'config' / 'config.yaml'
         with open(config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            config = yaml.safe_load(f)
+
+        url = os.environ.get('GOOGLE_APPS_SCRIPT_URL')
+        if url:
+            config['google_apps_script_url'] = url
+        return config
 
-    def _is_cache_valid(self, key: str, ttl: int = 300) -> bool:
+    @staticmethod
+    def _report_error(error_msg: str, warning: bool = False):
+        """Exibe erro no Streamlit, se disponível, ou no console"""
+        if HAS_STREAMLIT:
+            if warning:
+                st.warning(error_msg)
+            else:
+                st.error(error_msg)
+        else:
+            print(error_msg)
+
+    def _is_cache_valid(self, key: str, ttl: Optional[int] = None) -> bool:
         """Verifica se o cache ainda é válido"""
-        if key not in self._cache_time:
+        entry = self._memory.peek(key)
+        if entry is None:
             return False
-        return (time.time() - self._cache_time[key]) < ttl
+        _, fetched_at, key_ttl = entry
+        if ttl is None:
+            ttl = key_ttl
+        return (time.time() - fetched_at) < ttl
 
     def _get_from_cache(self, key: str):
         """Obtém valor do cache"""
-        return self._cache.get(key)
+        entry = self._memory.get(key)
+        return entry[0] if entry is not None else None
+
+    def _set_cache(self, key: str, value, ttl: Optional[int] = None):
+        """
+        Armazena valor no cache (memória e disco)
+
+        Se o valor é o mesmo objeto já em cache (resposta "não modificado"),
+        apenas renova o horário da busca, sem reestimar nem regravar o valor.
+        """
+        if ttl is None:
+            ttl = self.cache_ttl
+
+        fetched_at = time.time()
+        self._stale.pop(key, None)
+        self._unavailable.pop(key, None)
+        current = self._memory.peek(key)
+        if current is not None and current[0] is value:
+            self._memory.touch(key, fetched_at, ttl)
+            if self._disk_cache is not None:
+                try:
+                    self._disk_cache.touch(key, fetched_at, ttl)
+                except Exception as e:
+                    print(f"Erro ao renovar cache em disco ({key}): {str(e)}")
+            return
+
+        self._memory.set(key, value, fetched_at, ttl)
+
+        if self._disk_cache is not None:
+            try:
+                self._disk_cache.set(key, value, ttl, fetched_at)
+            except Exception as e:
+                print(f"Erro ao gravar cache em disco ({key}): {str(e)}")
+
+    def _load_from_disk(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        Promove para a memória um valor do cache em disco
+
+        Mantém o horário da busca original, de modo que um valor expirado
+        continue expirado na memória.
+
+        Returns:
+            Tupla (valor, fetched_at, ttl) ou None se a chave não está no disco
+        """
+        if self._disk_cache is None:
+            return None
+
+        try:
+            entry = self._disk_cache.get(key)
+        except Exception as e:
+            print(f"Erro ao ler cache em disco ({key}): {str(e)}")
+            return None
+
+        if entry is None:
+            return None
+
+        value, fetched_at, ttl = entry
+        if time.time() - fetched_at > self.disk_max_age:
+            return None
+
+        self._memory.set(key, value, fetched_at, ttl)
+        return entry
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any]):
+        """Busca novamente uma chave em segundo plano (uma atualização por chave)"""
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._fetch_once(key, fetch)
+            except Exception as e:
+                print(f"Erro ao atualizar cache em segundo plano ({key}): {str(e)}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_executor.submit(refresh)
+
+    def _cached(self, key: str, fetch: Callable[[], Any]):
+        """
+        Retorna o valor da chave do cache ou o busca com `fetch`
+
+        Ordem de consulta: memória, disco e, por fim, o Apps Script. Um valor
+        expirado (mas dentro do teto hard_ttl, ou vindo do disco logo após um
+        reinício) é devolvido na hora enquanto uma atualização roda em
+        segundo plano.
+
+        Se a busca falha (ou o circuito está aberto), devolve o último valor
+        conhecido da chave, de qualquer idade, e o marca como desatualizado;
+        sem valor conhecido, registra a chave como indisponível e lança a
+        exceção (ver get_staleness).
+
+        Args:
+            key: Chave do cache
+            fetch: Função que busca o valor e lança exceção em caso de erro
+
+        Returns:
+            Valor da chave
+        """
+        self._fetchers[key] = fetch
+
+        hit, value, refresh = self._lookup(key)
+        if hit:
+            if refresh:
+                self._refresh_or_mark_stale(key, lambda: self._refresh_in_background(key, fetch))
+            return value
+
+        try:
+            return self._fetch_once(key, fetch)
+        except Exception:
+            found, value = self._last_known_good(key)
+            if not found:
+                self._unavailable[key] = time.time()
+                raise
+            return value
+
+    def _refresh_or_mark_stale(self, key: str, refresh: Callable[[], None]):
+        """Agenda a atualização de um valor vencido; com o circuito aberto, só o marca como desatualizado"""
+        if self.breaker.allow():
+            refresh()
+        else:
+            entry = self._memory.peek(key)
+            if entry is not None:
+                self._stale[key] = entry[1]
+
+    def _refresh_stale(self):
+        """Depois da recuperação, atualiza em segundo plano as chaves servidas desatualizadas ou indisponíveis"""
+        for key in list(self._stale) + list(self._unavailable):
+            fetch = self._fetchers.get(key)
+            if fetch is not None:
+                self._refresh_in_background(key, fetch)
+
+    def _last_known_good(self, key: str) -> Tuple[bool, Any]:
+        """
+        Último valor conhecido da chave (memória ou disco), sem limite de idade
+
+        Usado quando o Apps Script falha: a resposta continua rápida e a chave
+        fica registrada como desatualizada até a próxima busca bem-sucedida.
+
+        Returns:
+            Tupla (encontrado, valor)
+        """
+        entry = self._memory.peek(key)
+        if entry is None and self._disk_cache is not None:
+            try:
+                entry = self._disk_cache.get(key)
+            except Exception as e:
+                print(f"Erro ao ler cache em disco ({key}): {str(e)}")
+            if entry is not None:
+                # Mantém o horário original: continua vencido na memória
+                self._memory.set(key, *entry)
+
+        if entry is None:
+            return False, None
+
+        self._stale[key] = entry[1]
+        return True, entry[0]
+
+    def _inherit_staleness(self, key: str, source: str):
+        """
+        Marca um valor derivado como desatualizado se a chave de origem foi
+        servida pelo último valor conhecido
+
+        O derivado (ex: pedidos_cadastrados, montado de sheet_DADOS_GERAIS)
+        fica com o horário da busca da origem, para não parecer recente e
+        ser buscado de novo junto com ela depois da recuperação.
+        """
+        since = self._stale.get(source)
+        if since is None:
+            return
+
+        self._stale[key] = since
+        entry = self._memory.peek(key)
+        if entry is not None and entry[1] > since:
+            self._memory.touch(key, since, entry[2])
+            if self._disk_cache is not None:
+                try:
+                    self._disk_cache.touch(key, since, entry[2])
+                except Exception as e:
+                    print(f"Erro ao renovar cache em disco ({key}): {str(e)}")
+
+    def _fill_last_known_availability(self, availability: Dict[str, float], errors: Dict[str, str]):
+        """Máquinas com erro recebem a última disponibilidade conhecida em vez do padrão de 8 horas"""
+        if not errors:
+            return
+
+        found, last = self._last_known_good("all_availability")
+        for maquina in errors:
+            if found and maquina in last:
+                availability[maquina] = last[maquina]
+                continue
+            found_one, value = self._last_known_good(f"availability_{maquina}")
+            if found_one:
+                availability[maquina] = value
+
+    def get_staleness(self) -> Dict[str, Any]:
+        """
+        Indica se as respostas estão usando dados desatualizados
+
+        Returns:
+            Dicionário {stale, circuit, max_age_s, keys, unavailable}: stale
+            é True com o circuito aberto ou enquanto alguma chave servida pelo
+            último valor conhecido (ou indisponível, sem valor algum) não for
+            buscada de novo; keys traz a idade (segundos) de cada uma e
+            unavailable as chaves que responderam vazias
+        """
+        now = time.time()
+        keys = {key: round(now - fetched_at, 1) for key, fetched_at in list(self._stale.items())}
+        unavailable = sorted(self._unavailable)
+        circuit = self.breaker.state
+        return {
+            'stale': bool(keys) or bool(unavailable) or circuit == OPEN,
+            'circuit': circuit,
+            'max_age_s': max(keys.values(), default=0),
+            'keys': keys,
+            'unavailable': unavailable
+        }
+
+    def _flight_key(self, key: str) -> str:
+        """
+        Chave da busca em andamento: inclui a geração do cache, para que uma
+        chamada feita depois de uma invalidação não receba o valor de uma
+        busca iniciada antes dela
+        """
+        return f"{key}@{self._cache_generation}"
+
+    def _fetch_once(self, key: str, fetch: Callable[[], Any]):
+        """
+        Busca a chave e grava no cache, coalescendo chamadas concorrentes
+
+        Returns:
+            Valor buscado (por esta chamada ou pela que já estava em andamento)
+        """
+        generation = self._cache_generation
 
-    def _set_cache(self, key: str, value):
-        """Armazena valor no cache"""
-        self._cache[key] = value
-        self._cache_time[key] = time.time()
+        def fetch_and_store():
+            value = fetch()
+            if generation == self._cache_generation:
+                self._set_cache(key, value)
+            return value
+
+        return self._single_flight.do(self._flight_key(key), fetch_and_store)
+
+    def _lookup(self, key: str) -> Tuple[bool, Any, bool]:
+        """
+        Consulta memória e disco sem acessar o Apps Script
+
+        Compartilhado com o AsyncGoogleSheetsManager, que só troca o transporte.
+
+        Returns:
+            Tupla (encontrado, valor, precisa_atualizar_em_segundo_plano)
+        """
+        entry = self._memory.get(key)
+        from_disk = entry is None
+        if from_disk:
+            entry = self._load_from_disk(key)
+            if entry is None:
+                return False, None, False
+
+        value, fetched_at, ttl = entry
+        age = time.time() - fetched_at
+        if age < ttl:
+            return True, value, False
+
+        # Vencido: serve o valor antigo até o teto (disco usa disk_max_age)
+        ceiling = self.disk_max_age if from_disk else self.hard_ttl
+        if age < ceiling:
+            return True, value, True
+
+        return False, None, False
+
+    def _is_hot(self, key: str) -> bool:
+        """Indica se a chave deve ser renovada antes de expirar"""
+        return any(fnmatch(key, pattern) for pattern in self.hot_keys)
+
+    def _due_for_refresh(self, fetchers: Dict[str, Callable]) -> List[str]:
+        """
+        Lista as chaves quentes em cache que já passaram de refresh_ahead × TTL
+        e as chaves indisponíveis (busca falhou sem valor conhecido)
+
+        Args:
+            fetchers: Chaves que o chamador sabe buscar novamente
+
+        Returns:
+            Chaves a renovar (nenhuma com o circuito aberto)
+        """
+        if self.breaker.state == OPEN:
+            return []
+
+        now = time.time()
+        due = [key for key in list(self._unavailable) if key in fetchers]
+        for key, fetched_at, ttl in self._memory.items_meta():
+            if key not in fetchers or not self._is_hot(key) or key in due:
+                continue
+            if now - fetched_at >= ttl * self.refresh_ahead:
+                due.append(key)
+        return due
+
+    def start_refresher(self):
+        """
+        Inicia a thread que renova as chaves quentes (máquinas, abas DADOS_*)
+        antes que expirem, para que nenhuma requisição pague a latência do
+        Apps Script
+        """
+        if self._refresher_stop is not None:
+            return
+
+        stop = threading.Event()
+        self._refresher_stop = stop
+
+        def run():
+            while not stop.wait(self.refresh_interval):
+                for key in self._due_for_refresh(self._fetchers):
+                    self._refresh_in_background(key, self._fetchers[key])
+
+        threading.Thread(target=run, name='sheets-refresher', daemon=True).start()
+
+    def stop_refresher(self):
+        """Interrompe a thread de renovação antecipada"""
+        if self._refresher_stop is not None:
+            self._refresher_stop.set()
+            self._refresher_stop = None
+
+    def _request(self, action: str, timeout: Optional[float] = None, **params):
+        """
+        Executa uma ação GET do Apps Script
+
+        Args:
+            action: Nome da ação (getAll, getSheet, ...)
+            timeout: Tempo limite de leitura em segundos (padrão: http.read_timeout)
+            **params: Parâmetros adicionais da ação
+
+        Returns:
+            JSON decodificado da resposta
+        """
+        return self.http.get({'action': action, **params}, timeout=timeout)
+
+    def _sheet_params(self) -> Dict[str, str]:
+        """Parâmetros das ações que devolvem abas inteiras (getAll, getSheet, ...)"""
+        return {'format': 'compact'} if self.compact_format else {}
+
+    @staticmethod
+    def _header_key(header) -> str:
+        """Cabeçalho como a chave que o JavaScript daria ao objeto da linha"""
+        if isinstance(header, bool):
+            return 'true' if header else 'false'
+        if isinstance(header, float) and header.is_integer():
+            return str(int(header))
+        return str(header)
+
+    @classmethod
+    def _compact_to_table(cls, headers: List, rows: List[List]) -> Dict:
+        """
+        Normaliza o formato compacto na tabela guardada no cache
+
+        Args:
+            headers: Cabeçalho da aba
+            rows: Valores de cada linha, sem as células vazias do final
+
+        Returns:
+            Tabela {headers, rows}: cabeçalhos como as chaves do formato
+            antigo e linhas completadas com '' até a largura do cabeçalho
+        """
+        keys = [cls._header_key(header) for header in headers]
+        width = len(keys)
+        blanks = [''] * width
+        return {
+            'headers': keys,
+            'rows': [row if len(row) >= width else row + blanks[len(row):] for row in rows]
+        }
+
+    @staticmethod
+    def _records_to_table(records: List[Dict]) -> Dict:
+        """Converte linhas como dicionários (Apps Script sem formato compacto) em tabela"""
+        headers = list(dict.fromkeys(key for record in records for key in record))
+        return {'headers': headers, 'rows': [[record.get(key, '') for key in headers] for record in records]}
+
+    @staticmethod
+    def _table_records(table: Dict) -> List[Dict]:
+        """Linhas da tabela como dicionários, para quem precisa de registros"""
+        headers = table['headers']
+        return [dict(zip(headers, row)) for row in table['rows']]
+
+    @staticmethod
+    def _is_table(value) -> bool:
+        """Indica se o valor é uma tabela {headers, rows}"""
+        return isinstance(value, dict) and 'headers' in value and 'rows' in value
+
+    @classmethod
+    def _table_from(cls, data):
+        """
+        Tabela de uma aba em qualquer dos formatos de resposta
+
+        Returns:
+            Tabela para {headers, rows}, {rows: [...]} ou lista de objetos, e a
+            própria resposta nos demais casos (erro)
+        """
+        if isinstance(data, list):
+            return cls._records_to_table(data)
+        if isinstance(data, dict):
+            if 'headers' in data:
+                return cls._compact_to_table(data['headers'], data.get('rows', []))
+            if isinstance(data.get('rows'), list):
+                return cls._records_to_table(data['rows'])
+        return data
+
+    @classmethod
+    def _rows_from(cls, data):
+        """
+        Linhas de uma aba como dicionários, em qualquer dos formatos de resposta
+
+        Returns:
+            Lista de dicionários, ou a própria resposta se for um erro
+        """
+        table = cls._table_from(data)
+        return cls._table_records(table) if cls._is_table(table) else table
+
+    @staticmethod
+    def _filtrar_vazios(valores: List) -> List:
+        """Remove valores vazios de uma lista vinda da planilha"""
+        return [v for v in valores if v and str(v).strip()]
+
+    @staticmethod
+    def _filtrar_pedidos(data: List[Dict]) -> List[Dict]:
+        """Filtra pedidos válidos (que tenham pelo menos cliente e máquina)"""
+        return [
+            p for p in data
+            if p.get('CLIENTE') and p.get('MAQUINAS')
+        ]
+
+    @staticmethod
+    def _parse_availability(value) -> float:
+        """
+        Converte o valor da célula K1 em horas por dia
+
+        Raises:
+            TypeError/ValueError se o valor não for numérico
+        """
+        availability = float(value)
+
+        # Valida se está em um range razoável (0-24 horas)
+        if availability <= 0 or availability > 24:
+            availability = 8.0
+
+        return availability
 
     def get_all_data(self) -> Dict:
         """
@@ -56,26 +637,18 @@ class GoogleSheetsManager:
         Returns:
             Dict com dados de todas as abas
         """
-        cache_key = "all_data"
-
-        # Verifica cache
-        if self._is_cache_valid(cache_key):
-            return self._get_from_cache(cache_key)
-
         try:
-            response = requests.get(f"{self.base_url}?action=getAll", timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            self._set_cache(cache_key, data)
-            return data
+            return self._cached("all_data", lambda: self._decode_all(self._request('getAll', **self._sheet_params())))
         except Exception as e:
-            error_msg = f"Erro ao carregar dados: {str(e)}"
-            if HAS_STREAMLIT:
-                st.error(error_msg)
-            else:
-                print(error_msg)
+            self._report_error(f"Erro ao carregar dados: {str(e)}")
             return {}
 
+    def _decode_all(self, data: Dict) -> Dict:
+        """Converte cada aba da resposta de getAll em lista de dicionários (API pública de registros)"""
+        if not isinstance(data, dict) or 'error' in data:
+            return data
+        return {sheet_name: self._rows_from(rows) for sheet_name, rows in data.items()}
+
     def get_sheet_data(self, sheet_name: str) -> List[Dict]:
         """
         Obtém dados de uma aba específica
@@ -86,28 +659,361 @@ class GoogleSheetsManager:
         Returns:
             Lista de dicionários com os dados
         """
-        cache_key = f"sheet_{sheet_name}"
+        try:
+            return self.get_sheet_rows(sheet_name)
+        except Exception as e:
+            self._report_error(f"Erro ao carregar dados da aba {sheet_name}: {str(e)}")
+            return []
 
-        # Verifica cache
-        if self._is_cache_valid(cache_key):
-            return self._get_from_cache(cache_key)
+    def get_sheet_rows(self, sheet_name: str) -> List[Dict]:
+        """
+        Obtém as linhas de uma aba pelo cache, como get_sheet_data, mas lança
+        a exceção em vez de devolver lista vazia (usado pela sincronização)
 
-        try:
-            response = requests.get(
-                f"{self.base_url}?action=getSheet&sheetName={sheet_name}",
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
-            self._set_cache(cache_key, data)
+        Args:
+            sheet_name: Nome da aba
+
+        Returns:
+            Lista de dicionários com os dados
+        """
+        return self._table_records(self._sheet_table(sheet_name))
+
+    def _sheet_table(self, sheet_name: str) -> Dict:
+        """
+        Tabela {headers, rows} da aba pelo cache; lança exceção em caso de erro
+
+        As abas ficam no cache nesse formato (o mesmo do getSheet compacto):
+        os produtos são decodificados direto dele e só quem precisa de
+        registros monta os dicionários.
+        """
+        key = f"sheet_{sheet_name}"
+        return self._cached_table(key, self._cached(key, lambda: self._fetch_sheet(sheet_name)))
+
+    def _cached_table(self, key: str, value) -> Dict:
+        """
+        Garante o formato de tabela do valor lido do cache
+
+        Linhas como dicionários gravadas no disco por uma versão anterior são
+        convertidas e a entrada em memória é trocada (mantendo o TTL), para a
+        memorização por identidade dos DataFrames continuar valendo.
+        """
+        if self._is_table(value):
+            return value
+
+        table = self._checked_table(value)
+        entry = self._memory.peek(key)
+        if entry is not None and entry[0] is value:
+            self._memory.set(key, table, entry[1], entry[2])
+        return table
+
+    def _checked_table(self, data) -> Dict:
+        """Tabela da resposta de uma aba; lança ValueError se o Apps Script devolveu erro"""
+        table = self._table_from(data)
+        if not self._is_table(table):
+            raise ValueError(table.get('error', 'Resposta inválida') if isinstance(table, dict) else 'Resposta inválida')
+        return table
+
+    def _fetch_sheet(self, sheet_name: str) -> Dict:
+        """
+        Busca a tabela {headers, rows} de uma aba
+
+        Com delta_sync, pede ao Apps Script apenas as linhas alteradas desde a
+        revisão em cache e as aplica sobre a cópia local. Sem revisão conhecida,
+        depois de delta_resync segundos ou se o delta não fecha com a cópia
+        local, recebe a aba inteira.
+        """
+        if not self.delta_sync:
+            base = self._etag_base(sheet_name)
+            data = self._request('getSheet', sheetName=sheet_name, ifNoneMatch=base[0] if base else '',
+                                 **self._sheet_params())
+            table = self._apply_conditional(sheet_name, data, base)
+            # Já normalizada: devolve o mesmo objeto registrado com o hash
+            return table if self._is_table(table) else self._checked_table(table)
+
+        base = self._delta_base(sheet_name)
+        params = {'since': base[0]} if base else {}
+        data = self._request('getSheetDelta', sheetName=sheet_name, **params, **self._sheet_params())
+
+        if data.get('error') == 'Ação inválida':
+            # Apps Script implantado sem getSheetDelta
+            self.delta_sync = False
+            return self._fetch_sheet(sheet_name)
+
+        table = self._apply_sheet_delta(sheet_name, data, base)
+        if table is None:
+            data = self._request('getSheetDelta', sheetName=sheet_name, **self._sheet_params())
+            table = self._apply_sheet_delta(sheet_name, data, None)
+        # Já normalizada: devolve o mesmo objeto registrado na revisão
+        return table if self._is_table(table) else self._checked_table(table)
+
+    def _etag_base(self, sheet_name: str) -> Optional[Tuple[str, Dict]]:
+        """
+        Hash do Apps Script da tabela da aba em cache, para a leitura condicional
+
+        Returns:
+            Tupla (hash, tabela) ou None se não há versão conhecida em cache
+        """
+        entry = self._sheet_etags.get(sheet_name)
+        if entry is None:
+            return None
+
+        cached = self._memory.peek(f"sheet_{sheet_name}")
+        if cached is None or cached[0] is not entry[1]:
+            return None
+        return entry
+
+    def _apply_conditional(self, sheet_name: str, data, base: Optional[Tuple[str, Dict]]):
+        """
+        Aplica a resposta de getSheet com ifNoneMatch
+
+        Returns:
+            A mesma tabela em cache se não houve mudança (o TTL é só
+            renovado), a nova tabela, ou a resposta como veio (lista de um
+            Apps Script sem leitura condicional, ou dicionário de erro)
+        """
+        if not isinstance(data, dict):
             return data
-        except Exception as e:
-            error_msg = f"Erro ao carregar dados da aba {sheet_name}: {str(e)}"
-            if HAS_STREAMLIT:
-                st.error(error_msg)
+
+        if data.get('notModified') and base is not None:
+            return base[1]
+
+        if 'rows' in data:
+            table = self._table_from(data)
+            self._sheet_etags[sheet_name] = (data.get('etag'), table)
+            return table
+
+        return data
+
+    def _delta_base(self, sheet_name: str) -> Optional[Tuple[int, Dict]]:
+        """
+        Revisão e tabela em cache sobre as quais um delta pode ser aplicado
+
+        Returns:
+            Tupla (revisão, tabela) ou None se é preciso carregar a aba inteira
+        """
+        entry = self._revisions.get(sheet_name)
+        if entry is None:
+            return None
+
+        revision, table, full_at = entry
+        cached = self._memory.peek(f"sheet_{sheet_name}")
+        # A revisão só vale para a mesma tabela que está no cache
+        if cached is None or cached[0] is not table or time.time() - full_at > self.delta_resync:
+            return None
+        return revision, table
+
+    def _apply_sheet_delta(self, sheet_name: str, data: Dict, base: Optional[Tuple[int, Dict]]):
+        """
+        Aplica a resposta de getSheetDelta e registra a nova revisão
+
+        Returns:
+            Tabela atualizada da aba (ou o dicionário de erro, como em getSheet),
+            ou None se o delta não fecha com a tabela local
+        """
+        if 'error' in data:
+            return data
+
+        if data.get('full') or base is None:
+            table = self._table_from(data) if 'rows' in data else {'headers': [], 'rows': []}
+            full_at = time.time()
+        else:
+            table = self._merge_delta(base[1], data)
+            if table is None:
+                return None
+            full_at = self._revisions[sheet_name][2]
+
+        self._revisions[sheet_name] = (data.get('revision', 0), table, full_at)
+        return table
+
+    @classmethod
+    def _merge_delta(cls, table: Dict, delta: Dict) -> Optional[Dict]:
+        """
+        Mescla as linhas alteradas de um delta sobre a tabela em cache
+
+        Args:
+            table: Tabela atual da aba
+            delta: Resposta de getSheetDelta com 'total' e 'changes' (e
+                'headers' no formato compacto, com as linhas em listas)
+
+        Returns:
+            Nova tabela (a mesma, se nada mudou) ou None se faltam linhas para
+            chegar ao total informado ou o cabeçalho mudou
+        """
+        rows = table['rows']
+        total = delta.get('total', len(rows))
+        changes = sorted(delta.get('changes', []), key=lambda change: change['row'])
+
+        if not changes and total == len(rows):
+            # Nada mudou: mantém o mesmo objeto, preservando índices derivados
+            return table
+
+        headers = table['headers']
+        values = [change['values'] for change in changes]
+        if 'headers' in delta:
+            changed = cls._compact_to_table(delta['headers'], values)
+            if changed['headers'] != headers:
+                return None
+            values = changed['rows']
+        else:
+            if any(set(value) - set(headers) for value in values):
+                return None
+            values = [[value.get(key, '') for key in headers] for value in values]
+
+        merged = list(rows[:total])
+        for change, row in zip(changes, values):
+            index = change['row']
+            if index < len(merged):
+                merged[index] = row
+            elif index == len(merged):
+                merged.append(row)
             else:
-                print(error_msg)
-            return []
+                return None
+
+        return {'headers': headers, 'rows': merged} if len(merged) == total else None
+
+    # Operadores de filtro aceitos por get_sheet_page
+    _filter_ops = {
+        '=': lambda c: c == 0,
+        '!=': lambda c: c != 0,
+        '>': lambda c: c > 0,
+        '>=': lambda c: c >= 0,
+        '<': lambda c: c < 0,
+        '<=': lambda c: c <= 0,
+    }
+
+    def get_sheet_page(
+        self,
+        sheet_name: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[Tuple[str, str, Any]]] = None
+    ) -> Dict:
+        """
+        Lê um trecho de uma aba sem baixar a aba inteira (não usa o cache)
+
+        Args:
+            sheet_name: Nome da aba
+            offset: Primeira linha (base 0, sem o cabeçalho) entre as que atendem aos filtros
+            limit: Máximo de linhas (None: até o fim)
+            columns: Colunas devolvidas (None: todas)
+            filters: Condições (coluna, operador, valor) combinadas com E;
+                operadores =, !=, >, >=, <, <=. Datas são comparadas como
+                AAAA-MM-DD (o valor pode vir como DD/MM/AAAA) e textos sem
+                diferenciar maiúsculas
+
+        Returns:
+            Dicionário {rows, total, next_offset}: linhas da página, total de
+            linhas que atendem aos filtros e offset da próxima página (None na última)
+
+        Raises:
+            ValueError se a aba não existe ou o filtro é inválido
+        """
+        data = self._request('getSheet', **self._page_params(sheet_name, offset, limit, columns, filters))
+        return self._page_from(data, offset, limit, columns, filters)
+
+    def iter_sheet_rows(
+        self,
+        sheet_name: str,
+        page_size: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[Tuple[str, str, Any]]] = None
+    ) -> Iterator[Dict]:
+        """
+        Percorre as linhas de uma aba página a página, buscando a próxima
+        página só quando a anterior foi consumida
+
+        Linhas inseridas ou removidas durante a leitura podem deslocar as
+        páginas seguintes (leitura sem snapshot).
+
+        Args:
+            sheet_name: Nome da aba
+            page_size: Linhas por requisição (padrão: cache.page_size)
+            columns: Colunas devolvidas (None: todas)
+            filters: Condições como em get_sheet_page
+
+        Yields:
+            Cada linha como dicionário
+        """
+        page_size = max(1, page_size or self.page_size)
+        offset = 0
+        while offset is not None:
+            page = self.get_sheet_page(sheet_name, offset, page_size, columns, filters)
+            yield from page['rows']
+            offset = page['next_offset']
+
+    def _page_params(self, sheet_name: str, offset: int, limit: Optional[int],
+                     columns: Optional[Sequence[str]], filters: Optional[Sequence[Tuple[str, str, Any]]]) -> Dict:
+        """Parâmetros de getSheet para a leitura paginada"""
+        params = {'sheetName': sheet_name, 'offset': offset, **self._sheet_params()}
+        if limit is not None:
+            params['limit'] = limit
+        if columns is not None:
+            params['columns'] = json.dumps(list(columns), ensure_ascii=False)
+        if filters:
+            params['filter'] = json.dumps([list(condition) for condition in filters], ensure_ascii=False)
+        return params
+
+    def _page_from(self, data, offset: int, limit: Optional[int],
+                   columns: Optional[Sequence[str]], filters: Optional[Sequence[Tuple[str, str, Any]]]) -> Dict:
+        """
+        Converte a resposta de getSheet paginado em {rows, total, next_offset}
+
+        Um Apps Script sem leitura paginada devolve a aba inteira: a página é
+        então recortada aqui, com os mesmos filtros.
+        """
+        if isinstance(data, dict) and 'error' in data:
+            raise ValueError(data['error'])
+
+        if isinstance(data, dict) and 'total' in data:
+            return {'rows': self._rows_from(data), 'total': data['total'], 'next_offset': data.get('nextOffset')}
+
+        rows = self._rows_from(data)
+        if filters:
+            conditions = []
+            for column, op, value in filters:
+                if op not in self._filter_ops:
+                    raise ValueError('Filtro inválido')
+                conditions.append((column, self._filter_ops[op], self._filter_key(value)))
+            rows = [
+                row for row in rows
+                if all(test(self._compare_filter(row.get(column, ''), key)) for column, test, key in conditions)
+            ]
+
+        total = len(rows)
+        rows = rows[offset:None if limit is None else offset + limit]
+        if columns is not None:
+            rows = [{column: row[column] for column in columns if column in row} for row in rows]
+
+        end = offset + len(rows)
+        return {'rows': rows, 'total': total, 'next_offset': end if end < total else None}
+
+    @staticmethod
+    def _filter_key(value):
+        """Valor normalizado para os filtros (mesmas regras do filterKey do Apps Script)"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+
+        if isinstance(value, bool):
+            text = 'true' if value else 'false'
+        else:
+            text = '' if value is None else str(value).strip()
+        br = re.match(r'^(\d{2})/(\d{2})/(\d{4})$', text)
+        if br:
+            return f"{br.group(3)}-{br.group(2)}-{br.group(1)}"
+        if re.match(r'^\d{4}-\d{2}-\d{2}T', text):
+            # Datas do JSON chegam como meia-noite de Brasília em UTC (T03:00)
+            return text[:10]
+        return text.upper()
+
+    @classmethod
+    def _compare_filter(cls, value, key) -> float:
+        """Compara o valor de uma célula com o valor já normalizado do filtro"""
+        value = cls._filter_key(value)
+        if isinstance(value, (int, float)) and isinstance(key, (int, float)):
+            return value - key
+        a, b = str(value), str(key)
+        return -1 if a < b else (1 if a > b else 0)
 
     def get_maquinas(self) -> List[str]:
         """
@@ -116,26 +1022,13 @@ class GoogleSheetsManager:
         Returns:
             Lista de nomes de máquinas
         """
-        cache_key = "maquinas"
-
-        # Verifica cache
-        if self._is_cache_valid(cache_key):
-            return self._get_from_cache(cache_key)
-
         try:
-            response = requests.get(f"{self.base_url}?action=getMaquinas", timeout=10)
-            response.raise_for_status()
-            maquinas = response.json()
-            # Filtra valores vazios
-            maquinas_filtradas = [m for m in maquinas if m and str(m).strip()]
-            self._set_cache(cache_key, maquinas_filtradas)
-            return maquinas_filtradas
+            return self._cached(
+                "maquinas",
+                lambda: self._filtrar_vazios(self._request('getMaquinas'))
+            )
         except Exception as e:
-            error_msg = f"Erro ao carregar máquinas: {str(e)}"
-            if HAS_STREAMLIT:
-                st.error(error_msg)
-            else:
-                print(error_msg)
+            self._report_error(f"Erro ao carregar máquinas: {str(e)}")
             return []
 
     def get_clientes(self) -> List[str]:
@@ -145,25 +1038,13 @@ class GoogleSheetsManager:
         Returns:
             Lista de nomes de clientes
         """
-        cache_key = "clientes"
-
-        # Verifica cache
-        if self._is_cache_valid(cache_key):
-            return self._get_from_cache(cache_key)
-
         try:
-            response = requests.get(f"{self.base_url}?action=getClientes", timeout=10)
-            response.raise_for_status()
-            clientes = response.json()
-            clientes_filtrados = [c for c in clientes if c and str(c).strip()]
-            self._set_cache(cache_key, clientes_filtrados)
-            return clientes_filtrados
+            return self._cached(
+                "clientes",
+                lambda: self._filtrar_vazios(self._request('getClientes'))
+            )
         except Exception as e:
-            error_msg = f"Erro ao carregar clientes: {str(e)}"
-            if HAS_STREAMLIT:
-                st.error(error_msg)
-            else:
-                print(error_msg)
+            self._report_error(f"Erro ao carregar clientes: {str(e)}")
             return []
 
     def get_ordens(self) -> List[str]:
@@ -173,25 +1054,13 @@ class GoogleSheetsManager:
         Returns:
             Lista de ordens de compra
         """
-        cache_key = "ordens"
-
-        # Verifica cache
-        if self._is_cache_valid(cache_key):
-            return self._get_from_cache(cache_key)
-
         try:
-            response = requests.get(f"{self.base_url}?action=getOrdens", timeout=10)
-            response.raise_for_status()
-            ordens = response.json()
-            ordens_filtradas = [o for o in ordens if o and str(o).strip()]
-            self._set_cache(cache_key, ordens_filtradas)
-            return ordens_filtradas
+            return self._cached(
+                "ordens",
+                lambda: self._filtrar_vazios(self._request('getOrdens'))
+            )
         except Exception as e:
-            error_msg = f"Erro ao carregar ordens: {str(e)}"
-            if HAS_STREAMLIT:
-                st.error(error_msg)
-            else:
-                print(error_msg)
+            self._report_error(f"Erro ao carregar ordens: {str(e)}")
             return []
 
     def get_datas_entrega(self) -> List[str]:
@@ -201,25 +1070,13 @@ class GoogleSheetsManager:
         Returns:
             Lista de datas de entrega
         """
-        cache_key = "datas"
-
-        # Verifica cache
-        if self._is_cache_valid(cache_key):
-            return self._get_from_cache(cache_key)
-
         try:
-            response = requests.get(f"{self.base_url}?action=getDatas", timeout=10)
-            response.raise_for_status()
-            datas = response.json()
-            datas_filtradas = [d for d in datas if d and str(d).strip()]
-            self._set_cache(cache_key, datas_filtradas)
-            return datas_filtradas
+            return self._cached(
+                "datas",
+                lambda: self._filtrar_vazios(self._request('getDatas'))
+            )
         except Exception as e:
-            error_msg = f"Erro ao carregar datas: {str(e)}"
-            if HAS_STREAMLIT:
-                st.error(error_msg)
-            else:
-                print(error_msg)
+            self._report_error(f"Erro ao carregar datas: {str(e)}")
             return []
 
     def get_pedidos_cadastrados(self) -> List[Dict]:
@@ -229,29 +1086,16 @@ class GoogleSheetsManager:
         Returns:
             Lista de dicionários com dados dos pedidos
         """
-        cache_key = "pedidos_cadastrados"
-
-        # Verifica cache
-        if self._is_cache_valid(cache_key):
-            return self._get_from_cache(cache_key)
-
         try:
-            data = self.get_sheet_data('DADOS_GERAIS')
-
-            # Filtra pedidos válidos (que tenham pelo menos cliente e máquina)
-            pedidos = [
-                p for p in data
-                if p.get('CLIENTE') and p.get('MAQUINAS')
-            ]
-
-            self._set_cache(cache_key, pedidos)
+            # get_sheet_rows lança a exceção: sem a aba, vale o último valor conhecido dos pedidos
+            pedidos = self._cached(
+                "pedidos_cadastrados",
+                lambda: self._filtrar_pedidos(self.get_sheet_rows('DADOS_GERAIS'))
+            )
+            self._inherit_staleness("pedidos_cadastrados", "sheet_DADOS_GERAIS")
             return pedidos
         except Exception as e:
-            error_msg = f"Erro ao carregar pedidos cadastrados: {str(e)}"
-            if HAS_STREAMLIT:
-                st.error(error_msg)
-            else:
-                print(error_msg)
+            self._report_error(f"Erro ao carregar pedidos cadastrados: {str(e)}")
             return []
 
     def get_machine_availability(self, maquina: str) -> float:
@@ -264,41 +1108,108 @@ class GoogleSheetsManager:
         Returns:
             Horas disponíveis por dia (float), padrão 8.0 se não encontrado
         """
-        cache_key = f"availability_{maquina}"
+        try:
+            return self._availability_cached(maquina)
+        except Exception as e:
+            self._report_error(
+                f"Erro ao carregar disponibilidade da máquina {maquina}: {str(e)}",
+                warning=True
+            )
+            # Retorna valor padrão de 8 horas
+            return 8.0
 
-        # Verifica cache
-        if self._is_cache_valid(cache_key):
-            return self._get_from_cache(cache_key)
+    def get_cells(self, ranges: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Lê vários intervalos, de abas diferentes, em uma única chamada
 
-        # Normaliza o nome da aba
-        sheet_name = f"DADOS_{maquina.replace(' ', '_').upper()}"
+        Args:
+            ranges: Lista de pares (aba, intervalo), ex: [('DADOS_M1', 'K1')]
 
+        Returns:
+            Lista, na mesma ordem, de {'sheet', 'range', 'value'} e 'error'
+            quando aquele intervalo não pôde ser lido
+        """
         try:
-            response = requests.get(
-                f"{self.base_url}?action=getCell&sheetName={sheet_name}&cell=K1",
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
+            return self._fetch_cells(ranges)
+        except Exception as e:
+            self._report_error(f"Erro ao carregar células: {str(e)}")
+            return []
 
-            # Tenta converter para float
-            availability = float(data.get('value', 8.0))
+    def _fetch_cells(self, ranges: List[Tuple[str, str]]) -> List[Dict]:
+        """Executa getCells; lança exceção se a chamada inteira falhar"""
+        if not ranges:
+            return []
 
-            # Valida se está em um range razoável (0-24 horas)
-            if availability <= 0 or availability > 24:
-                availability = 8.0
+        data = self._request('getCells', ranges=self._encode_ranges(ranges))
+        return self._decode_cells(data, ranges)
 
-            self._set_cache(cache_key, availability)
-            return availability
+    @staticmethod
+    def _encode_ranges(ranges: List[Tuple[str, str]]) -> str:
+        """Serializa os pares (aba, intervalo) para o parâmetro da ação getCells"""
+        return json.dumps([[sheet, cell] for sheet, cell in ranges], ensure_ascii=False)
 
-        except Exception as e:
-            error_msg = f"Erro ao carregar disponibilidade da máquina {maquina}: {str(e)}"
-            if HAS_STREAMLIT:
-                st.warning(error_msg)
-            else:
-                print(error_msg)
-            # Retorna valor padrão de 8 horas
-            return 8.0
+    @staticmethod
+    def _decode_cells(data: Dict, ranges: List[Tuple[str, str]]) -> List[Dict]:
+        """Valida a resposta de getCells"""
+        if 'error' in data:
+            raise ValueError(data['error'])
+
+        values = data.get('values', [])
+        if len(values) != len(ranges):
+            raise ValueError("Resposta de getCells com tamanho diferente do pedido")
+        return values
+
+    def _apply_cells_availability(self, maquinas: List[str], cells: List[Dict]) -> Tuple[Dict[str, float], Dict[str, str]]:
+        """Converte as células K1 lidas em lote e preenche o cache por máquina"""
+        availability = {}
+        errors = {}
+
+        for maquina, cell in zip(maquinas, cells):
+            try:
+                if cell.get('error'):
+                    raise ValueError(cell['error'])
+                horas = self._parse_availability(cell.get('value'))
+                self._set_cache(f"availability_{maquina}", horas)
+                availability[maquina] = horas
+            except (TypeError, ValueError) as e:
+                print(f"Erro ao carregar disponibilidade da máquina {maquina}: {str(e)}")
+                errors[maquina] = str(e)
+                # Mantém o padrão de 8 horas para a máquina com erro
+                availability[maquina] = 8.0
+
+        return availability, errors
+
+    def _collect_availability(self, maquinas: List[str]) -> Tuple[Dict[str, float], Dict[str, str]]:
+        """
+        Obtém a disponibilidade das máquinas
+
+        Usa uma única chamada getCells para todas as K1 ainda fora do cache e,
+        se a ação não estiver disponível, volta para a busca concorrente.
+        """
+        pendentes = [m for m in maquinas if not self._is_cache_valid(f"availability_{m}")]
+        availability = {m: self._get_from_cache(f"availability_{m}") for m in maquinas if m not in pendentes}
+        errors = {}
+
+        if pendentes:
+            try:
+                cells = self._fetch_cells([(self.sheet_name(m), 'K1') for m in pendentes])
+                lote, errors = self._apply_cells_availability(pendentes, cells)
+            except Exception as e:
+                print(f"getCells indisponível, buscando máquina a máquina: {str(e)}")
+                lote, errors = self._fan_out_availability(pendentes)
+            availability.update(lote)
+
+        return {m: availability[m] for m in maquinas}, errors
+
+    def _availability_cached(self, maquina: str) -> float:
+        """Disponibilidade da máquina pelo cache; lança exceção em caso de erro"""
+        sheet_name = self.sheet_name(maquina)
+
+        def fetch() -> float:
+            data = self._request('getCell', sheetName=sheet_name, cell='K1')
+            return self._parse_availability(data.get('value', 8.0))
+
+        return self._cached(f"availability_{maquina}", fetch)
 
     def get_all_machines_availability(self) -> Dict[str, float]:
         """
@@ -307,20 +1218,190 @@ class GoogleSheetsManager:
         Returns:
             Dicionário com {nome_maquina: horas_disponiveis}
         """
-        cache_key = "all_availability"
+        return self.get_all_machines_availability_report()['availability']
 
-        # Verifica cache
-        if self._is_cache_valid(cache_key):
-            return self._get_from_cache(cache_key)
+    def get_all_machines_availability_report(self) -> Dict:
+        """
+        Obtém a disponibilidade de todas as máquinas
 
-        maquinas = self.get_maquinas()
-        availability_dict = {}
+        As células K1 são lidas em uma única chamada getCells; sem ela, são
+        buscadas concorrentemente (limitado ao tamanho do pool HTTP). Máquinas
+        com erro recebem o padrão de 8 horas e aparecem em 'errors'; nesse caso
+        o resultado consolidado não vai para o cache.
+
+        Returns:
+            Dicionário {'availability': {maquina: horas}, 'errors': {maquina: mensagem}}
+        """
+        self._fetchers["all_availability"] = self._fetch_all_availability
+
+        hit, value, refresh = self._lookup("all_availability")
+        if hit:
+            if refresh:
+                self._refresh_or_mark_stale(
+                    "all_availability",
+                    lambda: self._refresh_in_background("all_availability", self._fetch_all_availability)
+                )
+            return {'availability': value, 'errors': {}}
+
+        def collect():
+            availability, errors = self._collect_availability(self.get_maquinas())
+            if not errors:
+                self._set_cache("all_availability", availability)
+            self._fill_last_known_availability(availability, errors)
+            return availability, errors
+
+        availability, errors = self._single_flight.do(self._flight_key("all_availability_report"), collect)
+        return {'availability': availability, 'errors': errors}
+
+    def _fetch_all_availability(self) -> Dict[str, float]:
+        """Busca todas as disponibilidades; lança exceção se alguma falhar"""
+        availability, errors = self._collect_availability(self.get_maquinas())
+        if errors:
+            raise RuntimeError(f"Falha na disponibilidade de {len(errors)} máquina(s)")
+        return availability
+
+    def _fan_out_availability(self, maquinas: List[str]) -> Tuple[Dict[str, float], Dict[str, str]]:
+        """Busca a disponibilidade de cada máquina concorrentemente"""
+        availability = {}
+        errors = {}
+
+        if not maquinas:
+            return availability, errors
+
+        workers = max(1, min(self.http.pool_size, len(maquinas)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sheets-availability') as pool:
+            futures = {maquina: pool.submit(self._availability_cached, maquina) for maquina in maquinas}
+
+        for maquina, future in futures.items():
+            try:
+                availability[maquina] = future.result()
+            except Exception as e:
+                print(f"Erro ao carregar disponibilidade da máquina {maquina}: {str(e)}")
+                errors[maquina] = str(e)
+                # Mantém o padrão de 8 horas para a máquina com erro
+                availability[maquina] = 8.0
+
+        return availability, errors
+
+    def load_snapshot(self, force: bool = False) -> bool:
+        """
+        Garante em memória todas as abas DADOS_*, a disponibilidade (K1) de
+        cada máquina e a aba DADOS_GERAIS, preenchendo os caches por chave
+
+        Com o cache aquecido não faz nenhuma requisição: valores vencidos
+        continuam sendo servidos e atualizados em segundo plano. Com poucas
+        chaves frias (ver cold_keys), busca só elas, com delta/leitura
+        condicional nas abas. O getSnapshot, que traz tudo em uma única
+        requisição, fica para o cache frio, muitas chaves frias ou force.
+
+        Args:
+            force: Baixa o snapshot completo mesmo com o cache aquecido
+
+        Returns:
+            True se os dados foram carregados, False caso contrário
+        """
+        cold = self._snapshot_cold_keys(force)
+        if cold is not None:
+            return not cold or self._warm_keys(cold)
+
+        def fetch_snapshot():
+            self._apply_snapshot(self._request('getSnapshot', timeout=30, **self._sheet_params()))
+            return True
+
+        try:
+            # Chamadas concorrentes aguardam o mesmo getSnapshot
+            return self._single_flight.do(self._flight_key("snapshot"), fetch_snapshot)
+
+        except Exception as e:
+            self._report_error(f"Erro ao carregar snapshot: {str(e)}")
+            return False
+
+    def _apply_snapshot(self, snapshot: Dict):
+        """Preenche os caches por chave a partir da resposta de getSnapshot"""
+        if 'error' in snapshot:
+            raise ValueError(snapshot['error'])
+
+        sheets = {sheet_name: self._checked_table(data) for sheet_name, data in snapshot.get('sheets', {}).items()}
+        revisions = snapshot.get('revisions', {})
+        for sheet_name, table in sheets.items():
+            self._set_cache(f"sheet_{sheet_name}", table)
+            if sheet_name in revisions:
+                self._revisions[sheet_name] = (revisions[sheet_name], table, time.time())
+
+        if 'DADOS_GERAIS' in sheets:
+            self._set_cache("pedidos_cadastrados", self._filtrar_pedidos(self._table_records(sheets['DADOS_GERAIS'])))
 
+        self._set_cache("clientes", self._filtrar_vazios(snapshot.get('clientes', [])))
+        self._set_cache("ordens", self._filtrar_vazios(snapshot.get('ordens', [])))
+        self._set_cache("datas", self._filtrar_vazios(snapshot.get('datas', [])))
+
+        maquinas = self._filtrar_vazios(snapshot.get('maquinas', []))
+        self._set_cache("maquinas", maquinas)
+
+        availability = snapshot.get('availability', {})
+        availability_dict = {}
         for maquina in maquinas:
-            availability_dict[maquina] = self.get_machine_availability(maquina)
+            try:
+                horas = self._parse_availability(availability.get(self.sheet_name(maquina)))
+            except (TypeError, ValueError):
+                # Aba inexistente ou K1 vazio: mesmo padrão de get_machine_availability
+                horas = 8.0
+            self._set_cache(f"availability_{maquina}", horas)
+            availability_dict[maquina] = horas
+
+        self._set_cache("all_availability", availability_dict)
 
-        self._set_cache(cache_key, availability_dict)
-        return availability_dict
+    def _snapshot_cold_keys(self, force: bool) -> Optional[List[str]]:
+        """
+        Decide como load_snapshot aquece o cache
+
+        Returns:
+            Chaves frias a buscar individualmente (vazia se nada falta), ou
+            None se é preciso o getSnapshot completo
+        """
+        if force:
+            return None
+        cold = self.cold_keys()
+        if "maquinas" in cold or len(cold) > self.snapshot_max_cold:
+            return None
+        return cold
+
+    def _warm_keys(self, keys: List[str]) -> bool:
+        """
+        Busca individualmente as chaves frias informadas por cold_keys
+
+        Returns:
+            True se nenhuma chave continua fria
+        """
+        if any(key == "all_availability" or key.startswith("availability_") for key in keys):
+            self.get_all_machines_availability_report()
+        if "pedidos_cadastrados" in keys:
+            self.get_pedidos_cadastrados()
+        for key in keys:
+            if key.startswith("sheet_"):
+                self._sheet_table_or_empty(key[len("sheet_"):])
+        return not self.cold_keys()
+
+    def cold_keys(self) -> List[str]:
+        """
+        Chaves usadas na primeira abertura do frontend e pelo planejamento que
+        ainda não estão em memória: máquinas, catálogo (aba DADOS_*) e
+        disponibilidade de cada máquina, disponibilidade consolidada e
+        pedidos cadastrados
+
+        Valores vencidos contam como aquecidos (são servidos enquanto atualizam).
+
+        Returns:
+            Lista das chaves faltantes (vazia quando o cache está aquecido)
+        """
+        entry = self._memory.peek("maquinas")
+        if entry is None:
+            return ["maquinas"]
+
+        keys = ["all_availability", "pedidos_cadastrados"]
+        keys += [f"sheet_{self.sheet_name(maquina)}" for maquina in entry[0]]
+        keys += [f"availability_{maquina}" for maquina in entry[0]]
+        return [key for key in keys if self._memory.peek(key) is None]
 
     def get_produtos_por_maquina(self, maquina: str) -> pd.DataFrame:
         """
@@ -332,39 +1413,175 @@ class GoogleSheetsManager:
         Returns:
             DataFrame com produtos da máquina
         """
-        # Normaliza o nome da aba
-        sheet_name = f"DADOS_{maquina.replace(' ', '_').upper()}"
+        sheet_name = self.sheet_name(maquina)
+
+        try:
+            return self._produtos_dataframe_cached(sheet_name, self._sheet_table_or_empty(sheet_name))
+
+        except Exception as e:
+            self._report_error(f"Erro ao carregar produtos da máquina {maquina}: {str(e)}")
+            return pd.DataFrame()
+
+    def _produtos_dataframe_cached(self, sheet_name: str, table: Dict) -> pd.DataFrame:
+        """
+        DataFrame de produtos, reconstruído apenas quando a tabela da aba muda
 
+        Returns:
+            Cópia do DataFrame memorizado (quem chama pode alterá-la)
+        """
+        entry = self._dataframes.get(sheet_name)
+        if entry is None or entry[0] is not table:
+            entry = (table, self.produtos_dataframe(table))
+            self._dataframes[sheet_name] = entry
+        return entry[1].copy()
+
+    def _sheet_table_or_empty(self, sheet_name: str) -> Dict:
+        """
+        Tabela da aba, ou tabela vazia (com o erro reportado) se não foi
+        possível carregá-la; nesse caso a chave fica registrada como
+        indisponível e as respostas saem marcadas (ver get_staleness)
+        """
         try:
-            data = self.get_sheet_data(sheet_name)
+            return self._sheet_table(sheet_name)
+        except Exception as e:
+            self._report_error(f"Erro ao carregar dados da aba {sheet_name}: {str(e)}")
+            return {'headers': [], 'rows': []}
 
-            if not data:
-                # Retorna DataFrame vazio com colunas esperadas
-                return pd.DataFrame(columns=[
-                    'REFERÊNCIAS/MÁQUINA', 'TEMPO DE PRODUÇÃO', 'TEMPO DE MONTAGEM',
-                    'VOLTAS NA ESPULA', 'PRODUÇÃO POR MINUTO', 'COR', 'REFERENCIA',
-                    'LARGURA', 'MONTAGEM 2X2', 'TEMPO MONTAGEM 2X2'
-                ])
+    def get_etag(self, key: str) -> Optional[str]:
+        """
+        ETag do valor em cache de uma chave, para respostas condicionais da API
 
-            df = pd.DataFrame(data)
+        O hash é calculado uma vez por versão do valor (mesmo objeto em cache).
 
-            # Garante que colunas numéricas sejam do tipo correto
-            numeric_cols = ['TEMPO DE PRODUÇÃO', 'TEMPO DE MONTAGEM', 'VOLTAS NA ESPULA',
-                          'PRODUÇÃO POR MINUTO', 'LARGURA', 'TEMPO MONTAGEM 2X2']
+        Args:
+            key: Chave do cache (ex: 'sheet_DADOS_M1', 'pedidos_cadastrados')
 
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        Returns:
+            ETag entre aspas ou None se a chave não está em memória
+        """
+        entry = self._memory.peek(key)
+        if entry is None:
+            self._etags.pop(key, None)
+            return None
+
+        value = entry[0]
+        memo = self._etags.get(key)
+        if memo is not None and memo[0] is value:
+            return memo[1]
+
+        payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+        etag = f'"{hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]}"'
+        self._etags[key] = (value, etag)
+        return etag
+
+    def get_catalog(self) -> CatalogIndex:
+        """
+        Obtém o índice do catálogo de todas as máquinas
 
-            return df
+        O índice é construído uma vez por versão dos dados: enquanto as abas
+        DADOS_* vierem do cache (mesmos objetos), é reaproveitado.
 
-        except Exception as e:
-            error_msg = f"Erro ao carregar produtos da máquina {maquina}: {str(e)}"
-            if HAS_STREAMLIT:
-                st.error(error_msg)
-            else:
-                print(error_msg)
-            return pd.DataFrame()
+        Returns:
+            CatalogIndex com (máquina, referência) → produto e
+            referência → máquinas compatíveis
+        """
+        sources = {
+            maquina: self._sheet_table_or_empty(self.sheet_name(maquina))
+            for maquina in self.get_maquinas()
+        }
+
+        catalog = self._catalog
+        if catalog is None or not catalog.is_built_from(sources):
+            catalog = CatalogIndex(
+                {maquina: self.produtos_dataframe(table) for maquina, table in sources.items()},
+                sources
+            )
+            self._catalog = catalog
+
+        return catalog
+
+    def _post(self, payload: Dict) -> Dict:
+        """
+        Executa uma ação POST do Apps Script
+
+        Args:
+            payload: Corpo JSON com a chave 'action'
+
+        Returns:
+            JSON decodificado da resposta
+        """
+        return self.http.post(payload)
+
+    def _handle_write_result(self, result: Dict, keys: List[str]) -> bool:
+        """
+        Trata a resposta de uma escrita, invalidando em caso de sucesso
+        apenas as chaves afetadas por ela
+
+        Args:
+            result: JSON de resposta do Apps Script
+            keys: Chaves do cache alteradas pela escrita
+        """
+        if result.get('success'):
+            self.invalidate(*keys)
+            return True
+
+        self._report_error(f"Erro: {result.get('error', 'Erro desconhecido')}")
+        return False
+
+    def _keys_for_produto(self, produto_data: Dict) -> List[str]:
+        """Chaves do cache afetadas por um novo produto (somente a aba da máquina)"""
+        return [f"sheet_{self.sheet_name(produto_data.get('maquina', ''))}"]
+
+    def _keys_for_pedido(self, pedido_data: Dict) -> List[str]:
+        """
+        Chaves do cache afetadas por um novo pedido: DADOS_GERAIS e suas
+        listas derivadas e, se a máquina ainda não está na lista, as máquinas
+        """
+        keys = ['sheet_DADOS_GERAIS']
+        maquina = pedido_data.get('maquina')
+        if maquina and maquina not in (self._get_from_cache('maquinas') or []):
+            keys.append('maquinas')
+        return keys
+
+    def invalidate(self, *keys: str):
+        """
+        Remove chaves do cache (memória e disco) e as chaves derivadas delas
+
+        Uma aba invalida também 'all_data'; uma lista de máquinas, a
+        disponibilidade consolidada. As demais entradas continuam válidas (o
+        próximo load_snapshot busca só a chave removida).
+
+        Args:
+            *keys: Chaves do cache (ex: 'sheet_DADOS_M1')
+        """
+        pendentes = list(keys)
+        removidas = set()
+
+        while pendentes:
+            key = pendentes.pop()
+            if key in removidas:
+                continue
+            removidas.add(key)
+
+            pendentes.extend(self._dependencies.get(key, []))
+            if key.startswith('sheet_'):
+                pendentes.append('all_data')
+            if key.startswith('availability_'):
+                pendentes.append('all_availability')
+
+        self._cache_generation += 1
+        for key in removidas:
+            self._memory.pop(key)
+            self._etags.pop(key, None)
+            self._stale.pop(key, None)
+            self._unavailable.pop(key, None)
+            if key.startswith('sheet_'):
+                self._dataframes.pop(key[len('sheet_'):], None)
+            if self._disk_cache is not None:
+                try:
+                    self._disk_cache.delete(key)
+                except Exception as e:
+                    print(f"Erro ao remover cache em disco ({key}): {str(e)}")
 
     def add_produto(self, produto_data: Dict) -> bool:
         """
@@ -377,37 +1594,15 @@ class GoogleSheetsManager:
             True se sucesso, False caso contrário
         """
         try:
-            payload = {
+            result = self._post({
                 'action': 'addProduto',
                 **produto_data
-            }
+            })
 
-            response = requests.post(
-                self.base_url,
-                json=payload,
-                timeout=10
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            if result.get('success'):
-                # Limpa cache para forçar atualização
-                self.limpar_cache()
-                return True
-            else:
-                error_msg = f"Erro: {result.get('error', 'Erro desconhecido')}"
-                if HAS_STREAMLIT:
-                    st.error(error_msg)
-                else:
-                    print(error_msg)
-                return False
+            return self._handle_write_result(result, self._keys_for_produto(produto_data))
 
         except Exception as e:
-            error_msg = f"Erro ao adicionar produto: {str(e)}"
-            if HAS_STREAMLIT:
-                st.error(error_msg)
-            else:
-                print(error_msg)
+            self._report_error(f"Erro ao adicionar produto: {str(e)}")
             return False
 
     def add_pedido(self, pedido_data: Dict) -> bool:
@@ -421,42 +1616,158 @@ class GoogleSheetsManager:
             True se sucesso, False caso contrário
         """
         try:
-            payload = {
+            result = self._post({
                 'action': 'addPedido',
                 **pedido_data
-            }
+            })
 
-            response = requests.post(
-                self.base_url,
-                json=payload,
-                timeout=10
-            )
-            response.raise_for_status()
-            result = response.json()
+            return self._handle_write_result(result, self._keys_for_pedido(pedido_data))
 
-            if result.get('success'):
-                # Limpa cache para forçar atualização
-                self.limpar_cache()
-                return True
+        except Exception as e:
+            self._report_error(f"Erro ao adicionar pedido: {str(e)}")
+            return False
+
+    def add_pedidos(self, pedidos: List[Dict]) -> List[Dict]:
+        """
+        Adiciona vários pedidos com uma única chamada (addPedidos)
+
+        Args:
+            pedidos: Lista de dicionários com dados dos pedidos
+
+        Returns:
+            Resultado de cada pedido, na mesma ordem: {'success': True, 'row'}
+            ou {'success': False, 'error'}
+        """
+        return self._write_many('pedido', pedidos)
+
+    def add_produtos(self, produtos: List[Dict]) -> List[Dict]:
+        """
+        Adiciona vários produtos com uma chamada (addProdutos), um setValues
+        por aba de máquina
+
+        Args:
+            produtos: Lista de dicionários com dados dos produtos
+
+        Returns:
+            Resultado de cada produto, na mesma ordem (ver add_pedidos)
+        """
+        return self._write_many('produto', produtos)
+
+    def enqueue_pedido(self, pedido_data: Dict) -> Future:
+        """
+        Enfileira um pedido para gravação em lote (ver WriteBehindQueue)
+
+        Returns:
+            Future com o resultado da gravação do pedido
+        """
+        return self._write_queue.submit('pedido', pedido_data)
+
+    def enqueue_produto(self, produto_data: Dict) -> Future:
+        """
+        Enfileira um produto para gravação em lote (ver WriteBehindQueue)
+
+        Returns:
+            Future com o resultado da gravação do produto
+        """
+        return self._write_queue.submit('produto', produto_data)
+
+    def flush_writes(self, timeout: Optional[float] = None):
+        """Envia as escritas enfileiradas e aguarda a confirmação"""
+        self._write_queue.flush(timeout)
+
+    def close_writes(self, timeout: Optional[float] = None):
+        """Envia as escritas enfileiradas (e as em envio) e encerra a fila; usado ao desligar"""
+        self._write_queue.close(timeout)
+
+    def get_write_stats(self) -> Dict[str, int]:
+        """Retorna contadores da fila de escrita (pending, batches, items, failures)"""
+        return self._write_queue.stats()
+
+    def _write_many(self, kind: str, items: List[Dict]) -> List[Dict]:
+        """Grava itens de um tipo em lote e invalida as chaves afetadas"""
+        if not items:
+            return []
+
+        bulk_action, field, single_action = self._bulk_actions[kind]
+
+        try:
+            result = self._post({'action': bulk_action, field: items})
+            if result.get('error') == 'Ação inválida':
+                # Apps Script implantado sem a ação em lote: um item por chamada
+                results = [self._post_single(single_action, item) for item in items]
             else:
-                error_msg = f"Erro: {result.get('error', 'Erro desconhecido')}"
-                if HAS_STREAMLIT:
-                    st.error(error_msg)
-                else:
-                    print(error_msg)
-                return False
+                results = self._bulk_results(result, len(items))
+        except Exception as e:
+            results = [{'success': False, 'error': str(e)} for _ in items]
+
+        return self._finish_writes(kind, items, results)
 
+    def _post_single(self, action: str, item: Dict) -> Dict:
+        """Grava um item isolado, devolvendo o resultado em vez de lançar exceção"""
+        try:
+            result = self._post({'action': action, **item})
         except Exception as e:
-            error_msg = f"Erro ao adicionar pedido: {str(e)}"
-            if HAS_STREAMLIT:
-                st.error(error_msg)
-            else:
-                print(error_msg)
-            return False
+            return {'success': False, 'error': str(e)}
+
+        if result.get('success'):
+            return {'success': True}
+        return {'success': False, 'error': result.get('error', 'Erro desconhecido')}
+
+    @staticmethod
+    def _bulk_results(result: Dict, count: int) -> List[Dict]:
+        """Extrai o resultado por item da resposta de addPedidos/addProdutos"""
+        if not result.get('success'):
+            error = result.get('error', 'Erro desconhecido')
+            return [{'success': False, 'error': error} for _ in range(count)]
+
+        results = result.get('results') or []
+        if len(results) != count:
+            raise ValueError("Resposta do lote com tamanho diferente do pedido")
+        return [r or {'success': False, 'error': 'Item não processado'} for r in results]
+
+    def _finish_writes(self, kind: str, items: List[Dict], results: List[Dict]) -> List[Dict]:
+        """Invalida de uma vez as chaves dos itens gravados e reporta as falhas"""
+        keys_for = self._keys_for_pedido if kind == 'pedido' else self._keys_for_produto
+
+        keys = set()
+        for item, result in zip(items, results):
+            if result.get('success'):
+                keys.update(keys_for(item))
+        if keys:
+            self.invalidate(*keys)
+
+        failures = sum(1 for result in results if not result.get('success'))
+        if failures:
+            self._report_error(f"Erro: {failures} de {len(items)} {kind}(s) não gravado(s)")
+
+        return results
+
+    def get_http_stats(self) -> Dict[str, Dict]:
+        """Retorna métricas de latência das chamadas ao Apps Script por ação"""
+        return self.http.get_stats()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Retorna as estatísticas do cache em memória e da coalescência de buscas
+
+        Returns:
+            Dicionário {entries, bytes, max_entries, max_bytes, hits, misses,
+            hit_rate, evictions, fetches, coalesced, in_flight}
+        """
+        return {**self._memory.stats(), **self._single_flight.stats()}
 
     def limpar_cache(self):
         """Limpa o cache de dados"""
-        self._cache = {}
-        self._cache_time = {}
+        self._cache_generation += 1
+        self._memory.clear()
+        self._etags.clear()
+        self._stale.clear()
+        self._unavailable.clear()
+        self._dataframes.clear()
+        if self._disk_cache is not None:
+            try:
+                self._disk_cache.clear()
+            except Exception as e:
+                print(f"Erro ao limpar cache em disco: {str(e)}")
         if HAS_STREAMLIT:
             st.cache_data.clear()
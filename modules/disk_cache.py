@@ -0,0 +1,111 @@
+"""
+Cache persistente em disco (SQLite) para dados da planilha
+Segundo nível abaixo do cache em memória do GoogleSheetsManager
+"""
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+
+class DiskCache:
+    """Armazena valores JSON com horário de busca e TTL por chave em SQLite"""
+
+    def __init__(self, db_path: str):
+        """
+        Inicializa o cache criando o banco e a tabela se necessário
+
+        Args:
+            db_path: Caminho do arquivo SQLite
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    ttl REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Abre uma conexão por operação (segura entre threads), com commit ao final"""
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        Obtém um valor do disco
+
+        Args:
+            key: Chave do cache
+
+        Returns:
+            Tupla (valor, fetched_at, ttl) ou None se a chave não existir
+        """
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, fetched_at, ttl FROM cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        try:
+            return json.loads(row[0]), row[1], row[2]
+        except ValueError:
+            return None
+
+    def set(self, key: str, value: Any, ttl: float, fetched_at: Optional[float] = None):
+        """
+        Armazena um valor no disco
+
+        Args:
+            key: Chave do cache
+            value: Valor serializável em JSON
+            ttl: Tempo de vida em segundos
+            fetched_at: Horário da busca (padrão: agora)
+        """
+        if fetched_at is None:
+            fetched_at = time.time()
+
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, fetched_at, ttl) VALUES (?, ?, ?, ?)",
+                (key, payload, fetched_at, ttl)
+            )
+
+    def touch(self, key: str, fetched_at: float, ttl: float):
+        """Renova o horário de busca de uma chave sem regravar o valor"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE cache SET fetched_at = ?, ttl = ? WHERE key = ?",
+                (fetched_at, ttl, key)
+            )
+
+    def delete(self, key: str):
+        """Remove uma chave do disco"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        """Remove todas as chaves do disco"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM cache")
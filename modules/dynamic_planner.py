@@ -10,7 +10,8 @@ import json
 import os
 
 from modules.workday_calendar import get_calendar
-from modules.database_manager import GoogleSheetsManager
+from modules.data_context import DataContext, get_data_context
+from modules.repository import DataRepository
 
 
 @dataclass
@@ -101,10 +102,16 @@ class OrderItem:
 class DynamicPlanner:
     """Gerenciador de planejamento dinâmico de produção"""
 
-    def __init__(self):
-        """Inicializa o planejador"""
+    def __init__(self, repository: Optional[DataRepository] = None):
+        """
+        Inicializa o planejador
+
+        Args:
+            repository: Origem dos dados (padrão: repositório do contexto de dados)
+        """
         self.calendar = get_calendar()
-        self.db_manager = GoogleSheetsManager()
+        # Planilha ou cópia local em SQLite, conforme storage.backend
+        self.db_manager = repository or get_data_context().repository
         self.plans_file = "config/production_plans.json"
         self._ensure_config_dir()
 
@@ -146,6 +153,9 @@ class DynamicPlanner:
                 machines_orders[order.maquina] = []
             machines_orders[order.maquina].append(order)
 
+        # Carrega disponibilidades de todas as máquinas em uma única requisição
+        self.db_manager.load_snapshot()
+
         # Calcula datas para cada máquina
         machine_plans = {}
         all_orders_with_dates = []
@@ -563,9 +573,14 @@ class DynamicPlanner:
 _planner_instance = None
 
 
-def get_planner() -> DynamicPlanner:
-    """Retorna a instância global do planejador"""
+def get_planner(context: Optional[DataContext] = None) -> DynamicPlanner:
+    """
+    Retorna a instância global do planejador
+
+    Args:
+        context: Contexto de dados usado na primeira criação (padrão: o do processo)
+    """
     global _planner_instance
     if _planner_instance is None:
-        _planner_instance = DynamicPlanner()
+        _planner_instance = DynamicPlanner((context or get_data_context()).repository)
     return _planner_instance
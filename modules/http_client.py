@@ -0,0 +1,438 @@
+"""
+Cliente HTTP compartilhado para o Web App do Apps Script
+Sessão com pool de conexões (keep-alive), retentativas com backoff exponencial
+e jitter, orçamento de tempo por chamada, disjuntor compartilhado e métricas de
+latência, tamanho das respostas e tempo de decodificação do JSON
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Importa httpx apenas se disponível (cliente assíncrono do FastAPI)
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+# Status transitórios comuns do Apps Script (cota e falhas internas)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Respostas a partir deste tamanho são decodificadas fora do event loop
+THREAD_DECODE_BYTES = 64 * 1024
+
+
+class AppsScriptError(Exception):
+    """Erro HTTP do Apps Script após esgotar as retentativas"""
+
+
+class _RetryingClient:
+    """Política de retentativas, orçamento de tempo e métricas comum aos clientes"""
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = 10,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 10.0,
+        total_timeout: float = 30.0,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        Inicializa a política do cliente
+
+        Args:
+            base_url: URL do Web App do Apps Script
+            pool_size: Máximo de conexões mantidas abertas
+            max_retries: Retentativas após a primeira tentativa
+            backoff_base: Espera base (segundos) do backoff exponencial
+            backoff_max: Espera máxima (segundos) entre tentativas
+            connect_timeout: Tempo limite de conexão por tentativa
+            read_timeout: Tempo limite de leitura padrão por tentativa
+            total_timeout: Orçamento total da chamada, incluindo retentativas
+            breaker: Disjuntor (compartilhável entre clientes); com o circuito
+                aberto as chamadas falham na hora com CircuitOpenError
+        """
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+        self.breaker = breaker
+
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    @classmethod
+    def from_config(cls, base_url: str, http_config: Optional[Dict] = None,
+                    breaker: Optional[CircuitBreaker] = None):
+        """Cria o cliente a partir da seção `http` do config.yaml"""
+        return cls(base_url, breaker=breaker, **(http_config or {}))
+
+    def _check_circuit(self):
+        """Recusa a chamada na hora se o circuito está aberto"""
+        if self.breaker is not None:
+            self.breaker.check()
+
+    def _record_outcome(self, error: Optional[BaseException] = None):
+        """Informa ao disjuntor o resultado final de uma chamada"""
+        if self.breaker is None:
+            return
+        if error is None:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure(error)
+
+    @staticmethod
+    def _is_outage(error: BaseException) -> bool:
+        """
+        Indica se um erro que não é de transporte também sinaliza Apps Script
+        indisponível (HTTP 5xx ou 429); 4xx e respostas inválidas não abrem
+        o circuito
+        """
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        return isinstance(status, int) and (status >= 500 or status == 429)
+
+    def _deadline(self, timeout: Optional[float]):
+        """Retorna (timeout de leitura, início, prazo final) de uma chamada"""
+        read_timeout = timeout or self.read_timeout
+        started = time.monotonic()
+        return read_timeout, started, started + max(self.total_timeout, read_timeout)
+
+    @staticmethod
+    def _can_retry(method: str, status_code: int) -> bool:
+        """Decide se um status HTTP pode ser repetido para o método"""
+        return method == 'GET' or status_code == 429
+
+    def _is_retryable(self, method: str, error: Exception) -> bool:
+        """Decide se uma exceção pode ser repetida para o método"""
+        if method == 'GET' or isinstance(error, AppsScriptError):
+            return True
+        # POST: só repete se a conexão não chegou a ser estabelecida
+        return self._is_connect_timeout(error)
+
+    @staticmethod
+    def _is_connect_timeout(error: Exception) -> bool:
+        """Indica se o erro ocorreu antes de a conexão ser aberta"""
+        return False
+
+    def _next_delay(self, method: str, error: Exception, attempt: int,
+                    retry_after: Optional[str], deadline: float) -> Optional[float]:
+        """
+        Calcula a espera antes da próxima tentativa
+
+        Returns:
+            Segundos a esperar, ou None se não deve repetir
+        """
+        if not self._is_retryable(method, error):
+            return None
+
+        delay = self._backoff(attempt, retry_after)
+        if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Calcula a espera antes da próxima tentativa (exponencial com jitter total)"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _decode(content: bytes):
+        """
+        Decodifica o corpo JSON medindo o tempo gasto
+
+        Returns:
+            Tupla (JSON decodificado, segundos de decodificação)
+        """
+        started = time.perf_counter()
+        data = json.loads(content)
+        return data, time.perf_counter() - started
+
+    def _record(self, action: str, elapsed: float, retries: int, error: bool,
+                size: int = 0, decode: float = 0.0):
+        """
+        Registra latência e resultado de uma chamada
+
+        Args:
+            size: Bytes do corpo da resposta (já descomprimido)
+            decode: Segundos gastos decodificando o JSON
+        """
+        with self._stats_lock:
+            stats = self._stats.setdefault(action, {
+                'calls': 0,
+                'errors': 0,
+                'retries': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'bytes': 0,
+                'decode_ms': 0.0,
+                'samples': deque(maxlen=200)
+            })
+            elapsed_ms = elapsed * 1000
+            stats['calls'] += 1
+            stats['errors'] += int(error)
+            stats['retries'] += retries
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['bytes'] += size
+            stats['decode_ms'] += decode * 1000
+            stats['samples'].append(elapsed_ms)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """
+        Retorna métricas de latência por ação
+
+        Returns:
+            Dicionário {acao: {calls, errors, retries, avg_ms, p50_ms, p95_ms,
+            max_ms, avg_kb, avg_decode_ms}}; avg_kb e avg_decode_ms consideram
+            só as chamadas com resposta
+        """
+        result = {}
+        with self._stats_lock:
+            for action, stats in self._stats.items():
+                samples = sorted(stats['samples'])
+                ok = stats['calls'] - stats['errors']
+                result[action] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'avg_ms': round(stats['total_ms'] / stats['calls'], 1) if stats['calls'] else 0,
+                    'p50_ms': self._percentile(samples, 0.50),
+                    'p95_ms': self._percentile(samples, 0.95),
+                    'max_ms': round(stats['max_ms'], 1),
+                    'avg_kb': round(stats['bytes'] / ok / 1024, 1) if ok else 0,
+                    'avg_decode_ms': round(stats['decode_ms'] / ok, 2) if ok else 0
+                }
+        return result
+
+    @staticmethod
+    def _percentile(samples: list, fraction: float) -> float:
+        """Percentil de uma lista já ordenada de latências"""
+        if not samples:
+            return 0
+        index = min(len(samples) - 1, int(len(samples) * fraction))
+        return round(samples[index], 1)
+
+
+class AppsScriptClient(_RetryingClient):
+    """Executa ações GET/POST no Apps Script reaproveitando conexões"""
+
+    def __init__(self, base_url: str, **kwargs):
+        """Inicializa a sessão HTTP (parâmetros em _RetryingClient)"""
+        super().__init__(base_url, **kwargs)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            pool_block=True
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, params: Dict, timeout: Optional[float] = None) -> Any:
+        """
+        Executa uma ação GET (idempotente, sempre com retentativas)
+
+        Args:
+            params: Parâmetros da query string (incluindo 'action')
+            timeout: Tempo limite de leitura desta chamada
+
+        Returns:
+            JSON decodificado da resposta
+        """
+        return self._call('GET', params.get('action', 'GET'), timeout, params=params)
+
+    def post(self, payload: Dict, timeout: Optional[float] = None) -> Any:
+        """
+        Executa uma ação POST
+
+        Escritas não são idempotentes: só são repetidas quando o Apps Script
+        recusa a chamada (429) ou a conexão nem chega a ser aberta.
+
+        Args:
+            payload: Corpo JSON (incluindo 'action')
+            timeout: Tempo limite de leitura desta chamada
+
+        Returns:
+            JSON decodificado da resposta
+        """
+        return self._call('POST', payload.get('action', 'POST'), timeout, json=payload)
+
+    @staticmethod
+    def _is_connect_timeout(error: Exception) -> bool:
+        return isinstance(error, requests.exceptions.ConnectTimeout)
+
+    def ping(self, timeout: float = 5.0) -> Any:
+        """
+        Chamada leve (getMaquinas) sem retentativas nem disjuntor, usada para
+        sondar a recuperação do Apps Script
+
+        Raises:
+            Exceção se o Apps Script não respondeu com JSON válido
+        """
+        response = self.session.get(
+            self.base_url,
+            params={'action': 'getMaquinas'},
+            timeout=(self.connect_timeout, timeout)
+        )
+        response.raise_for_status()
+        return self._decode(response.content)[0]
+
+    def _call(self, method: str, action: str, timeout: Optional[float], **kwargs) -> Any:
+        """Executa a requisição com retentativas dentro do orçamento de tempo"""
+        read_timeout, started, deadline = self._deadline(timeout)
+        attempt = 0
+        self._check_circuit()
+
+        while True:
+            remaining = deadline - time.monotonic()
+            retry_after = None
+
+            try:
+                response = self.session.request(
+                    method,
+                    self.base_url,
+                    timeout=(self.connect_timeout, max(0.1, min(read_timeout, remaining))),
+                    **kwargs
+                )
+
+                if response.status_code in RETRY_STATUS and self._can_retry(method, response.status_code):
+                    retry_after = response.headers.get('Retry-After')
+                    raise AppsScriptError(f"HTTP {response.status_code} em {action}")
+
+                response.raise_for_status()
+                data, decode = self._decode(response.content)
+                self._record(action, time.monotonic() - started, attempt, error=False,
+                             size=len(response.content), decode=decode)
+                self._record_outcome()
+                return data
+
+            except (requests.ConnectionError, requests.Timeout, AppsScriptError) as e:
+                delay = self._next_delay(method, e, attempt, retry_after, deadline)
+                if delay is None:
+                    self._record(action, time.monotonic() - started, attempt, error=True)
+                    self._record_outcome(e)
+                    raise
+
+                attempt += 1
+                time.sleep(delay)
+
+            except Exception as e:
+                self._record(action, time.monotonic() - started, attempt, error=True)
+                if self._is_outage(e):
+                    self._record_outcome(e)
+                raise
+
+
+class AsyncAppsScriptClient(_RetryingClient):
+    """Versão assíncrona (httpx) do AppsScriptClient para rotas do FastAPI"""
+
+    def __init__(self, base_url: str, **kwargs):
+        """Inicializa o cliente (a conexão é criada no primeiro uso)"""
+        if not HAS_HTTPX:
+            raise ImportError("httpx é necessário para o cliente assíncrono (pip install httpx)")
+
+        super().__init__(base_url, **kwargs)
+        self._client: Optional['httpx.AsyncClient'] = None
+
+    def _get_client(self) -> 'httpx.AsyncClient':
+        """Cria o AsyncClient com pool limitado no loop em execução"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size
+                ),
+                follow_redirects=True  # Apps Script responde via redirect 302
+            )
+        return self._client
+
+    async def get(self, params: Dict, timeout: Optional[float] = None) -> Any:
+        """Executa uma ação GET (ver AppsScriptClient.get)"""
+        return await self._call('GET', params.get('action', 'GET'), timeout, params=params)
+
+    async def post(self, payload: Dict, timeout: Optional[float] = None) -> Any:
+        """Executa uma ação POST (ver AppsScriptClient.post)"""
+        return await self._call('POST', payload.get('action', 'POST'), timeout, json=payload)
+
+    async def close(self):
+        """Fecha as conexões abertas"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _is_connect_timeout(error: Exception) -> bool:
+        return isinstance(error, httpx.ConnectTimeout)
+
+    async def _call(self, method: str, action: str, timeout: Optional[float], **kwargs) -> Any:
+        """Executa a requisição com retentativas dentro do orçamento de tempo"""
+        read_timeout, started, deadline = self._deadline(timeout)
+        attempt = 0
+        self._check_circuit()
+
+        while True:
+            remaining = deadline - time.monotonic()
+            retry_after = None
+
+            try:
+                response = await self._get_client().request(
+                    method,
+                    self.base_url,
+                    timeout=httpx.Timeout(
+                        max(0.1, min(read_timeout, remaining)),
+                        connect=self.connect_timeout
+                    ),
+                    **kwargs
+                )
+
+                if response.status_code in RETRY_STATUS and self._can_retry(method, response.status_code):
+                    retry_after = response.headers.get('Retry-After')
+                    raise AppsScriptError(f"HTTP {response.status_code} em {action}")
+
+                response.raise_for_status()
+                if len(response.content) >= THREAD_DECODE_BYTES:
+                    data, decode = await asyncio.to_thread(self._decode, response.content)
+                else:
+                    data, decode = self._decode(response.content)
+                self._record(action, time.monotonic() - started, attempt, error=False,
+                             size=len(response.content), decode=decode)
+                self._record_outcome()
+                return data
+
+            except (httpx.TransportError, AppsScriptError) as e:
+                delay = self._next_delay(method, e, attempt, retry_after, deadline)
+                if delay is None:
+                    self._record(action, time.monotonic() - started, attempt, error=True)
+                    self._record_outcome(e)
+                    raise
+
+                attempt += 1
+                await asyncio.sleep(delay)
+
+            except Exception as e:
+                self._record(action, time.monotonic() - started, attempt, error=True)
+                if self._is_outage(e):
+                    self._record_outcome(e)
+                raise
@@ -8,7 +8,9 @@ from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 import copy
 
-from modules.database_manager import GoogleSheetsManager
+from modules.data_context import DataContext, get_data_context
+from modules.repository import DataRepository
+from modules.sheet_schema import to_bool
 from modules.workday_calendar import get_calendar
 
 
@@ -27,8 +29,13 @@ class MachineOption:
 class MachineOptimizer:
     """Otimiza a distribuição de pedidos entre máquinas"""
 
-    def __init__(self):
-        self.db_manager = GoogleSheetsManager()
+    def __init__(self, repository: Optional[DataRepository] = None):
+        """
+        Args:
+            repository: Origem dos dados (padrão: repositório do contexto de dados)
+        """
+        # Planilha ou cópia local em SQLite, conforme storage.backend
+        self.db_manager = repository or get_data_context().repository
         self.calendar = get_calendar()
 
     def analyze_and_suggest(
@@ -49,6 +56,9 @@ class MachineOptimizer:
         if start_date is None:
             start_date = datetime.now()
 
+        # Carrega catálogos e disponibilidades em uma única requisição
+        self.db_manager.load_snapshot()
+
         # Para cada pedido, encontra todas as máquinas compatíveis
         suggestions = []
         machine_loads = {}  # Rastreia carga de cada máquina
@@ -79,7 +89,7 @@ class MachineOptimizer:
                 # Calcula tempo de produção nesta máquina
                 tempo_producao = float(product_info.get('TEMPO DE PRODUÇÃO', 0))
                 tempo_montagem = float(product_info.get('TEMPO DE MONTAGEM', 0))
-                montagem_2x2 = product_info.get('MONTAGEM 2X2') == 'Sim'
+                montagem_2x2 = to_bool(product_info.get('MONTAGEM 2X2'))
                 tempo_montagem_2x2 = float(product_info.get('TEMPO MONTAGEM 2X2', 0))
 
                 tempo_base = tempo_producao + tempo_montagem
@@ -212,6 +222,7 @@ class MachineOptimizer:
             Lista de pedidos com máquinas otimizadas
         """
         optimized_orders = copy.deepcopy(orders)
+        catalog = None
 
         for i, suggestion in enumerate(suggestions):
             if i < len(optimized_orders):
@@ -230,19 +241,16 @@ class MachineOptimizer:
                     if best_option:
                         # Busca dados completos do produto na nova máquina
                         try:
-                            produtos = self.db_manager.get_produtos_por_maquina(suggested_machine)
+                            if catalog is None:
+                                catalog = self.db_manager.get_catalog()
                             produto_ref = optimized_orders[i]['produto']
 
-                            produto_info = produtos[
-                                (produtos['REFERÊNCIAS/MÁQUINA'] == produto_ref) |
-                                (produtos['REFERENCIA'] == produto_ref)
-                            ]
+                            prod_dict = catalog.get(suggested_machine, produto_ref)
 
-                            if not produto_info.empty:
-                                prod_dict = produto_info.iloc[0].to_dict()
+                            if prod_dict is not None:
                                 optimized_orders[i]['tempo_producao'] = float(prod_dict.get('TEMPO DE PRODUÇÃO', 0))
                                 optimized_orders[i]['tempo_montagem'] = float(prod_dict.get('TEMPO DE MONTAGEM', 0))
-                                optimized_orders[i]['montagem_2x2'] = prod_dict.get('MONTAGEM 2X2') == 'Sim'
+                                optimized_orders[i]['montagem_2x2'] = to_bool(prod_dict.get('MONTAGEM 2X2'))
                                 optimized_orders[i]['tempo_montagem_2x2'] = float(prod_dict.get('TEMPO MONTAGEM 2X2', 0))
                         except Exception as e:
                             print(f"Erro ao atualizar dados do produto: {e}")
@@ -259,31 +267,13 @@ class MachineOptimizer:
         Returns:
             Dicionário {nome_maquina: info_produto}
         """
-        compatible = {}
-
         try:
-            maquinas = self.db_manager.get_maquinas()
-
-            for maquina in maquinas:
-                try:
-                    produtos = self.db_manager.get_produtos_por_maquina(maquina)
-
-                    # Busca o produto usando REFERÊNCIAS/MÁQUINA ou REFERENCIA
-                    match = produtos[
-                        (produtos['REFERÊNCIAS/MÁQUINA'] == produto) |
-                        (produtos['REFERENCIA'] == produto)
-                    ]
-
-                    if not match.empty:
-                        compatible[maquina] = match.iloc[0].to_dict()
-
-                except Exception as e:
-                    continue
+            # Busca o produto usando REFERÊNCIAS/MÁQUINA ou REFERENCIA
+            return self.db_manager.get_catalog().compatible(produto)
 
         except Exception as e:
             print(f"Erro ao buscar máquinas compatíveis: {e}")
-
-        return compatible
+            return {}
 
     def _sort_by_urgency(self, orders: List[Dict]) -> List[Dict]:
         """Ordena pedidos por urgência (data de entrega mais próxima primeiro)"""
@@ -329,9 +319,14 @@ class MachineOptimizer:
 _optimizer_instance = None
 
 
-def get_machine_optimizer() -> MachineOptimizer:
-    """Retorna instância global do otimizador"""
+def get_machine_optimizer(context: Optional[DataContext] = None) -> MachineOptimizer:
+    """
+    Retorna instância global do otimizador
+
+    Args:
+        context: Contexto de dados usado na primeira criação (padrão: o do processo)
+    """
     global _optimizer_instance
     if _optimizer_instance is None:
-        _optimizer_instance = MachineOptimizer()
+        _optimizer_instance = MachineOptimizer((context or get_data_context()).repository)
     return _optimizer_instance
@@ -0,0 +1,178 @@
+"""
+Cache em memória com orçamento de entradas e bytes (LRU)
+Primeiro nível do GoogleSheetsManager, acima do cache em disco
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estima os bytes ocupados por um valor vindo da planilha
+
+    Percorre dicionários, listas e tuplas somando sys.getsizeof de cada
+    objeto (chaves incluídas); objetos repetidos são contados uma vez.
+
+    Args:
+        value: Valor JSON (dict, list, str, números)
+
+    Returns:
+        Tamanho aproximado em bytes
+    """
+    total = 0
+    seen = set()
+    stack = [value]
+
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+
+    return total
+
+
+class MemoryCache:
+    """Guarda (valor, fetched_at, ttl) por chave, descartando as menos usadas"""
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Inicializa o cache
+
+        Args:
+            max_entries: Número máximo de chaves (0 = sem limite)
+            max_bytes: Tamanho estimado máximo em bytes (0 = sem limite)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[Any, float, float, int]]' = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        Obtém uma entrada, marcando-a como usada recentemente
+
+        Returns:
+            Tupla (valor, fetched_at, ttl) ou None se a chave não existir
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry[:3]
+
+    def peek(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """Obtém uma entrada sem alterar a ordem LRU nem as estatísticas"""
+        entry = self._entries.get(key)
+        return entry[:3] if entry is not None else None
+
+    def set(self, key: str, value: Any, fetched_at: float, ttl: float):
+        """
+        Armazena uma entrada e descarta as menos usadas até caber no orçamento
+
+        Um valor maior que max_bytes sozinho não é mantido em memória.
+        """
+        size = estimate_size(value)
+
+        with self._lock:
+            self._remove(key)
+
+            if self.max_bytes and size > self.max_bytes:
+                self._evictions += 1
+                return
+
+            self._entries[key] = (value, fetched_at, ttl, size)
+            self._bytes += size
+
+            while self._over_budget():
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def touch(self, key: str, fetched_at: float, ttl: float) -> bool:
+        """
+        Renova o horário de busca de uma entrada sem reestimar o tamanho
+
+        Returns:
+            True se a chave existia
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            self._entries[key] = (entry[0], fetched_at, ttl, entry[3])
+            self._entries.move_to_end(key)
+            return True
+
+    def pop(self, key: str):
+        """Remove uma chave"""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        """Remove todas as chaves (as estatísticas são mantidas)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def items_meta(self) -> List[Tuple[str, float, float]]:
+        """Lista (chave, fetched_at, ttl) de todas as entradas"""
+        with self._lock:
+            return [(key, entry[1], entry[2]) for key, entry in self._entries.items()]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna as estatísticas do cache
+
+        Returns:
+            Dicionário {entries, bytes, max_entries, max_bytes, hits, misses,
+            hit_rate, evictions}
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / total, 3) if total else 0,
+                'evictions': self._evictions
+            }
+
+    def _remove(self, key: str):
+        """Remove uma chave atualizando o total de bytes (chamar com o lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[3]
+
+    def _over_budget(self) -> bool:
+        """Indica se o cache passou do limite de entradas ou de bytes"""
+        if self.max_entries and len(self._entries) > self.max_entries:
+            return True
+        return bool(self.max_bytes) and self._bytes > self.max_bytes
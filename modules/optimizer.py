@@ -1,10 +1,13 @@
 """
 Módulo de otimização inteligente de distribuição de produção
 """
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import pandas as pd
 from datetime import datetime, timedelta
 
+from modules.catalog_index import index_dataframe
+from modules.sheet_schema import to_bool
+
 
 class ProductionOptimizer:
     """Otimizador de distribuição de produção nas máquinas"""
@@ -84,6 +87,7 @@ class ProductionOptimizer:
             pedidos_por_maquina[maq].append(pedido)
 
         # 4. OTIMIZAÇÃO POR MÁQUINA
+        produtos_por_ref = index_dataframe(produtos_df, ('REFERENCIA',))
         sugestoes = {}
         alertas = []
         metricas = {
@@ -96,7 +100,7 @@ class ProductionOptimizer:
 
         for maquina, pedidos_maq in pedidos_por_maquina.items():
             resultado = ProductionOptimizer._otimizar_maquina(
-                maquina, pedidos_maq, produtos_df
+                maquina, pedidos_maq, produtos_df, produtos_por_ref
             )
 
             sugestoes[maquina] = resultado['distribuicao']
@@ -139,9 +143,16 @@ class ProductionOptimizer:
     def _otimizar_maquina(
         maquina: str,
         pedidos: List[Dict],
-        produtos_df: pd.DataFrame
+        produtos_df: pd.DataFrame,
+        produtos_por_ref: Optional[Dict] = None
     ) -> Dict:
-        """Otimiza distribuição em uma máquina específica"""
+        """
+        Otimiza distribuição em uma máquina específica
+
+        Args:
+            produtos_por_ref: Índice {REFERENCIA: produto} de produtos_df,
+                construído aqui se não for informado
+        """
 
         distribuicao = []
         alertas = []
@@ -152,22 +163,22 @@ class ProductionOptimizer:
 
         # Agrupa pedidos do mesmo produto (eficiência)
         pedidos_agrupados = ProductionOptimizer._agrupar_produtos_similares(pedidos)
+        if produtos_por_ref is None:
+            produtos_por_ref = index_dataframe(produtos_df, ('REFERENCIA',))
 
         for idx, pedido in enumerate(pedidos_agrupados, 1):
             # Busca informações do produto
             produto_ref = pedido['produto']
-            produto_info = produtos_df[produtos_df['REFERENCIA'] == produto_ref]
+            prod_dict = produtos_por_ref.get(produto_ref)
 
-            if produto_info.empty:
+            if prod_dict is None:
                 continue
 
-            prod_dict = produto_info.iloc[0].to_dict()
-
             # Calcula tempo
             tempo_prod = float(prod_dict.get('TEMPO DE PRODUÇÃO', 0))
             tempo_mont = float(prod_dict.get('TEMPO DE MONTAGEM', 0))
 
-            if prod_dict.get('MONTAGEM 2X2', '').upper() == 'SIM':
+            if to_bool(prod_dict.get('MONTAGEM 2X2')):
                 tempo_mont += float(prod_dict.get('TEMPO MONTAGEM 2X2', 0))
 
             tempo_unitario = tempo_prod + tempo_mont
@@ -0,0 +1,155 @@
+"""
+Interface de acesso aos dados de produção
+Permite trocar a origem dos dados (Google Sheets ou SQLite local) sem
+alterar o planejador e os otimizadores
+"""
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+import yaml
+
+from modules.catalog_index import CatalogIndex
+from modules.sheet_schema import PRODUTOS_SCHEMA
+
+
+class DataRepository(ABC):
+    """Operações de leitura e escrita usadas pelos módulos de planejamento"""
+
+    @abstractmethod
+    def get_maquinas(self) -> List[str]:
+        """Lista de máquinas cadastradas"""
+
+    @abstractmethod
+    def get_clientes(self) -> List[str]:
+        """Lista de clientes"""
+
+    @abstractmethod
+    def get_ordens(self) -> List[str]:
+        """Lista de ordens de compra"""
+
+    @abstractmethod
+    def get_datas_entrega(self) -> List[str]:
+        """Lista de datas de entrega (AAAA-MM-DD)"""
+
+    @abstractmethod
+    def get_pedidos_cadastrados(self) -> List[Dict]:
+        """Pedidos da aba DADOS_GERAIS com cliente e máquina"""
+
+    @abstractmethod
+    def get_produtos_por_maquina(self, maquina: str) -> pd.DataFrame:
+        """DataFrame de produtos de uma máquina"""
+
+    @abstractmethod
+    def get_machine_availability(self, maquina: str) -> float:
+        """Horas disponíveis por dia da máquina (padrão 8.0)"""
+
+    @abstractmethod
+    def get_all_machines_availability(self) -> Dict[str, float]:
+        """Disponibilidade de todas as máquinas {maquina: horas}"""
+
+    @abstractmethod
+    def get_catalog(self) -> CatalogIndex:
+        """Índice do catálogo de todas as máquinas"""
+
+    @abstractmethod
+    def load_snapshot(self, force: bool = False) -> bool:
+        """Garante que os dados estão carregados; True em caso de sucesso"""
+
+    @abstractmethod
+    def add_produto(self, produto_data: Dict) -> bool:
+        """Adiciona um produto"""
+
+    @abstractmethod
+    def add_pedido(self, pedido_data: Dict) -> bool:
+        """Adiciona um pedido"""
+
+    @abstractmethod
+    def add_pedidos(self, pedidos: List[Dict]) -> List[Dict]:
+        """Adiciona vários pedidos; resultado por item"""
+
+    @abstractmethod
+    def add_produtos(self, produtos: List[Dict]) -> List[Dict]:
+        """Adiciona vários produtos; resultado por item"""
+
+    @staticmethod
+    def sheet_name(maquina: str) -> str:
+        """Nome da aba DADOS_<MAQUINA> de uma máquina (espaços viram _, em maiúsculas)"""
+        return f"DADOS_{maquina.replace(' ', '_').upper()}"
+
+    @staticmethod
+    def produtos_dataframe(data: Union[Dict, List[Dict]]) -> pd.DataFrame:
+        """
+        Monta o DataFrame de produtos a partir da aba da máquina
+
+        Colunas tipadas pelo PRODUTOS_SCHEMA: numéricas em float32
+        (vazios = 0), referências e cor como categorias e MONTAGEM 2X2 bool.
+
+        Args:
+            data: Tabela {headers, rows} (decodificada direto, sem montar um
+                dicionário por linha) ou lista de dicionários
+        """
+        if isinstance(data, dict):
+            if not data['rows']:
+                return PRODUTOS_SCHEMA.empty()
+            return PRODUTOS_SCHEMA.decode(data['headers'], data['rows'])
+        return PRODUTOS_SCHEMA.decode_records(data)
+
+    def start_sync(self):
+        """Inicia a sincronização em segundo plano (backends que espelham outra origem)"""
+
+    def stop_sync(self):
+        """Encerra a sincronização em segundo plano"""
+
+    def invalidate(self):
+        """Descarta os dados derivados da origem; a próxima leitura sincroniza de novo"""
+
+
+def _load_storage_config() -> Dict:
+    """Lê a seção storage do config.yaml"""
+    config_path = Path(__file__).parent.parent / 'config' / 'config.yaml'
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return (yaml.safe_load(f) or {}).get('storage') or {}
+
+
+def create_repository(source=None, config: Optional[Dict] = None) -> DataRepository:
+    """
+    Cria o repositório configurado em storage.backend
+
+    Args:
+        source: GoogleSheetsManager a reaproveitar (um novo é criado se None)
+        config: Seção storage (padrão: lida do config.yaml)
+
+    Returns:
+        O próprio GoogleSheetsManager ('sheets') ou um SQLiteRepository
+        espelhando a planilha ('sqlite')
+    """
+    # Importados aqui: database_manager implementa esta interface
+    from modules.database_manager import GoogleSheetsManager
+    from modules.sqlite_repository import SQLiteRepository
+
+    if config is None:
+        config = _load_storage_config()
+    if source is None:
+        source = GoogleSheetsManager()
+
+    backend = config.get('backend', 'sheets')
+    if backend == 'sheets':
+        return source
+    if backend == 'sqlite':
+        path = Path(__file__).parent.parent / config.get('sqlite_path', 'config/dados_locais.sqlite3')
+        return SQLiteRepository(str(path), source, sync_interval=config.get('sync_interval', 60))
+
+    raise ValueError(f"storage.backend desconhecido: {backend}")
+
+
+def get_repository(source=None) -> DataRepository:
+    """
+    Retorna o repositório do contexto de dados do processo
+
+    Args:
+        source: GoogleSheetsManager usado na primeira criação (opcional)
+    """
+    from modules.data_context import get_data_context
+    return get_data_context(source).repository
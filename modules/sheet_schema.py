@@ -0,0 +1,137 @@
+"""
+Esquema tipado das abas da planilha
+Decodifica as linhas direto em colunas tipadas (float32, categorias e
+booleanos), sem passar pela inferência do DataFrame linha a linha
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+FLOAT = 'float32'
+CATEGORY = 'category'
+BOOL = 'bool'
+
+
+def to_bool(value: Any) -> bool:
+    """
+    Converte um sinalizador Sim/Não da planilha em bool
+
+    Aceita bool (colunas já decodificadas) ou texto ('Sim' em qualquer caixa).
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, str):
+        return value.strip().upper() == 'SIM'
+    return False
+
+
+class SheetSchema:
+    """Tipos declarados das colunas de um tipo de aba"""
+
+    def __init__(self, columns: Sequence[Tuple[str, str]]):
+        """
+        Args:
+            columns: Pares (coluna, tipo) na ordem da planilha; tipos: FLOAT,
+                CATEGORY ou BOOL
+        """
+        self.columns = list(columns)
+        self.types = dict(columns)
+
+    def empty(self) -> pd.DataFrame:
+        """DataFrame vazio com as colunas e tipos do esquema"""
+        return self.decode([name for name, _ in self.columns], [])
+
+    def decode(self, headers: Sequence[str], rows: Sequence[Sequence[Any]]) -> pd.DataFrame:
+        """
+        Monta o DataFrame a partir de cabeçalho + linhas (lista de listas)
+
+        Args:
+            headers: Nomes das colunas
+            rows: Valores de cada linha, na ordem do cabeçalho
+
+        Returns:
+            DataFrame com as colunas tipadas
+        """
+        width = len(headers)
+        padded = [row if len(row) == width else (list(row) + [None] * width)[:width] for row in rows]
+        columns = list(zip(*padded)) if padded else [()] * width
+        return self.decode_columns({header: list(columns[i]) for i, header in enumerate(headers)})
+
+    def decode_records(self, records: List[Dict]) -> pd.DataFrame:
+        """Monta o DataFrame a partir das linhas como dicionários (formato do cache)"""
+        if not records:
+            return self.empty()
+
+        headers = dict.fromkeys(key for record in records for key in record)
+        return self.decode_columns({header: [record.get(header) for record in records] for header in headers})
+
+    def decode_columns(self, columns: Dict[str, List[Any]]) -> pd.DataFrame:
+        """
+        Monta o DataFrame a partir dos valores de cada coluna
+
+        Colunas fora do esquema mantêm a inferência padrão do pandas.
+        """
+        return pd.DataFrame(
+            {header: self._column(values, self.types.get(header)) for header, values in columns.items()},
+            columns=list(columns)
+        )
+
+    @staticmethod
+    def _column(values: List[Any], kind: Optional[str]):
+        """Converte os valores de uma coluna no tipo declarado"""
+        if kind == FLOAT:
+            try:
+                numbers = np.array(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                # Textos e células vazias ('') viram NaN
+                numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(np.float64, copy=True)
+            numbers[np.isnan(numbers)] = 0
+            return numbers.astype(np.float32)
+        if kind == CATEGORY:
+            # Categorias na ordem de aparição: evita ordenar referências únicas
+            codes, uniques = pd.factorize(np.array(values, dtype=object))
+            return pd.Categorical.from_codes(codes, categories=uniques)
+        if kind == BOOL:
+            flags = {value: to_bool(value) for value in set(values)}
+            return np.fromiter(map(flags.__getitem__, values), dtype=bool, count=len(values))
+        return pd.Series(values)
+
+
+def to_records(df: pd.DataFrame) -> List[Dict]:
+    """
+    Linhas do DataFrame como dicionários com tipos nativos do Python
+
+    Colunas float32 voltam ao menor decimal que as representa (2.97, e não
+    2.9700000286102295), para JSON e cálculos iguais aos da planilha.
+    Células vazias de categorias (NaN) voltam como None, que o JSON aceita.
+    """
+    if df is None or df.empty:
+        return []
+
+    floats = [col for col in df.columns if df[col].dtype == np.float32]
+    categories = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype) and df[col].isna().any()]
+    if floats or categories:
+        df = df.copy()
+        for col in floats:
+            df[col] = df[col].to_numpy().astype(str).astype(np.float64)
+        for col in categories:
+            values = df[col].astype(object)
+            df[col] = values.where(values.notna(), None)
+    return df.to_dict('records')
+
+
+# Abas DADOS_<MAQUINA>: catálogo de produtos
+PRODUTOS_SCHEMA = SheetSchema([
+    ('REFERÊNCIAS/MÁQUINA', CATEGORY),
+    ('TEMPO DE PRODUÇÃO', FLOAT),
+    ('TEMPO DE MONTAGEM', FLOAT),
+    # Contagens, mas a planilha não garante inteiros: fracionários passam sem arredondar
+    ('VOLTAS NA ESPULA', FLOAT),
+    ('PRODUÇÃO POR MINUTO', FLOAT),
+    ('COR', CATEGORY),
+    ('REFERENCIA', CATEGORY),
+    ('LARGURA', FLOAT),
+    ('MONTAGEM 2X2', BOOL),
+    ('TEMPO MONTAGEM 2X2', FLOAT),
+])
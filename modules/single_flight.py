@@ -0,0 +1,110 @@
+"""
+Coalescência de buscas concorrentes (single-flight)
+Uma única busca em andamento por chave de cache; threads e coroutines que
+pedem a mesma chave nesse intervalo aguardam o resultado dela
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class SingleFlight:
+    """
+    Registro das buscas em andamento por chave
+
+    Threads e coroutines compartilham o mesmo registro: uma coroutine pode
+    aguardar a busca de uma thread e vice-versa. A exceção é uma thread no
+    próprio event loop da coroutine que está buscando, que bloquearia o
+    loop; nesse caso ela busca por conta própria.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # chave → (Future do resultado, thread que executa a busca)
+        self._calls: Dict[str, Tuple[Future, int]] = {}
+        self._stats = {'fetches': 0, 'coalesced': 0}
+
+    def do(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Executa `fetch` ou aguarda a busca em andamento da mesma chave
+
+        Args:
+            key: Chave do cache
+            fetch: Função que busca o valor (exceções chegam a todos os que aguardam)
+
+        Returns:
+            Valor buscado
+        """
+        future, leader = self._join(key, threading.get_ident(), blocking=True)
+        if not leader:
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, value=value)
+        return value
+
+    async def do_async(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Versão assíncrona de do(): aguarda sem bloquear o event loop"""
+        future, leader = self._join(key, threading.get_ident(), blocking=False)
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            value = await fetch()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, value=value)
+        return value
+
+    def in_flight(self, key: str) -> bool:
+        """Indica se há uma busca em andamento para a chave"""
+        return key in self._calls
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retorna os contadores
+
+        Returns:
+            Dicionário {fetches, coalesced, in_flight}: buscas executadas,
+            chamadas que aguardaram a busca de outra e buscas em andamento
+        """
+        with self._lock:
+            return {**self._stats, 'in_flight': len(self._calls)}
+
+    def _join(self, key: str, thread_id: int, blocking: bool) -> Tuple[Optional[Future], bool]:
+        """
+        Registra a chamada como líder ou seguidora da busca da chave
+
+        Returns:
+            Tupla (Future da busca, é_lider)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            # Thread bloqueante na mesma thread do líder travaria a busca
+            if call is not None and not (blocking and call[1] == thread_id):
+                self._stats['coalesced'] += 1
+                return call[0], False
+
+            future = Future()
+            self._stats['fetches'] += 1
+            if call is None:
+                self._calls[key] = (future, thread_id)
+            return future, True
+
+    def _finish(self, key: str, future: Future, value: Any = None, error: Optional[BaseException] = None):
+        """Publica o resultado para quem aguarda e libera a chave"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call[0] is future:
+                del self._calls[key]
+
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
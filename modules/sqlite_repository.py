@@ -0,0 +1,452 @@
+"""
+Repositório local em SQLite espelhando a planilha
+Planejamento e otimização leem do banco local (milissegundos); a planilha
+continua sendo a interface de edição e recebe todas as escritas
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from modules.catalog_index import CatalogIndex
+from modules.database_manager import GoogleSheetsManager
+from modules.repository import DataRepository
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS maquinas (
+    nome TEXT PRIMARY KEY,
+    disponibilidade REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS produtos (
+    aba TEXT NOT NULL,
+    posicao INTEGER NOT NULL,
+    referencia_maquina TEXT,
+    referencia TEXT,
+    dados TEXT NOT NULL,
+    PRIMARY KEY (aba, posicao)
+);
+CREATE INDEX IF NOT EXISTS idx_produtos_referencia ON produtos (referencia);
+CREATE INDEX IF NOT EXISTS idx_produtos_referencia_maquina ON produtos (referencia_maquina);
+CREATE TABLE IF NOT EXISTS pedidos (
+    posicao INTEGER PRIMARY KEY,
+    cliente TEXT,
+    ordem_compra TEXT,
+    data_entrega TEXT,
+    maquina TEXT,
+    dados TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pedidos_maquina ON pedidos (maquina);
+CREATE INDEX IF NOT EXISTS idx_pedidos_cliente ON pedidos (cliente);
+CREATE INDEX IF NOT EXISTS idx_pedidos_data_entrega ON pedidos (data_entrega);
+CREATE TABLE IF NOT EXISTS sincronizacao (
+    aba TEXT PRIMARY KEY,
+    etag TEXT NOT NULL,
+    sincronizado_em REAL NOT NULL
+);
+"""
+
+_ISO_TIMESTAMP = re.compile(r'^\d{4}-\d{2}-\d{2}T')
+
+
+def _valor_indexado(value: Any) -> Any:
+    """Valor de coluna indexada: vazio vira NULL (mesmo critério de _filtrar_vazios)"""
+    if value is None or value != value or not str(value).strip():
+        return None
+    return value
+
+
+def _data_indexada(value: Any) -> Any:
+    """Data de entrega como AAAA-MM-DD, igual a normalizeCellValue do Apps Script"""
+    value = _valor_indexado(value)
+    if isinstance(value, str) and _ISO_TIMESTAMP.match(value):
+        return value.split('T')[0]
+    return value
+
+
+class SQLiteRepository(DataRepository):
+    """
+    Cópia local da planilha com índices por máquina, referência, cliente e
+    data de entrega
+
+    A sincronização lê as abas pelo GoogleSheetsManager (cache, delta e
+    leituras condicionais) e regrava no banco apenas as abas cujo ETag mudou.
+    Escritas vão para a planilha e, confirmadas, disparam uma sincronização
+    para que a cópia local as reflita.
+    """
+
+    def __init__(self, db_path: str, source: GoogleSheetsManager, sync_interval: float = 60):
+        """
+        Inicializa o repositório criando o banco e as tabelas se necessário
+
+        Args:
+            db_path: Caminho do arquivo SQLite
+            source: GoogleSheetsManager usado para ler e escrever na planilha
+            sync_interval: Intervalo (segundos) da sincronização em segundo plano
+        """
+        self.db_path = db_path
+        self.source = source
+        self.sync_interval = sync_interval
+
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._synced = False
+
+        # Incrementado quando a sincronização altera o banco; invalida os
+        # DataFrames e o catálogo montados a partir dele
+        self._version = 0
+        self._dataframes: Dict[str, Tuple[int, pd.DataFrame]] = {}
+        self._catalog: Optional[Tuple[int, CatalogIndex]] = None
+
+        self._stats = {
+            'syncs': 0, 'sheets_updated': 0, 'errors': 0,
+            'last_sync': None, 'last_duration_ms': None, 'last_error': None
+        }
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Abre uma conexão por operação (segura entre threads), com commit ao final"""
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ---------- Sincronização ----------
+
+    def sync(self, force: bool = False) -> bool:
+        """
+        Espelha a planilha no banco local
+
+        Args:
+            force: Recarrega o snapshot completo da planilha antes de comparar
+
+        Returns:
+            True se a sincronização terminou sem erros
+        """
+        with self._sync_lock:
+            started = time.perf_counter()
+            try:
+                if force or not self._synced:
+                    # Uma única requisição preenche o cache de todas as abas
+                    self.source.load_snapshot(force=force)
+
+                updated = self._sync_sheets()
+                self._synced = True
+                self._stats['sheets_updated'] += updated
+                self._stats['last_error'] = None
+                return True
+
+            except Exception as e:
+                self._stats['errors'] += 1
+                self._stats['last_error'] = str(e)
+                print(f"Erro ao sincronizar a planilha com o banco local: {str(e)}")
+                return False
+
+            finally:
+                self._stats['syncs'] += 1
+                self._stats['last_sync'] = time.time()
+                self._stats['last_duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    def _sync_sheets(self) -> int:
+        """Compara o ETag de cada aba com o último sincronizado e regrava as alteradas"""
+        with self._connect() as conn:
+            synced = dict(conn.execute("SELECT aba, etag FROM sincronizacao"))
+
+        pedidos = self.source.get_sheet_rows('DADOS_GERAIS')
+        maquinas = list(dict.fromkeys(
+            p['MAQUINAS'] for p in pedidos if _valor_indexado(p.get('MAQUINAS')) is not None
+        ))
+
+        changed: Dict[str, List[Dict]] = {}
+        etags: Dict[str, str] = {}
+        abas = {'DADOS_GERAIS': pedidos}
+        for maquina in maquinas:
+            aba = self.sheet_name(maquina)
+            try:
+                abas[aba] = self.source.get_sheet_rows(aba)
+            except Exception as e:
+                # Aba ausente ou com erro: mantém a última cópia local dela
+                print(f"Aba {aba} não sincronizada: {str(e)}")
+
+        for aba, rows in abas.items():
+            etag = self.source.get_etag(f"sheet_{aba}") or self._hash(rows)
+            if synced.get(aba) != etag:
+                changed[aba] = rows
+                etags[aba] = etag
+
+        report = self.source.get_all_machines_availability_report()
+        with self._connect() as conn:
+            atual = dict(conn.execute("SELECT nome, disponibilidade FROM maquinas"))
+        # Máquinas com erro de leitura mantêm a última disponibilidade conhecida
+        availability = {
+            maquina: atual.get(maquina, horas) if maquina in report['errors'] else horas
+            for maquina, horas in report['availability'].items()
+        }
+
+        if not changed and availability == atual:
+            return 0
+
+        now = time.time()
+        with self._connect() as conn:
+            if availability != atual:
+                conn.execute("DELETE FROM maquinas")
+                conn.executemany(
+                    "INSERT INTO maquinas (nome, disponibilidade) VALUES (?, ?)",
+                    list(availability.items())
+                )
+
+            for aba, rows in changed.items():
+                if aba == 'DADOS_GERAIS':
+                    self._write_pedidos(conn, rows)
+                else:
+                    self._write_produtos(conn, aba, rows)
+                conn.execute(
+                    "INSERT OR REPLACE INTO sincronizacao (aba, etag, sincronizado_em) VALUES (?, ?, ?)",
+                    (aba, etags[aba], now)
+                )
+
+        self._version += 1
+        return len(changed)
+
+    @staticmethod
+    def _write_pedidos(conn: sqlite3.Connection, rows: List[Dict]):
+        """Substitui a tabela de pedidos pelas linhas da aba DADOS_GERAIS"""
+        conn.execute("DELETE FROM pedidos")
+        conn.executemany(
+            "INSERT INTO pedidos (posicao, cliente, ordem_compra, data_entrega, maquina, dados) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    posicao,
+                    _valor_indexado(row.get('CLIENTE')),
+                    _valor_indexado(row.get('ORDEM DE COMPRA')),
+                    _data_indexada(row.get('DATA DE ENTREGA')),
+                    _valor_indexado(row.get('MAQUINAS')),
+                    json.dumps(row, ensure_ascii=False, default=str)
+                )
+                for posicao, row in enumerate(rows)
+            ]
+        )
+
+    @staticmethod
+    def _write_produtos(conn: sqlite3.Connection, aba: str, rows: List[Dict]):
+        """Substitui os produtos de uma aba de máquina"""
+        conn.execute("DELETE FROM produtos WHERE aba = ?", (aba,))
+        conn.executemany(
+            "INSERT INTO produtos (aba, posicao, referencia_maquina, referencia, dados) VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    aba,
+                    posicao,
+                    _valor_indexado(row.get('REFERÊNCIAS/MÁQUINA')),
+                    _valor_indexado(row.get('REFERENCIA')),
+                    json.dumps(row, ensure_ascii=False, default=str)
+                )
+                for posicao, row in enumerate(rows)
+            ]
+        )
+
+    @staticmethod
+    def _hash(rows: List[Dict]) -> str:
+        """ETag das linhas quando o valor não está no cache em memória da origem"""
+        payload = json.dumps(rows, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:20]
+
+    def start_sync(self):
+        """Sincroniza agora e a cada sync_interval segundos em uma thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+
+        def run():
+            self.sync()
+            while not self._stop.wait(self.sync_interval):
+                self.sync()
+
+        self._thread = threading.Thread(target=run, name='sqlite-sync', daemon=True)
+        self._thread.start()
+
+    def stop_sync(self):
+        """Encerra a thread de sincronização"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def invalidate(self):
+        """Força a próxima leitura a recarregar o snapshot da planilha antes de responder"""
+        self._synced = False
+
+    def get_sync_stats(self) -> Dict[str, Any]:
+        """
+        Retorna contadores da sincronização
+
+        Returns:
+            Dicionário {syncs, sheets_updated, errors, last_sync,
+            last_duration_ms, last_error}
+        """
+        return dict(self._stats)
+
+    # ---------- Leitura ----------
+
+    def load_snapshot(self, force: bool = False) -> bool:
+        """
+        Sincroniza com a planilha se ainda não sincronizou (ou se force)
+
+        Returns:
+            True se há dados locais para responder, mesmo que a planilha
+            esteja inacessível
+        """
+        if force or not self._synced:
+            if not self.sync(force=force):
+                with self._connect() as conn:
+                    return conn.execute("SELECT 1 FROM sincronizacao LIMIT 1").fetchone() is not None
+        return True
+
+    def _distinct(self, column: str, where: str = '') -> List:
+        """Valores distintos não vazios de uma coluna de pedidos, na ordem da planilha"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {column} FROM pedidos WHERE {column} IS NOT NULL {where} "
+                f"GROUP BY {column} ORDER BY MIN(posicao)"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_maquinas(self) -> List[str]:
+        """Lista de máquinas (coluna MAQUINAS de DADOS_GERAIS)"""
+        return self._distinct('maquina')
+
+    def get_clientes(self) -> List[str]:
+        """Lista de clientes"""
+        return self._distinct('cliente')
+
+    def get_ordens(self) -> List[str]:
+        """Lista de ordens de compra"""
+        return self._distinct('ordem_compra')
+
+    def get_datas_entrega(self) -> List[str]:
+        """Lista de datas de entrega (AAAA-MM-DD)"""
+        return self._distinct('data_entrega')
+
+    def get_pedidos_cadastrados(self) -> List[Dict]:
+        """Pedidos com cliente e máquina, na ordem da planilha"""
+        return self._pedidos("cliente IS NOT NULL AND maquina IS NOT NULL")
+
+    def get_pedidos_por_cliente(self, cliente: str) -> List[Dict]:
+        """Pedidos de um cliente (usa o índice por cliente)"""
+        return self._pedidos("cliente = ? AND maquina IS NOT NULL", (cliente,))
+
+    def get_pedidos_por_periodo(self, inicio: str, fim: str) -> List[Dict]:
+        """
+        Pedidos com entrega no período (usa o índice por data de entrega)
+
+        Args:
+            inicio: Primeira data (AAAA-MM-DD), inclusive
+            fim: Última data (AAAA-MM-DD), inclusive
+        """
+        return self._pedidos(
+            "data_entrega BETWEEN ? AND ? AND cliente IS NOT NULL AND maquina IS NOT NULL",
+            (inicio, fim)
+        )
+
+    def _pedidos(self, where: str, params: Tuple = ()) -> List[Dict]:
+        """Linhas de DADOS_GERAIS que atendem ao filtro"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT dados FROM pedidos WHERE {where} ORDER BY posicao", params
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_produtos_por_maquina(self, maquina: str) -> pd.DataFrame:
+        """
+        Obtém produtos de uma máquina
+
+        Returns:
+            Cópia do DataFrame (montado uma vez por versão do banco)
+        """
+        aba = self.sheet_name(maquina)
+        entry = self._dataframes.get(aba)
+        if entry is None or entry[0] != self._version:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT dados FROM produtos WHERE aba = ? ORDER BY posicao", (aba,)
+                ).fetchall()
+            entry = (self._version, self.produtos_dataframe([json.loads(r[0]) for r in rows]))
+            self._dataframes[aba] = entry
+        return entry[1].copy()
+
+    def get_maquinas_por_referencia(self, referencia: str) -> List[str]:
+        """Abas DADOS_<MAQUINA> que produzem a referência (usa os índices por referência)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT aba FROM produtos WHERE referencia = ? "
+                "UNION SELECT aba FROM produtos WHERE referencia_maquina = ?",
+                (referencia, referencia)
+            ).fetchall()
+        return sorted(row[0] for row in rows)
+
+    def get_machine_availability(self, maquina: str) -> float:
+        """Horas disponíveis por dia da máquina, padrão 8.0 se não encontrada"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT disponibilidade FROM maquinas WHERE nome = ?", (maquina,)).fetchone()
+        return row[0] if row is not None else 8.0
+
+    def get_all_machines_availability(self) -> Dict[str, float]:
+        """Disponibilidade de todas as máquinas {maquina: horas}"""
+        with self._connect() as conn:
+            availability = dict(conn.execute("SELECT nome, disponibilidade FROM maquinas"))
+        return {maquina: availability.get(maquina, 8.0) for maquina in self.get_maquinas()}
+
+    def get_catalog(self) -> CatalogIndex:
+        """Índice do catálogo, reconstruído apenas quando o banco muda"""
+        catalog = self._catalog
+        if catalog is None or catalog[0] != self._version:
+            version = self._version
+            catalog = (version, CatalogIndex(
+                {maquina: self.get_produtos_por_maquina(maquina) for maquina in self.get_maquinas()}
+            ))
+            self._catalog = catalog
+        return catalog[1]
+
+    # ---------- Escrita (na planilha) ----------
+
+    def add_produto(self, produto_data: Dict) -> bool:
+        """Adiciona o produto na planilha e sincroniza a cópia local"""
+        return self._after_write(self.source.add_produto(produto_data))
+
+    def add_pedido(self, pedido_data: Dict) -> bool:
+        """Adiciona o pedido na planilha e sincroniza a cópia local"""
+        return self._after_write(self.source.add_pedido(pedido_data))
+
+    def add_pedidos(self, pedidos: List[Dict]) -> List[Dict]:
+        """Adiciona os pedidos na planilha e sincroniza a cópia local"""
+        results = self.source.add_pedidos(pedidos)
+        self._after_write(any(r.get('success') for r in results))
+        return results
+
+    def add_produtos(self, produtos: List[Dict]) -> List[Dict]:
+        """Adiciona os produtos na planilha e sincroniza a cópia local"""
+        results = self.source.add_produtos(produtos)
+        self._after_write(any(r.get('success') for r in results))
+        return results
+
+    def _after_write(self, success: bool) -> bool:
+        """Sincroniza depois de uma escrita confirmada (as chaves afetadas já foram invalidadas)"""
+        if success:
+            self.sync()
+        return success
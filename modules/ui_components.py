@@ -7,6 +7,8 @@ from typing import Dict, List
 import plotly.graph_objects as go
 import plotly.express as px
 
+from modules.sheet_schema import to_bool
+
 
 def render_product_card(produto: Dict, index: int = 0):
     """
@@ -37,7 +39,7 @@ def render_product_card(produto: Dict, index: int = 0):
                       f"{produto.get('TEMPO DE MONTAGEM', 0)}min")
 
         with col3:
-            if produto.get('MONTAGEM 2X2') == 'Sim':
+            if to_bool(produto.get('MONTAGEM 2X2')):
                 st.badge("2x2", type="secondary")
 
 
@@ -3,12 +3,24 @@ Módulo de Calendário de Trabalho
 Gerencia dias úteis, feriados e fins de semana para cálculo de datas de produção
 """
 
-from datetime import datetime, timedelta
-from typing import List, Dict, Set, Optional, Tuple
+from datetime import date as Date, datetime, timedelta
+from typing import Any, List, Dict, Set, Optional, Tuple
 import json
+import math
 import os
+import threading
 from pathlib import Path
 
+import numpy as np
+
+# Janela inicial do índice de dias úteis, em anos antes/depois do ano atual
+INDEX_YEARS_BEFORE = 2
+INDEX_YEARS_AFTER = 5
+# Máximo de dias sem nenhum dia útil antes de desistir da busca
+MAX_WORKDAY_GAP = 3660
+# Ordinal de 1970-01-01, a época do datetime64 do numpy
+EPOCH_ORDINAL = Date(1970, 1, 1).toordinal()
+
 
 class WorkdayCalendar:
     """Gerencia o calendário de trabalho com feriados e fins de semana"""
@@ -27,6 +39,12 @@ class WorkdayCalendar:
         self.work_by_default_saturday: bool = False  # Trabalha aos sábados por padrão
         self.work_by_default_sunday: bool = False  # Trabalha aos domingos por padrão
 
+        # Índice compilado: (ordinal do 1º dia, dia útil por dia, somas prefixadas)
+        self._index: Optional[Tuple[int, np.ndarray, np.ndarray]] = None
+        self._index_lock = threading.Lock()
+        # busdaycalendar do numpy derivado do índice: (índice de origem, calendário)
+        self._busdaycal: Optional[Tuple[Tuple, np.busdaycalendar]] = None
+
         self._ensure_config_dir()
         self._load_config()
 
@@ -52,6 +70,7 @@ class WorkdayCalendar:
                 self._create_default_config()
         else:
             self._create_default_config()
+        self._index = None
 
     def _create_default_config(self):
         """Cria configuração padrão"""
@@ -71,6 +90,8 @@ class WorkdayCalendar:
             'work_by_default_saturday': self.work_by_default_saturday,
             'work_by_default_sunday': self.work_by_default_sunday
         }
+        # Toda alteração de feriados/fins de semana passa por aqui
+        self._index = None
 
         with open(self.config_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
@@ -211,6 +232,98 @@ class WorkdayCalendar:
         self.working_sundays = set(sundays)
         self._save_config()
 
+    def _get_index(self, first: int, last: int) -> Tuple[int, np.ndarray, np.ndarray]:
+        """
+        Retorna o índice compilado cobrindo os ordinais first..last
+
+        Reconstrói o índice se foi invalidado (alteração de configuração) ou se
+        o intervalo pedido sai da janela atual, que então é ampliada.
+
+        Returns:
+            Tupla (ordinal do 1º dia, dia útil por dia, somas prefixadas), em
+            que prefix[i] é o número de dias úteis antes do dia i da janela
+        """
+        index = self._index
+        if index is not None and index[0] <= first and last < index[0] + len(index[1]):
+            return index
+
+        with self._index_lock:
+            index = self._index
+            if index is not None and index[0] <= first and last < index[0] + len(index[1]):
+                return index
+
+            year = datetime.now().year
+            start = Date(year - INDEX_YEARS_BEFORE, 1, 1).toordinal()
+            end = Date(year + INDEX_YEARS_AFTER, 12, 31).toordinal()
+            if index is not None:
+                start = min(start, index[0])
+                end = max(end, index[0] + len(index[1]) - 1)
+            # Amplia por anos inteiros para não reconstruir a cada data nova
+            if first < start:
+                start = Date(Date.fromordinal(first).year, 1, 1).toordinal()
+            if last > end:
+                end = Date(Date.fromordinal(last).year, 12, 31).toordinal()
+
+            self._index = self._build_index(start, end)
+            return self._index
+
+    def _build_index(self, start: int, end: int) -> Tuple[int, np.ndarray, np.ndarray]:
+        """Compila dia útil por dia e as somas prefixadas dos ordinais start..end"""
+        # Segunda = 0 ... domingo = 6, como em datetime.weekday()
+        weekdays = (np.arange(start, end + 1) - 1) % 7
+        workdays = weekdays < 5
+        workdays[weekdays == 5] = self.work_by_default_saturday
+        workdays[weekdays == 6] = self.work_by_default_sunday
+
+        def positions(dates: Set[str], weekday: Optional[int] = None) -> List[int]:
+            result = []
+            for date_str in dates:
+                try:
+                    day = datetime.strptime(date_str, "%d/%m/%Y").date()
+                except ValueError:
+                    continue
+                if start <= day.toordinal() <= end and (weekday is None or day.weekday() == weekday):
+                    result.append(day.toordinal() - start)
+            return result
+
+        workdays[positions(self.working_saturdays, 5)] = True
+        workdays[positions(self.working_sundays, 6)] = True
+        # Feriado prevalece sobre sábado/domingo de trabalho
+        workdays[positions(self.holidays)] = False
+
+        prefix = np.zeros(len(workdays) + 1, dtype=np.int64)
+        np.cumsum(workdays, out=prefix[1:])
+        return start, workdays, prefix
+
+    def _busday_calendar(self, first: int, last: int) -> Tuple[int, np.busdaycalendar]:
+        """
+        Retorna o busdaycalendar do numpy cobrindo os ordinais first..last
+
+        Todos os dias da semana contam (weekmask '1111111') e os dias não
+        úteis da janela do índice entram como feriados, o que representa
+        também os sábados/domingos de trabalho avulsos. Fora da janela todo
+        dia seria útil: quem usa confere que o resultado não passou dela.
+
+        Returns:
+            Tupla (ordinal do último dia da janela, calendário)
+        """
+        index = self._get_index(first, last)
+        cached = self._busdaycal
+        if cached is None or cached[0] is not index:
+            start, workdays, _ = index
+            holidays = (start - EPOCH_ORDINAL + np.flatnonzero(~workdays)).astype('datetime64[D]')
+            cached = (index, np.busdaycalendar(weekmask='1111111', holidays=holidays))
+            self._busdaycal = cached
+        return index[0] + len(index[1]) - 1, cached[1]
+
+    @staticmethod
+    def _as_datetime64(dates: Any) -> np.ndarray:
+        """Converte datas (datetime, date, texto ISO ou datetime64) em array datetime64"""
+        values = np.asarray(dates)
+        if values.dtype.kind != 'M':
+            values = values.astype('datetime64[us]')
+        return values
+
     def is_workday(self, date: datetime) -> bool:
         """
         Verifica se uma data é dia de trabalho
@@ -221,32 +334,36 @@ class WorkdayCalendar:
         Returns:
             True se é dia de trabalho, False caso contrário
         """
-        date_str = date.strftime("%d/%m/%Y")
-
-        # Verifica se é feriado
-        if date_str in self.holidays:
-            return False
+        ordinal = date.toordinal()
+        first, workdays, _ = self._get_index(ordinal, ordinal)
+        return bool(workdays[ordinal - first])
 
-        weekday = date.weekday()
+    def _nth_workday(self, ordinal: int, n: int) -> Optional[int]:
+        """
+        Localiza o n-ésimo dia útil a partir de um dia (inclusive)
 
-        # Verifica sábado (weekday = 5)
-        if weekday == 5:
-            # Se está na lista de sábados que trabalha, é dia de trabalho
-            if date_str in self.working_saturdays:
-                return True
-            # Se não está na lista, verifica o padrão
-            return self.work_by_default_saturday
+        Busca binária nas somas prefixadas; amplia a janela do índice se o
+        dia útil procurado estiver além dela.
 
-        # Verifica domingo (weekday = 6)
-        if weekday == 6:
-            # Se está na lista de domingos que trabalha, é dia de trabalho
-            if date_str in self.working_sundays:
-                return True
-            # Se não está na lista, verifica o padrão
-            return self.work_by_default_sunday
+        Args:
+            ordinal: Ordinal (date.toordinal()) do primeiro dia considerado
+            n: Posição do dia útil procurado (1 = primeiro dia útil)
 
-        # Segunda a sexta são dias de trabalho
-        return True
+        Returns:
+            Ordinal do n-ésimo dia útil, ou None se não houver dia útil
+            suficiente em MAX_WORKDAY_GAP dias além do estimado
+        """
+        # Estimativa folgada: n dias úteis com fins de semana e feriados
+        span = 2 * n + 366
+        while True:
+            first, _, prefix = self._get_index(ordinal, ordinal + span)
+            target = prefix[ordinal - first] + n
+            if prefix[-1] >= target:
+                # prefix[j + 1] = dias úteis até o dia j, inclusive
+                return first + int(np.searchsorted(prefix, target, side='left')) - 1
+            if span > 2 * n + MAX_WORKDAY_GAP:
+                return None
+            span *= 2
 
     def get_next_workday(self, date: datetime) -> datetime:
         """
@@ -258,16 +375,13 @@ class WorkdayCalendar:
         Returns:
             Próximo dia útil
         """
-        next_day = date + timedelta(days=1)
-
-        # Procura até encontrar um dia útil (máximo 365 dias)
-        for _ in range(365):
-            if self.is_workday(next_day):
-                return next_day
-            next_day += timedelta(days=1)
+        ordinal = date.toordinal()
+        next_ordinal = self._nth_workday(ordinal + 1, 1)
 
         # Se não encontrou em 1 ano, retorna a data original (erro)
-        return date
+        if next_ordinal is None or next_ordinal - ordinal > 365:
+            return date
+        return date + timedelta(days=next_ordinal - ordinal)
 
     def calculate_end_date(
         self,
@@ -278,6 +392,10 @@ class WorkdayCalendar:
         """
         Calcula a data de finalização considerando apenas dias úteis
 
+        Cada dia útil a partir do início (ou do próximo dia útil) consome
+        hours_per_day horas; a data final é o dia útil número
+        ceil(hours_needed / hours_per_day), localizado no índice compilado.
+
         Args:
             start_date: Data de início da produção
             hours_needed: Horas totais necessárias para produção
@@ -289,32 +407,21 @@ class WorkdayCalendar:
         if hours_per_day <= 0:
             raise ValueError("Horas por dia deve ser maior que zero")
 
-        current_date = start_date
-        hours_remaining = hours_needed
-        days_used = 0
-
         # Se a data de início não for dia útil, começa no próximo dia útil
+        current_date = start_date
         if not self.is_workday(current_date):
             current_date = self.get_next_workday(current_date)
 
-        # Calcula dia a dia
-        while hours_remaining > 0:
-            if self.is_workday(current_date):
-                # Desconta as horas disponíveis do dia
-                if hours_remaining >= hours_per_day:
-                    hours_remaining -= hours_per_day
-                    days_used += 1
-
-                    # Se ainda sobrou tempo, vai para o próximo dia útil
-                    if hours_remaining > 0:
-                        current_date = self.get_next_workday(current_date)
-                else:
-                    # Último dia parcial
-                    days_used += 1
-                    hours_remaining = 0
-            else:
-                # Pula para o próximo dia útil
-                current_date = self.get_next_workday(current_date)
+        days_used = 0
+        if hours_needed > 0:
+            # Dias cheios de hours_per_day mais o último dia parcial, se houver;
+            # a tolerância evita um dia a mais por erro de arredondamento quando
+            # hours_needed é múltiplo exato de hours_per_day
+            days_used = max(1, math.ceil(hours_needed / hours_per_day - 1e-9))
+            end_ordinal = self._nth_workday(start_date.toordinal(), days_used)
+            if end_ordinal is None:
+                raise ValueError("Calendário sem dias úteis suficientes para a produção")
+            current_date = start_date + timedelta(days=end_ordinal - start_date.toordinal())
 
         details = {
             'start_date': start_date.strftime("%d/%m/%Y"),
@@ -341,15 +448,99 @@ class WorkdayCalendar:
         if start_date > end_date:
             return 0
 
-        workdays = 0
-        current_date = start_date
+        # Dias start_date, start_date + 1, ... enquanto <= end_date
+        first = start_date.toordinal()
+        last = first + (end_date - start_date).days
+        index_first, _, prefix = self._get_index(first, last)
+        return int(prefix[last - index_first + 1] - prefix[first - index_first])
 
-        while current_date <= end_date:
-            if self.is_workday(current_date):
-                workdays += 1
-            current_date += timedelta(days=1)
+    def calculate_end_dates(
+        self,
+        start_dates: Any,
+        hours_needed: Any,
+        hours_per_day: Any
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Versão em lote de calculate_end_date, com busday_offset do numpy
+
+        Os argumentos são arrays (ou escalares, combinados por broadcasting).
+        Cada pedido é datado independentemente, como em chamadas separadas
+        de calculate_end_date.
+
+        Args:
+            start_dates: Datas de início (datetime, date, texto ISO ou datetime64)
+            hours_needed: Horas totais necessárias de cada pedido
+            hours_per_day: Horas disponíveis por dia
 
-        return workdays
+        Returns:
+            Tupla (datas finais em datetime64, com a hora do início; dias
+            úteis usados)
+        """
+        starts = self._as_datetime64(start_dates)
+        hours = np.asarray(hours_needed, dtype=np.float64)
+        per_day = np.asarray(hours_per_day, dtype=np.float64)
+        starts, hours, per_day = np.broadcast_arrays(starts, hours, per_day)
+
+        if np.any(per_day <= 0):
+            raise ValueError("Horas por dia deve ser maior que zero")
+
+        # Mesma contagem de calculate_end_date: ceil com tolerância, 0 se não há horas
+        days_used = np.where(
+            hours > 0,
+            np.maximum(1, np.ceil(hours / per_day - 1e-9)),
+            0
+        ).astype(np.int64)
+        if starts.size == 0:
+            return starts.copy(), days_used
+
+        start_days = starts.astype('datetime64[D]')
+        ordinals = start_days.astype(np.int64) + EPOCH_ORDINAL
+        max_days = int(days_used.max())
+        span = 2 * max_days + 366
+        while True:
+            last, busdaycal = self._busday_calendar(int(ordinals.min()), int(ordinals.max()) + span)
+            # roll='forward' começa no próximo dia útil se o início não for um
+            end_days = np.busday_offset(
+                start_days,
+                np.maximum(days_used - 1, 0),
+                roll='forward',
+                busdaycal=busdaycal
+            )
+            if int(end_days.max().astype(np.int64)) + EPOCH_ORDINAL <= last:
+                break
+            if span > 2 * max_days + MAX_WORKDAY_GAP:
+                raise ValueError("Calendário sem dias úteis suficientes para a produção")
+            span *= 2
+
+        return starts + (end_days - start_days), days_used
+
+    def count_workdays_batch(self, start_dates: Any, end_dates: Any) -> np.ndarray:
+        """
+        Versão em lote de count_workdays_between, com busday_count do numpy
+
+        Args:
+            start_dates: Datas iniciais (datetime, date, texto ISO ou datetime64)
+            end_dates: Datas finais, combinadas com as iniciais por broadcasting
+
+        Returns:
+            Array com o número de dias úteis de cada par (0 se início > fim)
+        """
+        starts, ends = np.broadcast_arrays(self._as_datetime64(start_dates), self._as_datetime64(end_dates))
+
+        # Dias start, start + 1, ... enquanto <= end, como em count_workdays_between
+        start_days = starts.astype('datetime64[D]')
+        spans = (ends - starts) // np.timedelta64(1, 'D')
+        last_days = start_days + spans.astype('timedelta64[D]')
+        valid = spans >= 0
+        if not np.any(valid):
+            return np.zeros(starts.shape, dtype=np.int64)
+
+        first = int(start_days[valid].min().astype(np.int64)) + EPOCH_ORDINAL
+        last = int(last_days[valid].max().astype(np.int64)) + EPOCH_ORDINAL
+        _, busdaycal = self._busday_calendar(first, last)
+
+        counts = np.busday_count(start_days, last_days + np.timedelta64(1, 'D'), busdaycal=busdaycal)
+        return np.where(valid, counts, 0).astype(np.int64)
 
     def get_summary(self) -> Dict[str, any]:
         """Retorna resumo da configuração do calendário"""
@@ -0,0 +1,167 @@
+"""
+Fila de escrita em lote (write-behind) para o Apps Script
+Agrupa escritas enviadas em uma janela curta em uma única chamada por tipo
+"""
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class WriteBehindQueue:
+    """
+    Acumula itens por `window` segundos e os envia em lote
+
+    Cada item recebe um Future resolvido somente depois que o Apps Script
+    confirma a gravação daquele item, com {'success': True, ...} ou
+    {'success': False, 'error': ...} (falhas nunca viram exceção no Future).
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[str, List[Dict]], List[Dict]],
+        window: float = 0.2,
+        max_batch: int = 200
+    ):
+        """
+        Inicializa a fila (a thread de envio é criada no primeiro item)
+
+        Args:
+            flush: Função (tipo, itens) → resultado por item, na mesma ordem
+            window: Espera (segundos) a partir do primeiro item do lote
+            max_batch: Máximo de itens por chamada; um lote cheio é enviado na hora
+        """
+        self._flush = flush
+        self.window = window
+        self.max_batch = max_batch
+
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[str, Dict, Future]] = []
+        # Futures do lote já retirado de _pending e ainda sendo enviado
+        self._inflight: List[Future] = []
+        self._first_at = 0.0
+        self._flush_now = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {'batches': 0, 'items': 0, 'failures': 0}
+
+    def submit(self, kind: str, item: Dict) -> Future:
+        """
+        Enfileira um item
+
+        Args:
+            kind: Tipo da escrita (ex: 'pedido', 'produto')
+            item: Dados do item
+
+        Returns:
+            Future com o resultado da gravação do item
+        """
+        future = Future()
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Fila de escrita encerrada")
+
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self._pending.append((kind, item, future))
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sheets-writer', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+        return future
+
+    def flush(self, timeout: Optional[float] = None):
+        """Envia imediatamente os itens pendentes e aguarda as confirmações (inclusive do lote em envio)"""
+        with self._cond:
+            futures = [future for _, _, future in self._pending] + self._inflight
+            if self._pending:
+                self._flush_now = True
+                self._cond.notify()
+
+        if futures:
+            wait(futures, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Envia os itens pendentes e encerra a thread de envio
+
+        A thread é daemon: quem encerra o processo deve chamar close para
+        não perder itens enfileirados ou em envio.
+        """
+        with self._cond:
+            self._closed = True
+            self._flush_now = True
+            self._cond.notify()
+            thread = self._thread
+
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retorna contadores da fila
+
+        Returns:
+            Dicionário {pending, batches, items, failures}
+        """
+        with self._cond:
+            return {'pending': len(self._pending), **self._stats}
+
+    def _run(self):
+        """Laço da thread de envio"""
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+
+                if not self._pending:
+                    return
+
+                # Espera a janela do lote, salvo se ele encher ou se pedirem flush
+                while not self._flush_now and len(self._pending) < self.max_batch:
+                    remaining = self._first_at + self.window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending
+                self._pending = []
+                self._inflight = [future for _, _, future in batch]
+                self._flush_now = False
+
+            try:
+                self._send(batch)
+            finally:
+                with self._cond:
+                    self._inflight = []
+
+    def _send(self, batch: List[Tuple[str, Dict, Future]]):
+        """Envia o lote agrupado por tipo e resolve o Future de cada item"""
+        by_kind: Dict[str, List[Tuple[Dict, Future]]] = {}
+        for kind, item, future in batch:
+            by_kind.setdefault(kind, []).append((item, future))
+
+        for kind, entries in by_kind.items():
+            for start in range(0, len(entries), self.max_batch):
+                chunk = entries[start:start + self.max_batch]
+                items = [item for item, _ in chunk]
+
+                try:
+                    results = self._flush(kind, items)
+                    if len(results) != len(items):
+                        raise ValueError("Resposta do lote com tamanho diferente do pedido")
+                except Exception as e:
+                    results = [{'success': False, 'error': str(e)} for _ in items]
+
+                failures = sum(1 for result in results if not result.get('success'))
+                with self._cond:
+                    self._stats['batches'] += 1
+                    self._stats['items'] += len(items)
+                    self._stats['failures'] += failures
+
+                for (_, future), result in zip(chunk, results):
+                    future.set_result(result)
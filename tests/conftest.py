@@ -0,0 +1,42 @@
+"""
+Configuração comum dos testes
+
+Permite importar o pacote modules ao rodar o pytest a partir de qualquer
+pasta e oferece o emulador do Apps Script e um GoogleSheetsManager ligado a
+ele, com o cache em disco em uma pasta temporária.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from apps_script_emulator import AppsScriptEmulator, SheetStore, start_server  # noqa: E402
+from modules.database_manager import GoogleSheetsManager  # noqa: E402
+from modules.disk_cache import DiskCache  # noqa: E402
+
+
+@pytest.fixture
+def emulator(monkeypatch):
+    """Emulador do Apps Script com uma planilha de demonstração pequena"""
+    store = SheetStore()
+    store.generate_demo(machines=3, products=30, orders=120)
+    emulator = AppsScriptEmulator(store)
+    server = start_server(emulator, port=0)
+    monkeypatch.setenv('GOOGLE_APPS_SCRIPT_URL', f"http://127.0.0.1:{server.server_port}/exec")
+    yield emulator
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def manager(emulator, tmp_path):
+    """GoogleSheetsManager apontado para o emulador, sem retentativas"""
+    manager = GoogleSheetsManager()
+    manager._disk_cache = DiskCache(str(tmp_path / 'cache.sqlite3'))
+    manager.limpar_cache()
+    manager.http.max_retries = 0
+    yield manager
+    manager.breaker.stop()
+    manager.close_writes(5)
@@ -0,0 +1,154 @@
+"""
+Testes do disjuntor (CircuitBreaker) e do último valor conhecido servido
+pelo GoogleSheetsManager quando o Apps Script está fora do ar
+"""
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from modules.circuit_breaker import CLOSED, OPEN, CircuitBreaker, CircuitOpenError
+from modules.http_client import AppsScriptClient
+
+
+def wait_for(condition, timeout=5.0):
+    """Aguarda a condição (sondagem em outra thread) ou falha o teste"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condição não atingida'
+        time.sleep(0.01)
+
+
+def test_opens_at_threshold_and_rejects_calls():
+    breaker = CircuitBreaker(failure_threshold=3)
+
+    for _ in range(2):
+        breaker.record_failure(ConnectionError('timeout'))
+    assert breaker.state == CLOSED
+
+    breaker.record_failure(ConnectionError('timeout'))
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError, match='timeout'):
+        breaker.check()
+    assert not breaker.allow()
+
+    stats = breaker.stats()
+    assert stats['opened'] == 1
+    assert stats['rejected'] == 2
+
+
+def test_success_resets_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3)
+
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+
+    assert breaker.state == CLOSED
+    assert breaker.stats()['failures'] == 2
+
+
+def test_probe_closes_circuit_and_calls_on_close():
+    attempts = []
+    closed = []
+
+    def probe():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError('ainda fora do ar')
+
+    breaker = CircuitBreaker(failure_threshold=1, probe_interval=0.01, probe=probe, on_close=lambda: closed.append(1))
+    breaker.record_failure(ConnectionError('timeout'))
+
+    wait_for(lambda: breaker.state == CLOSED)
+    assert len(attempts) == 3
+    assert closed == [1]
+    assert breaker.stats()['probes'] == 3
+
+
+def http_error(status):
+    """Exceção com a resposta HTTP, como a de raise_for_status"""
+    error = Exception(f'HTTP {status}')
+    error.response = SimpleNamespace(status_code=status)
+    return error
+
+
+@pytest.mark.parametrize('error, outage', [
+    (http_error(500), True),
+    (http_error(503), True),
+    (http_error(429), True),
+    (http_error(400), False),
+    (http_error(404), False),
+    (ValueError('JSON inválido'), False),
+])
+def test_only_outages_count_as_failures(error, outage):
+    assert AppsScriptClient._is_outage(error) is outage
+
+
+def test_last_known_good_is_served_while_apps_script_is_down(manager, emulator):
+    rows = manager.get_sheet_rows('DADOS_M1')
+    emulator.error_rate = 1.0
+    # Vence a entrada: a próxima leitura precisa ir ao Apps Script
+    manager._memory.touch('sheet_DADOS_M1', 0.0, manager.cache_ttl)
+
+    assert manager.get_sheet_rows('DADOS_M1') == rows
+
+    staleness = manager.get_staleness()
+    assert staleness['stale']
+    assert 'sheet_DADOS_M1' in staleness['keys']
+    assert staleness['unavailable'] == []
+
+
+def test_cold_keys_are_marked_unavailable(manager, emulator):
+    emulator.error_rate = 1.0
+
+    assert manager.get_pedidos_cadastrados() == []
+
+    staleness = manager.get_staleness()
+    assert staleness['stale']
+    assert 'pedidos_cadastrados' in staleness['unavailable']
+
+
+def test_orders_inherit_age_of_last_known_sheet(manager, emulator):
+    manager.get_sheet_rows('DADOS_GERAIS')
+    fetched_at = manager._memory.peek('sheet_DADOS_GERAIS')[1]
+    emulator.error_rate = 1.0
+    # Aba vencida além do hard_ttl: a leitura precisa ir ao Apps Script
+    age = manager.hard_ttl + 600
+    manager._memory.touch('sheet_DADOS_GERAIS', fetched_at - age, manager.cache_ttl)
+
+    pedidos = manager.get_pedidos_cadastrados()
+
+    assert pedidos
+    staleness = manager.get_staleness()
+    # Os pedidos montados agora ficam com a idade da aba de origem
+    assert staleness['keys']['pedidos_cadastrados'] >= age
+    assert 'pedidos_cadastrados' not in staleness['unavailable']
+
+
+def test_circuit_opens_on_outage_and_recovery_refreshes_stale_keys(manager, emulator):
+    manager.breaker.failure_threshold = 2
+    manager.breaker.probe_interval = 0.05
+    rows = manager.get_sheet_rows('DADOS_M1')
+    emulator.error_rate = 1.0
+
+    for _ in range(2):
+        manager._memory.touch('sheet_DADOS_M1', 0.0, manager.cache_ttl)
+        assert manager.get_sheet_rows('DADOS_M1') == rows
+    assert manager.breaker.state == OPEN
+
+    # Circuito aberto: a busca é recusada na hora e vale o último valor conhecido
+    requests_before = emulator.stats['requests']
+    manager._memory.touch('sheet_DADOS_M1', 0.0, manager.cache_ttl)
+    assert manager.get_sheet_rows('DADOS_M1') == rows
+    assert manager.breaker.stats()['rejected'] >= 1
+
+    emulator.store.sheets['DADOS_M1'][1][0] = 'REF-RECUPERADA'
+    emulator.store.record_change('DADOS_M1', 0, 0)
+    emulator.error_rate = 0.0
+
+    wait_for(lambda: manager.breaker.state == CLOSED and not manager.get_staleness()['stale'])
+    assert emulator.stats['requests'] > requests_before
+    assert manager.get_sheet_rows('DADOS_M1')[0]['REFERÊNCIAS/MÁQUINA'] == 'REF-RECUPERADA'
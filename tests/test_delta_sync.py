@@ -0,0 +1,144 @@
+"""
+Testes da sincronização incremental das abas (getSheetDelta)
+
+_merge_delta é testado isoladamente; a sincronização completa roda contra
+o emulador do Apps Script, comparando com uma leitura completa da aba.
+"""
+import asyncio
+
+import pytest
+
+from modules.async_database_manager import AsyncGoogleSheetsManager
+from modules.database_manager import GoogleSheetsManager
+
+HEADERS = ['CLIENTE', 'ORDEM DE COMPRA', 'BOCAS']
+
+
+def table(*rows):
+    return {'headers': list(HEADERS), 'rows': [list(row) for row in rows]}
+
+
+def test_merge_without_changes_keeps_same_object():
+    base = table(['A', 'OC-1', 2])
+    assert GoogleSheetsManager._merge_delta(base, {'total': 1, 'changes': []}) is base
+
+
+def test_merge_replaces_and_appends_compact_rows():
+    base = table(['A', 'OC-1', 2], ['B', 'OC-2', 4])
+    delta = {
+        'total': 3,
+        'headers': list(HEADERS),
+        'changes': [{'row': 2, 'values': ['C', 'OC-3']}, {'row': 0, 'values': ['A', 'OC-1', 8]}]
+    }
+
+    merged = GoogleSheetsManager._merge_delta(base, delta)
+
+    assert merged['headers'] == HEADERS
+    # Células vazias do final voltam como ''
+    assert merged['rows'] == [['A', 'OC-1', 8], ['B', 'OC-2', 4], ['C', 'OC-3', '']]
+    assert base['rows'][0] == ['A', 'OC-1', 2]
+
+
+def test_merge_maps_object_rows_to_table_headers():
+    base = table(['A', 'OC-1', 2])
+    delta = {'total': 1, 'changes': [{'row': 0, 'values': {'BOCAS': 4, 'CLIENTE': 'Z'}}]}
+
+    assert GoogleSheetsManager._merge_delta(base, delta)['rows'] == [['Z', '', 4]]
+
+
+def test_merge_truncates_removed_rows():
+    base = table(['A', 'OC-1', 2], ['B', 'OC-2', 4], ['C', 'OC-3', 1])
+    delta = {'total': 2, 'headers': list(HEADERS), 'changes': [{'row': 1, 'values': ['B', 'OC-9', 4]}]}
+
+    assert GoogleSheetsManager._merge_delta(base, delta)['rows'] == [['A', 'OC-1', 2], ['B', 'OC-9', 4]]
+
+
+@pytest.mark.parametrize('delta', [
+    # Falta a linha 1 para chegar à linha 2
+    {'total': 3, 'headers': HEADERS, 'changes': [{'row': 2, 'values': ['C', 'OC-3', 1]}]},
+    # Total maior que as linhas conhecidas, sem as linhas novas
+    {'total': 5, 'changes': []},
+    # Cabeçalho mudou (coluna nova)
+    {'total': 1, 'headers': HEADERS + ['NOVA'], 'changes': [{'row': 0, 'values': ['A', 'OC-1', 2, 'x']}]},
+    # Linha como objeto com coluna que a tabela não tem
+    {'total': 1, 'changes': [{'row': 0, 'values': {'NOVA': 'x'}}]},
+])
+def test_merge_returns_none_when_delta_does_not_fit(delta):
+    assert GoogleSheetsManager._merge_delta(table(['A', 'OC-1', 2]), delta) is None
+
+
+def full_read(manager, sheet_name):
+    """Linhas da aba por uma leitura completa (getSheet, sem revisão)"""
+    manager.delta_sync = False
+    return manager._table_records(manager._fetch_sheet(sheet_name))
+
+
+def delta_calls(manager):
+    return manager.get_http_stats().get('getSheetDelta', {}).get('calls', 0)
+
+
+@pytest.mark.parametrize('compact', [True, False])
+def test_delta_sync_applies_edits_and_appends(manager, emulator, compact):
+    manager.compact_format = compact
+    store = emulator.store
+    first = manager.get_sheet_rows('DADOS_GERAIS')
+
+    # Edição de uma linha e duas linhas novas
+    store.sheets['DADOS_GERAIS'][3][0] = 'CLIENTE ALTERADO'
+    store.record_change('DADOS_GERAIS', 2, 2)
+    store.append_rows('DADOS_GERAIS', [['NOVO 1', 'OC-1', '', 'M1', 2], ['NOVO 2', 'OC-2', '', 'M2', 4]])
+    manager.invalidate('sheet_DADOS_GERAIS')
+
+    synced = manager.get_sheet_rows('DADOS_GERAIS')
+
+    assert delta_calls(manager) == 2
+    assert len(synced) == len(first) + 2
+    assert synced[2]['CLIENTE'] == 'CLIENTE ALTERADO'
+    assert synced[-1]['CLIENTE'] == 'NOVO 2'
+    assert synced == full_read(manager, 'DADOS_GERAIS')
+
+
+def test_delta_without_changes_keeps_cached_table(manager):
+    table_before = manager._sheet_table('DADOS_M1')
+    # Expira a entrada (além do hard_ttl) mantendo-a como base do delta
+    manager._memory.touch('sheet_DADOS_M1', 0.0, manager.cache_ttl)
+
+    # A mesma tabela: DataFrames e índices memorizados continuam valendo
+    assert manager._sheet_table('DADOS_M1') is table_before
+    assert delta_calls(manager) == 2
+
+
+def test_async_delta_without_changes_keeps_cached_table(manager):
+    async def run():
+        async_manager = AsyncGoogleSheetsManager(manager)
+        try:
+            table_before = await async_manager._sheet_table('DADOS_M1')
+            manager._memory.touch('sheet_DADOS_M1', 0.0, manager.cache_ttl)
+            return table_before, await async_manager._sheet_table('DADOS_M1')
+        finally:
+            await async_manager.close()
+
+    table_before, table_after = asyncio.run(run())
+
+    assert table_after is table_before
+
+
+def test_conditional_read_keeps_cached_table_when_not_modified(manager):
+    manager.delta_sync = False
+    table_before = manager._sheet_table('DADOS_M1')
+    manager._memory.touch('sheet_DADOS_M1', 0.0, manager.cache_ttl)
+
+    # getSheet com ifNoneMatch: "não modificado" reaproveita a tabela em cache
+    assert manager._sheet_table('DADOS_M1') is table_before
+    assert manager.get_http_stats()['getSheet']['calls'] == 2
+
+
+def test_structural_change_reloads_whole_sheet(manager, emulator):
+    store = emulator.store
+    manager.get_sheet_rows('DADOS_M2')
+
+    del store.sheets['DADOS_M2'][1:4]
+    store.record_change('DADOS_M2')
+    manager.invalidate('sheet_DADOS_M2')
+
+    assert manager.get_sheet_rows('DADOS_M2') == full_read(manager, 'DADOS_M2')
@@ -0,0 +1,82 @@
+"""
+Testes do MemoryCache: ordem LRU e orçamento de entradas e bytes
+"""
+from modules.memory_cache import MemoryCache, estimate_size
+
+
+def payload(n):
+    """Valor no formato da planilha com n linhas"""
+    return [{'REFERENCIA': f'REF-{i:04d}', 'TEMPO': i * 0.5} for i in range(n)]
+
+
+def test_estimate_size_counts_nested_values_once():
+    shared = 'x' * 1000
+    single = estimate_size([shared])
+    # O texto repetido não é somado de novo, só a referência a mais na lista
+    assert single < estimate_size([shared, shared]) < single + len(shared)
+    assert estimate_size(payload(100)) > estimate_size(payload(10)) > 0
+
+
+def test_get_refreshes_lru_order_and_peek_does_not():
+    cache = MemoryCache(max_entries=2, max_bytes=0)
+    cache.set('a', 1, 0.0, 60)
+    cache.set('b', 2, 0.0, 60)
+
+    cache.peek('a')
+    cache.set('c', 3, 0.0, 60)
+    assert 'a' not in cache
+
+    cache.set('a', 1, 0.0, 60)
+    cache.get('c')
+    cache.set('d', 4, 0.0, 60)
+    assert 'a' not in cache
+    assert 'c' in cache and 'd' in cache
+
+
+def test_byte_budget_evicts_least_recently_used():
+    size = estimate_size(payload(50))
+    cache = MemoryCache(max_entries=0, max_bytes=int(size * 2.5))
+
+    for key in ('a', 'b'):
+        cache.set(key, payload(50), 0.0, 60)
+    cache.get('a')
+    cache.set('c', payload(50), 0.0, 60)
+
+    assert 'b' not in cache
+    assert 'a' in cache and 'c' in cache
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['bytes'] <= stats['max_bytes']
+
+
+def test_value_larger_than_budget_is_not_kept():
+    cache = MemoryCache(max_entries=0, max_bytes=estimate_size(payload(10)))
+    cache.set('small', payload(1), 0.0, 60)
+    cache.set('big', payload(100), 0.0, 60)
+
+    assert 'big' not in cache
+    assert 'small' in cache
+    assert cache.stats()['evictions'] == 1
+
+
+def test_replacing_and_removing_keep_byte_total():
+    cache = MemoryCache(max_entries=0, max_bytes=0)
+    cache.set('a', payload(100), 0.0, 60)
+    cache.set('a', payload(10), 0.0, 60)
+    assert cache.stats()['bytes'] == estimate_size(payload(10))
+
+    cache.pop('a')
+    assert cache.stats()['bytes'] == 0
+    assert len(cache) == 0
+
+
+def test_touch_renews_meta_without_reestimating():
+    cache = MemoryCache()
+    value = payload(5)
+    cache.set('a', value, 1.0, 60)
+    before = cache.stats()['bytes']
+
+    assert cache.touch('a', 2.0, 120)
+    assert cache.peek('a') == (value, 2.0, 120)
+    assert cache.stats()['bytes'] == before
+    assert not cache.touch('missing', 2.0, 120)
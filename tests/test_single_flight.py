@@ -0,0 +1,145 @@
+"""
+Testes da coalescência de buscas concorrentes (SingleFlight) e do seu uso
+pelo cache do GoogleSheetsManager
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules.single_flight import SingleFlight
+
+
+def blocking_fetch(started, release, value='valor'):
+    """Busca que sinaliza o início e só termina quando liberada"""
+    calls = []
+
+    def fetch():
+        calls.append(threading.get_ident())
+        started.set()
+        assert release.wait(5)
+        return value
+
+    return fetch, calls
+
+
+def test_concurrent_threads_share_one_fetch():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    fetch, calls = blocking_fetch(started, release)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        leader = pool.submit(flight.do, 'chave', fetch)
+        assert started.wait(5)
+        followers = [pool.submit(flight.do, 'chave', fetch) for _ in range(4)]
+        while flight.stats()['coalesced'] < 4:
+            time.sleep(0.01)
+        release.set()
+        results = [leader.result(5)] + [future.result(5) for future in followers]
+
+    assert results == ['valor'] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {'fetches': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_error_reaches_every_waiter_and_frees_key():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing_fetch():
+        started.set()
+        assert release.wait(5)
+        raise ConnectionError('Apps Script fora do ar')
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, 'chave', failing_fetch)]
+        assert started.wait(5)
+        futures += [pool.submit(flight.do, 'chave', failing_fetch) for _ in range(2)]
+        while flight.stats()['coalesced'] < 2:
+            time.sleep(0.01)
+        release.set()
+        for future in futures:
+            with pytest.raises(ConnectionError):
+                future.result(5)
+
+    # A chave é liberada: a próxima chamada busca de novo
+    assert not flight.in_flight('chave')
+    assert flight.do('chave', lambda: 'novo') == 'novo'
+
+
+def test_nested_call_on_leader_thread_fetches_on_its_own():
+    flight = SingleFlight()
+
+    # Aguardar a própria busca travaria a thread
+    value = flight.do('chave', lambda: flight.do('chave', lambda: 'interno') + '/externo')
+
+    assert value == 'interno/externo'
+    assert flight.stats()['fetches'] == 2
+
+
+def test_coroutines_share_one_fetch():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'valor'
+
+    async def run():
+        return await asyncio.gather(*(flight.do_async('chave', fetch) for _ in range(5)))
+
+    assert asyncio.run(run()) == ['valor'] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {'fetches': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_thread_waits_for_coroutine_fetch():
+    flight = SingleFlight()
+    started = threading.Event()
+    results = []
+
+    async def fetch():
+        started.set()
+        await asyncio.sleep(0.1)
+        return 'valor'
+
+    def thread_call():
+        assert started.wait(5)
+        results.append(flight.do('chave', lambda: 'da thread'))
+
+    thread = threading.Thread(target=thread_call)
+    thread.start()
+    assert asyncio.run(flight.do_async('chave', fetch)) == 'valor'
+    thread.join(5)
+
+    assert results == ['valor']
+
+
+def test_manager_coalesces_cold_sheet_reads(manager):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: manager.get_sheet_rows('DADOS_GERAIS'), range(8)))
+
+    assert all(rows == results[0] for rows in results)
+    assert manager.get_http_stats()['getSheetDelta']['calls'] == 1
+
+
+def test_fetch_started_before_invalidation_is_not_joined_or_stored(manager):
+    started, release = threading.Event(), threading.Event()
+    old_fetch, _ = blocking_fetch(started, release, value='antigo')
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        old = pool.submit(manager._cached, 'chave_teste', old_fetch)
+        assert started.wait(5)
+        manager.invalidate('chave_teste')
+
+        # Nova geração: não aguarda a busca antiga
+        assert manager._cached('chave_teste', lambda: 'novo') == 'novo'
+
+        release.set()
+        assert old.result(5) == 'antigo'
+
+    # A busca antiga termina depois e não sobrescreve o valor novo
+    assert manager._cached('chave_teste', lambda: 'outro') == 'novo'
@@ -0,0 +1,268 @@
+"""
+Testes do WorkdayCalendar contra a implementação original em laço
+
+LoopCalendar reproduz os laços dia a dia da versão anterior (is_workday,
+get_next_workday, calculate_end_date e count_workdays_between) e serve de
+referência para a forma fechada (índice com somas prefixadas e
+busday_offset/busday_count do numpy), com calendários, feriados, horários
+de início e durações aleatórios.
+
+Diferença conhecida: quando hours_needed é múltiplo exato de hours_per_day
+(k dias cheios), o laço subtrai hours_per_day k vezes e o erro acumulado de
+ponto flutuante pode deixar um resto positivo minúsculo, que conta como um
+dia a mais (k + 1). A forma fechada usa ceil(horas / horas_por_dia) com
+tolerância e sempre devolve k dias.
+"""
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from modules.workday_calendar import WorkdayCalendar
+
+SEEDS = range(12)
+CASES_PER_SEED = 150
+BASE = datetime(2026, 1, 1)
+
+
+class LoopCalendar:
+    """Implementação original em laço, usada como referência"""
+
+    def __init__(self, holidays, working_saturdays, working_sundays, work_saturday, work_sunday):
+        self.holidays = set(holidays)
+        self.working_saturdays = set(working_saturdays)
+        self.working_sundays = set(working_sundays)
+        self.work_by_default_saturday = work_saturday
+        self.work_by_default_sunday = work_sunday
+
+    def is_workday(self, date):
+        date_str = date.strftime("%d/%m/%Y")
+
+        if date_str in self.holidays:
+            return False
+
+        weekday = date.weekday()
+        if weekday == 5:
+            if date_str in self.working_saturdays:
+                return True
+            return self.work_by_default_saturday
+
+        if weekday == 6:
+            if date_str in self.working_sundays:
+                return True
+            return self.work_by_default_sunday
+
+        return True
+
+    def get_next_workday(self, date):
+        next_day = date + timedelta(days=1)
+
+        for _ in range(365):
+            if self.is_workday(next_day):
+                return next_day
+            next_day += timedelta(days=1)
+
+        return date
+
+    def calculate_end_date(self, start_date, hours_needed, hours_per_day):
+        """Retorna (data final, dias úteis usados)"""
+        if hours_per_day <= 0:
+            raise ValueError("Horas por dia deve ser maior que zero")
+
+        current_date = start_date
+        hours_remaining = hours_needed
+        days_used = 0
+
+        if not self.is_workday(current_date):
+            current_date = self.get_next_workday(current_date)
+
+        while hours_remaining > 0:
+            if self.is_workday(current_date):
+                if hours_remaining >= hours_per_day:
+                    hours_remaining -= hours_per_day
+                    days_used += 1
+
+                    if hours_remaining > 0:
+                        current_date = self.get_next_workday(current_date)
+                else:
+                    days_used += 1
+                    hours_remaining = 0
+            else:
+                current_date = self.get_next_workday(current_date)
+
+        return current_date, days_used
+
+    def count_workdays_between(self, start_date, end_date):
+        if start_date > end_date:
+            return 0
+
+        workdays = 0
+        current_date = start_date
+        while current_date <= end_date:
+            if self.is_workday(current_date):
+                workdays += 1
+            current_date += timedelta(days=1)
+
+        return workdays
+
+
+def random_dates(rng, count, weekday=None):
+    """Datas DD/MM/YYYY aleatórias em torno do período testado"""
+    dates = []
+    while len(dates) < count:
+        day = BASE + timedelta(days=rng.randrange(-60, 1100))
+        if weekday is None or day.weekday() == weekday:
+            dates.append(day.strftime("%d/%m/%Y"))
+    return dates
+
+
+def build_calendars(rng, tmp_path):
+    """Par (WorkdayCalendar, LoopCalendar) com a mesma configuração aleatória"""
+    holidays = random_dates(rng, rng.randrange(0, 120))
+    saturdays = random_dates(rng, rng.randrange(0, 30), weekday=5)
+    sundays = random_dates(rng, rng.randrange(0, 30), weekday=6)
+    # Datas fora do dia da semana também são aceitas e devem ser ignoradas
+    saturdays += random_dates(rng, 3)
+    sundays += random_dates(rng, 3)
+    work_saturday = rng.random() < 0.3
+    work_sunday = rng.random() < 0.2
+
+    calendar = WorkdayCalendar(str(tmp_path / f"calendar_{rng.random()}.json"))
+    calendar.add_holidays(holidays)
+    calendar.set_working_weekend_dates(saturdays, sundays)
+    calendar.set_weekend_working(work_saturday, work_sunday)
+
+    reference = LoopCalendar(holidays, saturdays, sundays, work_saturday, work_sunday)
+    return calendar, reference
+
+
+def random_start(rng):
+    """Início aleatório, com hora e minuto (nem sempre em dia útil)"""
+    return BASE + timedelta(days=rng.randrange(0, 700), hours=rng.randrange(24), minutes=rng.randrange(60))
+
+
+def random_hours_per_day(rng):
+    return rng.choice([8, 16, 24, 7.5, 0.5, 0.1, 1 / 3, rng.uniform(0.1, 24)])
+
+
+def random_hours(rng, hours_per_day):
+    """Duração que não é múltiplo exato de hours_per_day (ou não positiva)"""
+    kind = rng.random()
+    if kind < 0.1:
+        return rng.choice([0, 0.0, -1.5, -hours_per_day])
+    while True:
+        # Até ~400 dias de produção, para o laço de referência não demorar
+        if kind < 0.6:
+            hours = rng.uniform(0.001, 400) * hours_per_day
+        else:
+            hours = min(rng.randrange(1, 5000) * rng.uniform(0.5, 3) / 60, 400 * hours_per_day)
+        ratio = hours / hours_per_day
+        if abs(ratio - round(ratio)) > 1e-6:
+            return hours
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_is_workday_and_next_workday_match_loop(seed, tmp_path):
+    rng = random.Random(seed)
+    calendar, reference = build_calendars(rng, tmp_path)
+
+    for _ in range(CASES_PER_SEED):
+        date = random_start(rng)
+        assert calendar.is_workday(date) == reference.is_workday(date)
+        assert calendar.get_next_workday(date) == reference.get_next_workday(date)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_calculate_end_date_matches_loop(seed, tmp_path):
+    rng = random.Random(seed)
+    calendar, reference = build_calendars(rng, tmp_path)
+
+    for _ in range(CASES_PER_SEED):
+        start = random_start(rng)
+        hours_per_day = random_hours_per_day(rng)
+        hours = random_hours(rng, hours_per_day)
+
+        end_date, details = calendar.calculate_end_date(start, hours, hours_per_day)
+        expected_end, expected_days = reference.calculate_end_date(start, hours, hours_per_day)
+
+        assert end_date == expected_end, (start, hours, hours_per_day)
+        assert details['workdays_used'] == expected_days
+        assert details['end_date'] == expected_end.strftime("%d/%m/%Y")
+        assert details['total_days'] == (expected_end - start).days + 1
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_calculate_end_date_exact_multiple(seed, tmp_path):
+    """
+    Múltiplo exato (k dias cheios): a forma fechada usa k dias; o laço
+    usa k ou k + 1, conforme o resto deixado pela subtração repetida
+    """
+    rng = random.Random(seed)
+    calendar, reference = build_calendars(rng, tmp_path)
+
+    for _ in range(CASES_PER_SEED):
+        start = random_start(rng)
+        hours_per_day = random_hours_per_day(rng)
+        days = rng.randrange(1, 400)
+        hours = days * hours_per_day
+
+        end_date, details = calendar.calculate_end_date(start, hours, hours_per_day)
+        expected_end, expected_days = reference.calculate_end_date(start, hours, hours_per_day)
+
+        assert details['workdays_used'] == days
+        if expected_days == days:
+            assert end_date == expected_end
+        else:
+            # Dia a mais do laço por erro de arredondamento
+            assert expected_days == days + 1
+            assert reference.get_next_workday(end_date) == expected_end
+
+
+def test_calculate_end_date_exact_multiple_known_difference(tmp_path):
+    """Caso concreto em que o laço conta um dia a mais"""
+    calendar = WorkdayCalendar(str(tmp_path / "calendar.json"))
+    reference = LoopCalendar([], [], [], False, False)
+    start = datetime(2026, 3, 2, 7)  # Segunda-feira
+
+    # 0.1 * 3 = 0.30000000000000004: o laço termina com resto positivo
+    end_date, details = calendar.calculate_end_date(start, 0.1 * 3, 0.1)
+    expected_end, expected_days = reference.calculate_end_date(start, 0.1 * 3, 0.1)
+
+    assert details['workdays_used'] == 3
+    assert end_date == datetime(2026, 3, 4, 7)
+    assert expected_days == 4
+    assert expected_end == datetime(2026, 3, 5, 7)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_count_workdays_between_matches_loop(seed, tmp_path):
+    rng = random.Random(seed)
+    calendar, reference = build_calendars(rng, tmp_path)
+
+    for _ in range(CASES_PER_SEED):
+        start = random_start(rng)
+        end = start + timedelta(days=rng.randrange(-30, 400), hours=rng.randrange(-12, 12))
+        assert calendar.count_workdays_between(start, end) == reference.count_workdays_between(start, end)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_batch_apis_match_loop(seed, tmp_path):
+    rng = random.Random(seed)
+    calendar, reference = build_calendars(rng, tmp_path)
+
+    starts = [random_start(rng) for _ in range(CASES_PER_SEED)]
+    per_day = [random_hours_per_day(rng) for _ in starts]
+    hours = [random_hours(rng, hpd) for hpd in per_day]
+    ends = [start + timedelta(days=rng.randrange(-30, 400), hours=rng.randrange(-12, 12)) for start in starts]
+
+    end_dates, days_used = calendar.calculate_end_dates(np.array(starts, dtype='datetime64[us]'), hours, per_day)
+    expected = [reference.calculate_end_date(s, h, hpd) for s, h, hpd in zip(starts, hours, per_day)]
+    assert end_dates.tolist() == [end for end, _ in expected]
+    assert days_used.tolist() == [days for _, days in expected]
+
+    counts = calendar.count_workdays_batch(
+        np.array(starts, dtype='datetime64[us]'),
+        np.array(ends, dtype='datetime64[us]')
+    )
+    assert counts.tolist() == [reference.count_workdays_between(s, e) for s, e in zip(starts, ends)]
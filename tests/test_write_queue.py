@@ -0,0 +1,147 @@
+"""
+Testes da fila de escrita em lote (WriteBehindQueue) e das escritas
+enfileiradas do GoogleSheetsManager
+"""
+import threading
+import time
+
+import pytest
+
+from modules.write_queue import WriteBehindQueue
+
+
+class RecordingFlush:
+    """Função de envio que registra os lotes e confirma cada item"""
+
+    def __init__(self, results=None):
+        self.batches = []
+        self.results = results
+
+    def __call__(self, kind, items):
+        self.batches.append((kind, list(items)))
+        if self.results is not None:
+            return self.results(items)
+        return [{'success': True, 'row': item['n']} for item in items]
+
+
+def test_items_in_window_are_sent_in_one_call_per_kind():
+    flush = RecordingFlush()
+    queue = WriteBehindQueue(flush, window=0.1)
+
+    futures = [queue.submit('pedido', {'n': n}) for n in range(3)]
+    futures.append(queue.submit('produto', {'n': 9}))
+    results = [future.result(5) for future in futures]
+    queue.close(5)
+
+    assert sorted(kind for kind, _ in flush.batches) == ['pedido', 'produto']
+    assert results == [{'success': True, 'row': n} for n in (0, 1, 2, 9)]
+    assert queue.stats() == {'pending': 0, 'batches': 2, 'items': 4, 'failures': 0}
+
+
+def test_full_batch_is_sent_without_waiting_for_window():
+    flush = RecordingFlush()
+    queue = WriteBehindQueue(flush, window=30, max_batch=3)
+
+    futures = [queue.submit('pedido', {'n': n}) for n in range(3)]
+
+    assert [future.result(5)['row'] for future in futures] == [0, 1, 2]
+    assert len(flush.batches) == 1
+    queue.close(5)
+
+
+def test_larger_pending_batch_is_split_by_max_batch():
+    release = threading.Event()
+    flush = RecordingFlush()
+
+    def blocking_flush(kind, items):
+        assert release.wait(5)
+        return flush(kind, items)
+
+    queue = WriteBehindQueue(blocking_flush, window=0, max_batch=2)
+    first = queue.submit('pedido', {'n': 0})
+    # O primeiro item segura a thread de envio enquanto os demais acumulam
+    while queue.stats()['pending']:
+        time.sleep(0.01)
+    futures = [queue.submit('pedido', {'n': n}) for n in range(1, 6)]
+    release.set()
+
+    assert [future.result(5)['row'] for future in [first] + futures] == list(range(6))
+    assert [len(items) for _, items in flush.batches] == [1, 2, 2, 1]
+    queue.close(5)
+
+
+def test_failed_batch_resolves_every_item_with_error():
+    def failing_flush(kind, items):
+        raise ConnectionError('Apps Script fora do ar')
+
+    queue = WriteBehindQueue(failing_flush, window=0)
+    futures = [queue.submit('pedido', {'n': n}) for n in range(2)]
+
+    # Falhas chegam como resultado, não como exceção no Future
+    assert [future.result(5) for future in futures] == [{'success': False, 'error': 'Apps Script fora do ar'}] * 2
+    assert queue.stats()['failures'] == 2
+    queue.close(5)
+
+
+def test_result_count_mismatch_fails_whole_batch():
+    flush = RecordingFlush(results=lambda items: [{'success': True}])
+    queue = WriteBehindQueue(flush, window=0.05)
+
+    futures = [queue.submit('pedido', {'n': n}) for n in range(3)]
+
+    assert all(not future.result(5)['success'] for future in futures)
+    queue.close(5)
+
+
+def test_flush_waits_for_batch_already_being_sent():
+    started, release = threading.Event(), threading.Event()
+
+    def slow_flush(kind, items):
+        started.set()
+        assert release.wait(5)
+        return [{'success': True} for _ in items]
+
+    queue = WriteBehindQueue(slow_flush, window=0)
+    future = queue.submit('pedido', {'n': 0})
+    assert started.wait(5)
+    assert queue.stats()['pending'] == 0
+
+    flushed = threading.Thread(target=queue.flush, args=(5,))
+    flushed.start()
+    flushed.join(0.2)
+    # O lote saiu de _pending, mas ainda não foi confirmado
+    assert flushed.is_alive()
+
+    release.set()
+    flushed.join(5)
+    assert not flushed.is_alive()
+    assert future.done()
+    queue.close(5)
+
+
+def test_close_sends_pending_items_and_rejects_new_ones():
+    flush = RecordingFlush()
+    queue = WriteBehindQueue(flush, window=30)
+    futures = [queue.submit('pedido', {'n': n}) for n in range(2)]
+
+    queue.close(5)
+
+    assert all(future.done() for future in futures)
+    assert len(flush.batches) == 1
+    with pytest.raises(RuntimeError):
+        queue.submit('pedido', {'n': 2})
+
+
+def test_manager_enqueued_orders_reach_sheet_in_one_call(manager, emulator):
+    rows_before = len(manager.get_sheet_rows('DADOS_GERAIS'))
+    pedidos = [{'cliente': f'CLIENTE {n}', 'maquina': 'M1', 'bocas': 2} for n in range(4)]
+
+    futures = [manager.enqueue_pedido(pedido) for pedido in pedidos]
+    futures.append(manager.enqueue_pedido({'cliente': 'SEM MÁQUINA'}))
+    manager.flush_writes(5)
+
+    results = [future.result(0) for future in futures]
+    assert [result['success'] for result in results] == [True] * 4 + [False]
+    assert manager.get_http_stats()['addPedidos']['calls'] == 1
+    # A escrita invalida a aba: a próxima leitura já traz os pedidos novos
+    assert len(manager.get_sheet_rows('DADOS_GERAIS')) == rows_before + 4